@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Autotuning of the scalar multiplication algorithms, per curve.
+
+The fastest algorithm (and window size) depends on the curve size
+and on the use case:
+
+- 'mult': one-off scalar multiplication of any point,
+  i.e. curvegroup._mult, choosing among constant-time algorithms only
+- 'fixed_base': repeated multiplication of the same point
+  using its precomputed fixed-window table,
+  i.e. the window size of the curve generator table
+  (see curve._mult_generator)
+- 'verify': variable-time double scalar multiplication
+  used in signature verification,
+  i.e. the window size of curvegroup._double_mult_vartime
+
+autotune benchmarks the candidate algorithms of each use case
+for a given curve and selects the winners;
+pin allows to force a given choice, reset restores the defaults.
+
+Selections are persisted in the autotune.json file
+of the tablecache.cache_dir() directory (if not disabled),
+keyed by curve parameters, and loaded when a bundled curve is built
+or explicitly using load.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import secrets
+import tempfile
+import time
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+from .curvegroup import (
+    MultFunc,
+    _double_mult_vartime,
+    _mult_fixed_base,
+    _mult_fixed_window,
+    _mult_glv,
+    _mult_mont_ladder,
+    multiples_fixwind,
+)
+from .tablecache import cache_dir
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .curve import Curve
+
+USE_CASES = ("mult", "fixed_base", "verify")
+
+# selected algorithm name and window size (0 if not windowed)
+Choice = Tuple[str, int]
+
+# windowed algorithms for the 'mult' use case, with their window range
+# _mult is used with secret scalars (e.g. Diffie-Hellman):
+# only constant-time algorithms are candidates,
+# variable-time ones (w_NAF, sliding window) are never selected
+_MULT_ALGOS: Dict[str, Tuple[Callable, range]] = {
+    "fixed_window": (_mult_fixed_window, range(2, 7)),
+    "glv": (_mult_glv, range(2, 6)),
+    "mont_ladder": (_mult_mont_ladder, range(0)),
+}
+_FIXED_BASE_WINDOWS = range(4, 8)
+_VERIFY_WINDOWS = range(3, 8)
+
+_FILENAME = "autotune.json"
+
+
+def _mult_func(algo: str, w: int) -> MultFunc:
+    "Return the scalar multiplication function for algo and w."
+
+    if algo not in _MULT_ALGOS:
+        raise ValueError(f"unknown mult algorithm: {algo!r}")
+    func, windows = _MULT_ALGOS[algo]
+    if not windows:
+        return func
+    if w not in windows:
+        raise ValueError(f"invalid window size for {algo}: {w}")
+    return functools.partial(func, w=w)
+
+
+def candidates(ec: "Curve", use_case: str) -> List[Choice]:
+    "Return the candidate (algorithm, window size) for the use case."
+
+    if use_case == "mult":
+        return [
+            (algo, w)
+            for algo, (_, windows) in _MULT_ALGOS.items()
+            if algo != "glv" or ec._glv is not None
+            for w in (windows or [0])
+        ]
+    if use_case == "fixed_base":
+        return [("fixed_base", w) for w in _FIXED_BASE_WINDOWS]
+    if use_case == "verify":
+        return [("wnaf", w) for w in _VERIFY_WINDOWS]
+    raise ValueError(f"unknown use case: {use_case!r}")
+
+
+def _apply(ec: "Curve", use_case: str, choice: Choice) -> None:
+    algo, w = choice
+    if use_case == "mult":
+        ec._mult_func = _mult_func(algo, w)
+    elif use_case == "fixed_base":
+        if algo != "fixed_base" or w not in _FIXED_BASE_WINDOWS:
+            raise ValueError(f"invalid fixed_base choice: {choice}")
+        if ec._GT_w != w:
+            ec._GT_w = w
+            # the table is reloaded at first use
+            ec._GT = []
+    elif use_case == "verify":
+        if algo != "wnaf" or w not in _VERIFY_WINDOWS:
+            raise ValueError(f"invalid verify choice: {choice}")
+        ec._vartime_w = w
+    else:
+        raise ValueError(f"unknown use case: {use_case!r}")
+    ec._tuned[use_case] = choice
+
+
+def tuned(ec: "Curve") -> Dict[str, Choice]:
+    "Return the (algorithm, window size) selected for the curve use cases."
+
+    return dict(ec._tuned)
+
+
+def _curve_key(ec: "Curve") -> str:
+    "Return the key identifying the curve in the persisted selections."
+
+    ints = [ec.p, ec._a, ec._b, ec.G[0], ec.G[1], ec.n]
+    data = b"".join(i.to_bytes(ec.psize + 1, byteorder="big") for i in ints)
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def _filename(directory: Optional[str]) -> Optional[str]:
+    if directory is None:
+        directory = cache_dir()
+    return None if directory is None else os.path.join(directory, _FILENAME)
+
+
+def _read(filename: str) -> Dict[str, Dict[str, List]]:
+    try:
+        with open(filename, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _write(filename: str, data: Dict[str, Dict[str, List]]) -> None:
+    "Write the selections to file, atomically replacing any previous one."
+
+    directory = os.path.dirname(filename)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmpname = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmpname, filename)
+    except OSError:
+        os.remove(tmpname)
+        raise
+
+
+def save(ec: "Curve", directory: Optional[str] = None) -> bool:
+    """Persist the curve selections, return False if not possible.
+
+    The default directory is given by tablecache.cache_dir().
+    """
+
+    filename = _filename(directory)
+    if filename is None:
+        return False
+    data = _read(filename)
+    data[_curve_key(ec)] = {k: list(v) for k, v in ec._tuned.items()}
+    try:
+        _write(filename, data)
+    except OSError:
+        return False
+    return True
+
+
+def load(ec: "Curve", directory: Optional[str] = None) -> bool:
+    """Apply the persisted curve selections, return False if none.
+
+    Invalid persisted selections are ignored.
+    The default directory is given by tablecache.cache_dir().
+    """
+
+    filename = _filename(directory)
+    if filename is None or not os.path.isfile(filename):
+        return False
+    selections = _read(filename).get(_curve_key(ec))
+    if not isinstance(selections, dict):
+        return False
+    for use_case, choice in selections.items():
+        try:
+            algo, w = choice
+            _apply(ec, use_case, (str(algo), int(w)))
+        except (TypeError, ValueError):
+            continue
+    return True
+
+
+def pin(
+    ec: "Curve",
+    use_case: str,
+    algo: str,
+    w: int = 0,
+    persist: bool = False,
+    directory: Optional[str] = None,
+) -> None:
+    """Force the algorithm (and window size) for the curve use case.
+
+    The choice is persisted only if requested.
+    """
+
+    _apply(ec, use_case, (algo, w))
+    if persist:
+        save(ec, directory)
+
+
+def reset(ec: "Curve", use_cases: Iterable[str] = USE_CASES) -> None:
+    "Restore the default algorithms for the curve use cases."
+
+    for use_case in use_cases:
+        if use_case == "mult":
+            ec._mult_func = None
+        elif use_case == "fixed_base":
+            from .curve import _GT_W
+
+            if ec._GT_w != _GT_W:
+                ec._GT_w = _GT_W
+                ec._GT = []
+        elif use_case == "verify":
+            ec._vartime_w = None
+        else:
+            raise ValueError(f"unknown use case: {use_case!r}")
+        ec._tuned.pop(use_case, None)
+
+
+def _benchmark(
+    func: Callable[..., object], scalars: List[int], repeat: int, *args: object
+) -> float:
+    "Return the best time of repeated runs of func(m, *args) over the scalars."
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for m in scalars:
+            func(m, *args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _timings(
+    ec: "Curve", use_case: str, scalars: List[int], repeat: int
+) -> Dict[Choice, float]:
+    "Return the timings of the use case candidates."
+
+    QJ = _mult_fixed_window(scalars[0], ec.GJ, ec)
+    timings: Dict[Choice, float] = {}
+    for algo, w in candidates(ec, use_case):
+        if use_case == "mult":
+            t = _benchmark(_mult_func(algo, w), scalars, repeat, QJ, ec)
+        elif use_case == "fixed_base":
+            # the table is built once and for all: it is not benchmarked
+            T = multiples_fixwind(ec.GJ, ec, w)
+            t = _benchmark(_mult_fixed_base, scalars, repeat, T, ec, w)
+        else:
+            args = (QJ, scalars[-1], ec.GJ, ec, w)
+            t = _benchmark(_double_mult_vartime, scalars, repeat, *args)
+        timings[(algo, w)] = t
+    return timings
+
+
+def autotune(
+    ec: "Curve",
+    use_cases: Iterable[str] = USE_CASES,
+    number: int = 4,
+    repeat: int = 3,
+    persist: bool = True,
+    directory: Optional[str] = None,
+) -> Dict[str, Choice]:
+    """Benchmark the candidate algorithms and select the fastest ones.
+
+    For each use case, each candidate performs number scalar
+    multiplications with random scalars, taking the best of repeat runs.
+    The winners are applied to the curve and, if requested, persisted.
+    Return the selected (algorithm, window size) for each use case.
+    """
+
+    if number < 1:
+        raise ValueError(f"number must be positive: {number}")
+    if repeat < 1:
+        raise ValueError(f"repeat must be positive: {repeat}")
+
+    scalars = [1 + secrets.randbelow(ec.n - 1) for _ in range(number)]
+    result: Dict[str, Choice] = {}
+    for use_case in use_cases:
+        timings = _timings(ec, use_case, scalars, repeat)
+        result[use_case] = min(timings, key=timings.__getitem__)
+        _apply(ec, use_case, result[use_case])
+    if persist:
+        save(ec, directory)
+    return result
@@ -40,9 +40,17 @@ from typing import Iterable, List, Optional, Type, TypeVar, Union
 from dataclasses_json import DataClassJsonMixin, config
 
 from . import bip39, electrum
-from .alias import INF, Octets, Point, String
+from .alias import INF, JacPoint, Octets, Point, String
 from .base58 import b58decode, b58encode
-from .curve import mult, secp256k1
+from .curve import (
+    add_jac,
+    jac_from_point,
+    mult,
+    mult_jac,
+    point_from_jac,
+    points_from_jac,
+    secp256k1,
+)
 from .mnemonic import Mnemonic
 from .network import (
     _NETWORKS,
@@ -375,6 +383,45 @@ class _ExtendedBIP32KeyData(BIP32KeyData):
     Q: Point = INF  # non-Infinity for public key only
 
 
+def __ckd_prv(key_data: _ExtendedBIP32KeyData, index: int, Pbytes: bytes) -> None:
+    # key_data is a prvkey, Pbytes its serialized pubkey
+    key_data.depth += 1
+    key_data.parent_fingerprint = hash160(Pbytes)[:4]
+    key_data.index = index
+    if key_data.is_hardened:
+        h = hmac.digest(
+            key_data.chain_code, key_data.key + index.to_bytes(4, "big"), "sha512"
+        )
+    else:  # normal derivation
+        h = hmac.digest(
+            key_data.chain_code, Pbytes + index.to_bytes(4, "big"), "sha512"
+        )
+    key_data.chain_code = h[32:]
+    offset = int.from_bytes(h[:32], byteorder="big")
+    key_data.q = (key_data.q + offset) % ec.n
+    key_data.key = b"\x00" + key_data.q.to_bytes(32, "big")
+    key_data.Q = INF
+
+
+def __ckd_pub_jac(
+    key_data: _ExtendedBIP32KeyData, index: int, QJ: JacPoint
+) -> JacPoint:
+    # key_data is a pubkey: return the child pubkey in Jacobian coordinates,
+    # leaving to the caller the update of the key and Q fields;
+    # QJ is key_data.Q in Jacobian coordinates (see curve.jac_from_point)
+    key_data.depth += 1
+    key_data.parent_fingerprint = hash160(key_data.key)[:4]
+    key_data.index = index
+    if key_data.is_hardened:
+        raise ValueError("hardened derivation from public key")
+    h = hmac.digest(
+        key_data.chain_code, key_data.key + index.to_bytes(4, "big"), "sha512"
+    )
+    key_data.chain_code = h[32:]
+    offset = int.from_bytes(h[:32], byteorder="big")
+    return add_jac(QJ, mult_jac(offset, None, ec), ec)
+
+
 def __ckd(key_data: _ExtendedBIP32KeyData, index: int) -> None:
 
     # FIXME the following check should be enforced
@@ -383,37 +430,12 @@ def __ckd(key_data: _ExtendedBIP32KeyData, index: int) -> None:
 
     # key_data is a prvkey
     if key_data.key[0] == 0:
-        key_data.depth += 1
         Pbytes = bytes_from_point(mult(key_data.q))
-        key_data.parent_fingerprint = hash160(Pbytes)[:4]
-        key_data.index = index
-        if key_data.is_hardened:
-            h = hmac.digest(
-                key_data.chain_code, key_data.key + index.to_bytes(4, "big"), "sha512"
-            )
-        else:  # normal derivation
-            h = hmac.digest(
-                key_data.chain_code, Pbytes + index.to_bytes(4, "big"), "sha512"
-            )
-        key_data.chain_code = h[32:]
-        offset = int.from_bytes(h[:32], byteorder="big")
-        key_data.q = (key_data.q + offset) % ec.n
-        key_data.key = b"\x00" + key_data.q.to_bytes(32, "big")
-        key_data.Q = INF
+        __ckd_prv(key_data, index, Pbytes)
     # key_data is a pubkey
     else:
-        key_data.depth += 1
-        key_data.parent_fingerprint = hash160(key_data.key)[:4]
-        key_data.index = index
-        if key_data.is_hardened:
-            raise ValueError("hardened derivation from public key")
-        h = hmac.digest(
-            key_data.chain_code, key_data.key + index.to_bytes(4, "big"), "sha512"
-        )
-        key_data.chain_code = h[32:]
-        offset = int.from_bytes(h[:32], byteorder="big")
-        Offset = mult(offset)
-        key_data.Q = ec.add(key_data.Q, Offset)
+        QJ = jac_from_point(key_data.Q, ec)
+        key_data.Q = point_from_jac(__ckd_pub_jac(key_data, index, QJ), ec)
         key_data.key = bytes_from_point(key_data.Q)
         key_data.q = 0
 
@@ -488,6 +510,55 @@ def derive(
     return key_data.serialize()
 
 
+def derive_children(xkey: BIP32Key, indexes: Iterable[int]) -> List[bytes]:
+    """Derive the BIP32 child keys at the given indexes of a parent key.
+
+    It returns the same keys as [derive(xkey, index) for index in indexes],
+    but the parent key is processed only once
+    and, for a public parent key, the child public keys
+    are converted to affine coordinates all at once,
+    with a single modular inversion.
+    """
+
+    xkey_data = (
+        copy.copy(xkey)
+        if isinstance(xkey, BIP32KeyData)
+        else BIP32KeyData.deserialize(xkey)
+    )
+    indexes = [int(i) for i in indexes]
+    if indexes and xkey_data.depth == 255:
+        raise ValueError("final depth greater than 255: 256")
+
+    is_prv = xkey_data.key[0] == 0
+    q = int.from_bytes(xkey_data.key[1:], byteorder="big") if is_prv else 0
+    Q = INF if is_prv else point_from_octets(xkey_data.key, ec)
+    parent = _ExtendedBIP32KeyData(
+        version=xkey_data.version,
+        depth=xkey_data.depth,
+        parent_fingerprint=xkey_data.parent_fingerprint,
+        index=xkey_data.index,
+        chain_code=xkey_data.chain_code,
+        key=xkey_data.key,
+        q=q,
+        Q=Q,
+    )
+
+    children = [copy.copy(parent) for _ in indexes]
+    if is_prv:
+        Pbytes = bytes_from_point(mult(q))
+        for child, index in zip(children, indexes):
+            __ckd_prv(child, index, Pbytes)
+    else:
+        # the parent pubkey is validated once for all the children
+        QJ = jac_from_point(Q, ec)
+        QJs = [__ckd_pub_jac(c, index, QJ) for c, index in zip(children, indexes)]
+        for child, Q in zip(children, points_from_jac(QJs, ec)):
+            child.Q = Q
+            child.key = bytes_from_point(Q)
+
+    return [child.serialize() for child in children]
+
+
 def _derive_from_account(
     key_data: BIP32KeyData,
     branch: int,
@@ -144,6 +144,7 @@ from .bech32address import p2wpkh, witness_from_b32address
 from .curve import mult, secp256k1
 from .network import NETWORKS
 from .secpoint import bytes_from_point
+from .sigcache import SIGCACHE
 from .to_prvkey import PrvKey, prvkeyinfo_from_prvkey
 from .utils import hash160
 
@@ -332,8 +333,21 @@ def verify(msg: String, addr: String, sig: BMSig) -> bool:
 
     # try/except wrapper for the Errors raised by assert_as_valid
     try:
+        entry = _sigcache_entry(msg, addr, sig) if SIGCACHE.enabled else None
+        if entry is not None and entry in SIGCACHE:
+            return True
         assert_as_valid(msg, addr, sig)
     except Exception:
         return False
     else:
+        if entry is not None:
+            SIGCACHE.add(entry)
         return True
+
+
+def _sigcache_entry(msg: String, addr: String, sig: BMSig) -> bytes:
+    "Return the signature cache entry of the signature verification."
+
+    rf, r, s = decode(sig)
+    addr = addr.encode() if isinstance(addr, str) else addr
+    return SIGCACHE.entry("bms", secp256k1, _magic_message(msg), addr, encode(rf, r, s))
@@ -13,8 +13,14 @@ from collections import defaultdict
 from hashlib import sha256 as hf  # FIXME: any hf
 from typing import Dict, List, Sequence, Tuple
 
-from .alias import Point, String
-from .curve import double_mult, mult, secp256k1
+from .alias import JacPoint, Point, String
+from .curve import (
+    double_mult_jac,
+    jac_from_point,
+    mult_jac,
+    point_from_jac,
+    secp256k1,
+)
 from .secpoint import bytes_from_point
 from .utils import int_from_bits
 
@@ -40,6 +46,12 @@ def _get_msg_format(msg: bytes, pubk_rings: PubkeyRing) -> bytes:
 SValues = Dict[int, List[int]]
 
 
+def _jac_rings(pubk_rings: PubkeyRing) -> Dict[int, List[JacPoint]]:
+    "Return the pubkey rings in Jacobian coordinates, validated once."
+
+    return {i: [jac_from_point(P, ec) for P in r] for i, r in pubk_rings.items()}
+
+
 def sign(
     msg: String,
     ks: Sequence[int],
@@ -62,26 +74,27 @@ def sign(
     if isinstance(msg, str):
         msg = msg.encode()
     m = _get_msg_format(msg, pubk_rings)
+    jac_rings = _jac_rings(pubk_rings)
 
     e0bytes = m
     s: SValues = defaultdict(list)
     e: SValues = defaultdict(list)
     # step 1
     for i, (pubk_ring, j_star, k) in enumerate(
-        zip(pubk_rings.values(), sign_key_idx, ks)
+        zip(jac_rings.values(), sign_key_idx, ks)
     ):
         keys_size = len(pubk_ring)
         s[i] = [0] * keys_size
         e[i] = [0] * keys_size
         start_idx = (j_star + 1) % keys_size
-        R = bytes_from_point(mult(k), ec)
+        R = bytes_from_point(point_from_jac(mult_jac(k, ec.GJ, ec), ec), ec)
         if start_idx != 0:
             for j in range(start_idx, keys_size):
                 s[i][j] = secrets.randbits(256)
                 e[i][j] = int_from_bits(_hash(m, R, i, j), ec.nlen) % ec.n
                 assert 0 < e[i][j] < ec.n, "sign fail: how did you do that?!?"
-                T = double_mult(-e[i][j], pubk_ring[j], s[i][j], ec.G)
-                R = bytes_from_point(T, ec)
+                TJ = double_mult_jac(-e[i][j], pubk_ring[j], s[i][j], ec.GJ, ec)
+                R = bytes_from_point(point_from_jac(TJ, ec), ec)
         e0bytes += R
     e0 = hf(e0bytes).digest()
     # step 2
@@ -90,8 +103,9 @@ def sign(
         assert 0 < e[i][0] < ec.n, "sign fail: how did you do that?!?"
         for j in range(1, j_star + 1):
             s[i][j - 1] = secrets.randbits(256)
-            T = double_mult(-e[i][j - 1], pubk_rings[i][j - 1], s[i][j - 1], ec.G)
-            R = bytes_from_point(T, ec)
+            PJ = jac_rings[i][j - 1]
+            TJ = double_mult_jac(-e[i][j - 1], PJ, s[i][j - 1], ec.GJ, ec)
+            R = bytes_from_point(point_from_jac(TJ, ec), ec)
             e[i][j] = int_from_bits(_hash(m, R, i, j), ec.nlen) % ec.n
             assert 0 < e[i][j] < ec.n, "sign fail: how did you do that?!?"
         s[i][j_star] = k + sign_keys[i] * e[i][j_star]
@@ -124,6 +138,7 @@ def assert_as_valid(msg: bytes, e0: bytes, s: SValues, pubk_rings: PubkeyRing) -
 
     ring_size = len(pubk_rings)
     m = _get_msg_format(msg, pubk_rings)
+    jac_rings = _jac_rings(pubk_rings)
     e: SValues = defaultdict(list)
     e0bytes = m
     for i in range(ring_size):
@@ -133,8 +148,10 @@ def assert_as_valid(msg: bytes, e0: bytes, s: SValues, pubk_rings: PubkeyRing) -
         assert e[i][0] != 0, "invalid sig: how did you do that?!?"
         R = b"\0x00"
         for j in range(keys_size):
-            T = double_mult(-e[i][j], pubk_rings[i][j], s[i][j], ec.G)
-            R = bytes_from_point(T, ec)
+            # public data only: the faster variable-time algorithm can be used
+            PJ = jac_rings[i][j]
+            TJ = double_mult_jac(-e[i][j], PJ, s[i][j], ec.GJ, ec, vartime=True)
+            R = bytes_from_point(point_from_jac(TJ, ec), ec)
             if j != len(pubk_rings[i]) - 1:
                 h = _hash(m, R, i, j + 1)
                 e[i][j + 1] = int_from_bits(h, ec.nlen) % ec.n
@@ -10,22 +10,36 @@
 
 """Elliptic curve classes and functions."""
 
+import functools
 import json
 from math import sqrt
 from os import path
-from typing import Dict, List, Optional, Sequence
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence
 
 from .alias import Integer, JacPoint, Point
+from .autotune import load as load_tuned
 from .curvegroup import (
     _HEXTHRESHOLD,
     CurveGroup,
+    GLVParams,
+    WNAFTables,
     _double_mult,
+    _double_mult_vartime,
+    _glv_basis,
     _jac_from_aff,
     _mult,
+    _mult_fixed_base,
     _multi_mult,
+    _wnaf_tables,
 )
+from .tablecache import fixwind_table
 from .utils import hex_string, int_from_integer
 
+# window size of the fixed-base table of G multiples
+_GT_W = 6
+# window size of the wNAF tables of G used in signature verification
+_GT_WNAF_W = 8
+
 
 class CurveSubGroup(CurveGroup):
     "Subgroup of the points of an elliptic curve over Fp generated by G."
@@ -42,6 +56,20 @@ class CurveSubGroup(CurveGroup):
         if not self.is_on_curve(self.G):
             raise ValueError("Generator is not on the curve")
         self.GJ = self.G[0], self.G[1], 1  # Jacobian coordinates
+        # fixed-base table of G multiples, loaded on first use
+        # (see _mult_generator)
+        self._GT: Sequence[Sequence[JacPoint]] = []
+        self._GT_w = _GT_W
+        # wNAF tables of G, computed on first use
+        # (see _generator_wnaf_tables)
+        self._GT_wnaf: WNAFTables = []
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the generator tables are not pickled, being rebuilt at first use
+        state = self.__dict__.copy()
+        state["_GT"] = []
+        state["_GT_wnaf"] = []
+        return state
 
     def __str__(self) -> str:
         result = super().__str__()
@@ -76,8 +104,13 @@ class Curve(CurveSubGroup):
         h: int,
         weakness_check: bool = True,
         name: Optional[str] = None,
+        trusted: bool = False,
     ) -> None:
 
+        # trusted parameters (e.g. the bundled standard curves)
+        # have already been validated: the expensive checks are skipped,
+        # i.e. n primality, n*G = INF, and the weakness check
+
         super().__init__(p, a, b, G)
         n = int_from_integer(n)
 
@@ -93,7 +126,7 @@ class Curve(CurveSubGroup):
         self.nsize = (self.nlen + 7) // 8
 
         # 5. Check that n is prime.
-        if n < 2 or n % 2 == 0 or pow(2, n - 1, n) != 1:
+        if n < 2 or n % 2 == 0 or (not trusted and pow(2, n - 1, n) != 1):
             err_msg = "n is not prime: "
             err_msg += f"{hex_string(n)}" if n > _HEXTHRESHOLD else f"{n}"
             raise ValueError(err_msg)
@@ -109,8 +142,7 @@ class Curve(CurveSubGroup):
         if self.G[1] == 0:
             m = "INF point cannot be a generator"
             raise ValueError(m)
-        InfJ = _mult(n, self.GJ, self)
-        if InfJ[2] != 0:
+        if not trusted and _mult(n, self.GJ, self)[2] != 0:
             err_msg = "n is not the group order: "
             err_msg += f"{hex_string(n)}" if n > _HEXTHRESHOLD else f"{n}"
             raise ValueError(err_msg)
@@ -125,7 +157,7 @@ class Curve(CurveSubGroup):
         assert n != p, f"n=p weak curve: {hex_string(n)}"
         #    raise UserWarning("n=p -> weak curve")
 
-        if weakness_check:
+        if weakness_check and not trusted:
             # 8. Check that p^i % n ≠ 1 for all 1≤i<100
             for i in range(1, 100):
                 if pow(self.p, i, n) == 1:
@@ -133,6 +165,9 @@ class Curve(CurveSubGroup):
 
         self.name = name
 
+        # enable the GLV endomorphism, if available
+        self._glv = _glv_params(self)
+
     def __str__(self) -> str:
         result = super().__str__()
         if self.n > _HEXTHRESHOLD:
@@ -153,71 +188,199 @@ class Curve(CurveSubGroup):
         return result
 
 
+def _cube_roots_of_unity(p: int) -> List[int]:
+    "Return the non-trivial cube roots of unity mod the prime p, if any."
+
+    if p % 3 != 1:
+        return []
+    g = 2
+    root = pow(g, (p - 1) // 3, p)
+    while root == 1:
+        g += 1
+        root = pow(g, (p - 1) // 3, p)
+    return [root, root * root % p]
+
+
+def _glv_params(ec: Curve) -> Optional[GLVParams]:
+    """Return the GLV endomorphism parameters, if available.
+
+    Curves with a=0 and p = 1 (mod 3) have the (x, y) -> (beta*x, y)
+    endomorphism, with beta being a non-trivial cube root of unity mod p.
+    In a prime order group it is equivalent to a lambda scalar
+    multiplication, with lambda being a non-trivial cube root of unity
+    mod n. The cofactor must be one, as all curve points are required
+    to be in the prime order subgroup.
+    """
+
+    if ec._a != 0 or ec.h != 1:
+        return None
+
+    betas = _cube_roots_of_unity(ec.p)
+    for lam in _cube_roots_of_unity(ec.n):
+        LJ = _mult(lam, ec.GJ, ec)
+        for beta in betas:
+            if ec._jac_equality(LJ, (beta * ec.G[0] % ec.p, ec.G[1], 1)):
+                a1, b1, a2, b2 = _glv_basis(lam, ec.n)
+                return beta, lam, ec.n, a1, b1, a2, b2
+    return None
+
+
 datadir = path.join(path.dirname(__file__), "data")
 
+
+@functools.lru_cache()
+def _curve_params(filename: str) -> Dict[str, list]:
+    "Return the curve parameters in the bundled json file."
+
+    with open(path.join(datadir, filename), "r") as f:
+        return json.load(f)
+
+
+# bundled curves already built, shared among all the curve registries
+_BUNDLED_CURVES: Dict[str, Curve] = {}
+
+
+class _CurveRegistry(Mapping[str, Curve]):
+    """Read-only mapping of the bundled curves, by name.
+
+    The parameters are loaded from the json files at first use
+    and each curve is built only when accessed for the first time:
+    as the bundled parameters have already been validated,
+    the curve is built using the trusted fast path.
+    """
+
+    def __init__(self, *filenames: str) -> None:
+        self._filenames = filenames
+
+    def _params(self) -> Dict[str, list]:
+        params: Dict[str, list] = {}
+        for filename in self._filenames:
+            params.update(_curve_params(filename))
+        return params
+
+    def __getitem__(self, ec_name: str) -> Curve:
+        # the shared cache must not expose other registries' curves
+        params = self._params()
+        if ec_name not in params:
+            raise KeyError(ec_name)
+        ec = _BUNDLED_CURVES.get(ec_name)
+        if ec is None:
+            p, a, b, G, n, h = params[ec_name]
+            ec = Curve(p, a, b, G, n, h, True, ec_name, trusted=True)
+            # apply the persisted autotuning selections, if any
+            load_tuned(ec)
+            _BUNDLED_CURVES[ec_name] = ec
+        return ec
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._params())
+
+    def __len__(self) -> int:
+        return len(self._params())
+
+
 # Elliptic Curve Cryptography (ECC)
 # Brainpool Standard Curves and Curve Generation
 # https://tools.ietf.org/html/rfc5639
-filename = path.join(datadir, "ec_Brainpool.json")
-with open(filename, "r") as f:
-    Brainpool_params2 = json.load(f)
-Brainpool: Dict[str, Curve] = {}
-for ec_name in Brainpool_params2:
-    Brainpool[ec_name] = Curve(*Brainpool_params2[ec_name] + [True, ec_name])
-
+Brainpool: Mapping[str, Curve] = _CurveRegistry("ec_Brainpool.json")
 
 # FIPS PUB 186-4
 # FEDERAL INFORMATION PROCESSING STANDARDS PUBLICATION
 # Digital Signature Standard (DSS)
 # https://oag.ca.gov/sites/all/files/agweb/pdfs/erds1/fips_pub_07_2013.pdf
-filename = path.join(datadir, "ec_NIST.json")
-with open(filename, "r") as f:
-    NIST_params2 = json.load(f)
-NIST: Dict[str, Curve] = {}
-for ec_name in NIST_params2:
-    NIST[ec_name] = Curve(*NIST_params2[ec_name] + [True, ec_name])
+NIST: Mapping[str, Curve] = _CurveRegistry("ec_NIST.json")
 
+# curves included in both SEC 2 v.1 and SEC 2 v.2
+# http://www.secg.org/sec2-v2.pdf
+SEC2v2: Mapping[str, Curve] = _CurveRegistry("ec_SEC2v2.json")
 
-# SEC 2 v.1 curves, removed from SEC 2 v.2 as insecure ones
+# SEC 2 v.1 curves, including the ones removed from SEC 2 v.2 as insecure
 # http://www.secg.org/SEC2-Ver-1.0.pdf
-filename = path.join(datadir, "ec_SEC2v1_insecure.json")
-with open(filename, "r") as f:
-    SEC2v1_params2 = json.load(f)
-SEC2v1: Dict[str, Curve] = {}
-for ec_name in SEC2v1_params2:
-    SEC2v1[ec_name] = Curve(*SEC2v1_params2[ec_name] + [True, ec_name])
-
+SEC2v1: Mapping[str, Curve] = _CurveRegistry(
+    "ec_SEC2v1_insecure.json", "ec_SEC2v2.json"
+)
 
-# curves included in both SEC 2 v.1 and SEC 2 v.2
-# http://www.secg.org/sec2-v2.pdf
-filename = path.join(datadir, "ec_SEC2v2.json")
-with open(filename, "r") as f:
-    SEC2v2_params2 = json.load(f)
-SEC2v2: Dict[str, Curve] = {}
-for ec_name in SEC2v2_params2:
-    SEC2v2[ec_name] = Curve(*SEC2v2_params2[ec_name] + [True, ec_name])
-    SEC2v1[ec_name] = Curve(*SEC2v2_params2[ec_name] + [True, ec_name])
-
-CURVES = SEC2v1
-CURVES.update(NIST)
-CURVES.update(Brainpool)
+CURVES: Mapping[str, Curve] = _CurveRegistry(
+    "ec_SEC2v1_insecure.json", "ec_SEC2v2.json", "ec_NIST.json", "ec_Brainpool.json"
+)
 
 secp256k1 = CURVES["secp256k1"]
 
 
+def _mult_generator(m: int, ec: Curve) -> JacPoint:
+    """Scalar multiplication of the curve generator G.
+
+    The fixed-base table of G multiples is loaded
+    only once per curve, at first use,
+    from the persistent table cache (see tablecache.fixwind_table):
+    then the multiplication just needs additions.
+
+    The m coefficient is reduced mod n.
+    """
+
+    if m < 0:
+        raise ValueError(f"negative m: {hex(m)}")
+
+    return _mult_fixed_base(m % ec.n, _generator_table(ec), ec, ec._GT_w)
+
+
+def _generator_table(ec: Curve) -> Sequence[Sequence[JacPoint]]:
+    """Return the fixed-base table of the curve generator G.
+
+    It is loaded only once per curve, at first use,
+    from the persistent table cache (see tablecache.fixwind_table),
+    and kept decoded in memory, avoiding the decoding
+    of the memory-mapped points at each multiplication.
+    """
+
+    if not ec._GT:
+        ec._GT = [list(row) for row in fixwind_table(ec.G, ec, ec._GT_w)]
+    return ec._GT
+
+
+def _generator_wnaf_tables(ec: Curve) -> WNAFTables:
+    """Return the wNAF tables of the curve generator G.
+
+    They are computed only once per curve, at first use,
+    to be provided to _double_mult_vartime
+    (e.g. in signature verification).
+    """
+
+    if not ec._GT_wnaf:
+        ec._GT_wnaf = _wnaf_tables(ec.GJ, ec, _GT_WNAF_W)
+    return ec._GT_wnaf
+
+
 def mult(m: Integer, Q: Point = None, ec: Curve = secp256k1) -> Point:
     "Elliptic curve scalar multiplication."
-    if Q is None:
-        QJ = ec.GJ
-    else:
-        ec.require_on_curve(Q)
-        QJ = _jac_from_aff(Q)
 
     m = int_from_integer(m) % ec.n
-    R = _mult(m, QJ, ec)
+    if Q is None or Q == ec.G:
+        R = _mult_generator(m, ec)
+    else:
+        ec.require_on_curve(Q)
+        R = _mult(m, _jac_from_aff(Q), ec)
     return ec._aff_from_jac(R)
 
 
+def batch_mult(
+    scalars: Sequence[Integer], Q: Optional[Point] = None, ec: Curve = secp256k1
+) -> List[Point]:
+    """Return the scalar multiplications m_i*Q for all the m_i scalars.
+
+    The resulting points are converted to affine coordinates
+    all at once, with a single modular inversion.
+    """
+
+    if Q is None or Q == ec.G:
+        RJs = [_mult_generator(int_from_integer(m) % ec.n, ec) for m in scalars]
+    else:
+        ec.require_on_curve(Q)
+        QJ = _jac_from_aff(Q)
+        RJs = [_mult(int_from_integer(m) % ec.n, QJ, ec) for m in scalars]
+    return ec._aff_from_jac_batch(RJs)
+
+
 def double_mult(
     u: Integer, H: Point, v: Integer, Q: Point, ec: Curve = secp256k1
 ) -> Point:
@@ -236,11 +399,15 @@ def double_mult(
 
 
 def multi_mult(
-    scalars: Sequence[Integer], Points: Sequence[Point], ec: Curve = secp256k1
+    scalars: Sequence[Integer],
+    Points: Sequence[Point],
+    ec: Curve = secp256k1,
+    w: Optional[int] = None,
 ) -> Point:
     """Return the multi scalar multiplication u1*Q1 + ... + un*Qn.
 
-    Use Bos-Coster's algorithm for efficient computation.
+    Use Pippenger's bucket algorithm for efficient computation,
+    with window size w if provided (chosen automatically otherwise).
     """
 
     if len(scalars) != len(Points):
@@ -258,5 +425,82 @@ def multi_mult(
         ec.require_on_curve(P)
         JPoints.append(_jac_from_aff(P))
 
-    R = _multi_mult(ints, JPoints, ec)
+    R = _multi_mult(ints, JPoints, ec, w)
     return ec._aff_from_jac(R)
+
+
+# Jacobian pipeline API
+#
+# The functions above take and return affine points:
+# chaining them costs a curve check at each input
+# and a modular inversion at each output.
+# The following ones take and return Jacobian points instead:
+# affine points are validated once, entering the pipeline
+# with jac_from_point, and normalized once, leaving it
+# with point_from_jac (or points_from_jac, for many points).
+# Jacobian points are assumed to come from these functions,
+# i.e. to be valid curve points: they are not checked again.
+
+
+def jac_from_point(Q: Point, ec: Curve = secp256k1) -> JacPoint:
+    "Return the Jacobian coordinates of the affine point, checked to be on curve."
+
+    ec.require_on_curve(Q)
+    return _jac_from_aff(Q)
+
+
+def point_from_jac(QJ: JacPoint, ec: Curve = secp256k1) -> Point:
+    "Return the affine coordinates of the Jacobian point."
+
+    return ec._aff_from_jac(QJ)
+
+
+def points_from_jac(QJs: Sequence[JacPoint], ec: Curve = secp256k1) -> List[Point]:
+    """Return the affine coordinates of the Jacobian points.
+
+    The points are converted all at once, with a single modular inversion.
+    """
+
+    return ec._aff_from_jac_batch(QJs)
+
+
+def add_jac(QJ: JacPoint, RJ: JacPoint, ec: Curve = secp256k1) -> JacPoint:
+    "Return the sum of the Jacobian points."
+
+    return ec._add_jac(QJ, RJ)
+
+
+def mult_jac(
+    m: Integer, QJ: Optional[JacPoint] = None, ec: Curve = secp256k1
+) -> JacPoint:
+    "Elliptic curve scalar multiplication, in Jacobian coordinates."
+
+    m = int_from_integer(m) % ec.n
+    if QJ is None or QJ == ec.GJ:
+        return _mult_generator(m, ec)
+    return _mult(m, QJ, ec)
+
+
+def double_mult_jac(
+    u: Integer,
+    HJ: JacPoint,
+    v: Integer,
+    QJ: JacPoint,
+    ec: Curve = secp256k1,
+    vartime: bool = False,
+) -> JacPoint:
+    """Double scalar multiplication (u*H + v*Q), in Jacobian coordinates.
+
+    The faster variable-time algorithm is used if vartime is True:
+    only for public data (e.g. signature verification).
+    """
+
+    u = int_from_integer(u) % ec.n
+    v = int_from_integer(v) % ec.n
+    if not vartime:
+        return _double_mult(u, HJ, v, QJ, ec)
+    if QJ == ec.GJ:
+        return _double_mult_vartime(u, HJ, v, QJ, ec, QT=_generator_wnaf_tables(ec))
+    if HJ == ec.GJ:
+        return _double_mult_vartime(u, HJ, v, QJ, ec, HT=_generator_wnaf_tables(ec))
+    return _double_mult_vartime(u, HJ, v, QJ, ec)
@@ -16,17 +16,35 @@ the cyclic subgroup class of prime order Curve,
 see the btclib.curve module.
 """
 
-import functools
 import heapq
 from math import ceil
-from typing import List, Sequence, Tuple, Union
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from .alias import INF, INFJ, Integer, JacPoint, Point
-from .numbertheory import legendre_symbol, mod_inv, mod_sqrt
+from .numbertheory import batch_mod_inv, jacobi_symbol, mod_inv, mod_sqrt
+from .pointcache import TABLE_CACHE
 from .utils import hex_string, int_from_integer
 
 _HEXTHRESHOLD = 0xFFFFFFFF
 
+# GLV endomorphism parameters: (beta, lambda, n, a1, b1, a2, b2)
+# where (x, y) -> (beta*x, y) is the endomorphism, equivalent to
+# the lambda scalar multiplication in the subgroup of order n,
+# and (a1, b1), (a2, b2) is the short basis used for scalar splitting
+GLVParams = Tuple[int, int, int, int, int, int, int]
+
+# scalar multiplication algorithm, as in _mult(m, Q, ec)
+MultFunc = Callable[[int, JacPoint, "CurveGroup"], JacPoint]
+
 
 def _jac_from_aff(Q: Point) -> JacPoint:
     """Return the Jacobian representation of the affine point.
@@ -97,6 +115,25 @@ class CurveGroup:
         self._a = a
         self._b = b
 
+        # specialized Jacobian doubling formulas for a=0 and a=-3
+        # (e.g. secp256k1 and NIST curves), selected once and for all
+        if a == 0:
+            self._double_jac = self._double_jac_a0  # type: ignore
+        elif a == p - 3:
+            self._double_jac = self._double_jac_a3  # type: ignore
+
+        # GLV endomorphism parameters, if any:
+        # they can be set only when the group order is known
+        self._glv: Optional[GLVParams] = None
+
+        # scalar multiplication algorithm used by _mult
+        # and window size of _double_mult_vartime:
+        # None means default, see the autotune module
+        self._mult_func: Optional[MultFunc] = None
+        self._vartime_w: Optional[int] = None
+        # (algorithm, window size) selected for each use case
+        self._tuned: Dict[str, Tuple[str, int]] = {}
+
     def __str__(self) -> str:
         result = "Curve"
         if self.p > _HEXTHRESHOLD:
@@ -153,11 +190,33 @@ class CurveGroup:
         if Q[2] == 0:  # Infinity point in Jacobian coordinates
             return INF
         else:
-            Z2 = Q[2] * Q[2]
-            x = Q[0] * mod_inv(Z2, self.p)
-            y = Q[1] * mod_inv(Z2 * Q[2], self.p)
+            Zinv = mod_inv(Q[2], self.p)
+            Zinv2 = Zinv * Zinv
+            x = Q[0] * Zinv2
+            y = Q[1] * Zinv2 * Zinv
             return x % self.p, y % self.p
 
+    def _aff_from_jac_batch(self, QJs: Sequence[JacPoint]) -> List[Point]:
+        """Return the affine representation of the Jacobian points.
+
+        It performs a single mod_inv for all the points,
+        using Montgomery's trick.
+        The points are assumed to be on curve.
+        """
+
+        # the infinity point has Z=0: use 1 as dummy value for its inverse
+        Zinvs = batch_mod_inv([Q[2] if Q[2] else 1 for Q in QJs], self.p)
+        result: List[Point] = []
+        for Q, Zinv in zip(QJs, Zinvs):
+            if Q[2] == 0:  # Infinity point in Jacobian coordinates
+                result.append(INF)
+            else:
+                Zinv2 = Zinv * Zinv
+                x = Q[0] * Zinv2
+                y = Q[1] * Zinv2 * Zinv
+                result.append((x % self.p, y % self.p))
+        return result
+
     def _x_aff_from_jac(self, Q: JacPoint) -> int:
         # point is assumed to be on curve
         if Q[2] == 0:  # Infinity point in Jacobian coordinates
@@ -215,13 +274,7 @@ class CurveGroup:
         # FIXME: it would be better if doubling was not a special case
         if M % self.p == N % self.p:  # same affine x
             if T % self.p == U % self.p:  # point doubling
-                QY2 = Q[1] * Q[1]
-                W = 3 * Q[0] * Q[0] + self._a * QZ2 * QZ2
-                V = 4 * Q[0] * QY2
-                X = W * W - 2 * V
-                Y = W * (V - X) - 8 * QY2 * QY2
-                Z = 2 * Q[1] * Q[2]
-                return X % self.p, Y % self.p, Z % self.p
+                return self._double_jac(Q)
 
         W = U - T
         V = N - M
@@ -248,6 +301,115 @@ class CurveGroup:
         i = (Q[2] == 0) + (R[2] == 0) * 2
         return ret_values[i]
 
+    def _add_jac_vartime(self, Q: JacPoint, R: JacPoint) -> JacPoint:
+        # points are assumed to be on curve
+
+        # variable-time version of _add_jac, to be used on public data only
+        # (e.g. signature verification): special cases are handled
+        # with early returns and no useless calculation is performed
+
+        if Q[2] == 0:
+            return R
+        if R[2] == 0:
+            return Q
+
+        RZ2 = R[2] * R[2]
+        QZ2 = Q[2] * Q[2]
+        M = Q[0] * RZ2 % self.p
+        T = Q[1] * RZ2 * R[2] % self.p
+        V = (R[0] * QZ2 - M) % self.p
+        W = (R[1] * QZ2 * Q[2] - T) % self.p
+
+        if V == 0:  # same affine x
+            return self._double_jac(Q) if W == 0 else INFJ
+
+        V2 = V * V
+        V3 = V2 * V
+        MV2 = M * V2
+
+        X = (W * W - V3 - 2 * MV2) % self.p
+        Y = (W * (MV2 - X) - T * V3) % self.p
+        Z = (V * Q[2] * R[2]) % self.p
+        return X, Y, Z
+
+    def _add_jac_aff(self, Q: JacPoint, R: Union[Point, JacPoint]) -> JacPoint:
+        # points are assumed to be on curve
+
+        # mixed addition: R is either an affine point or
+        # a normalized Jacobian point (i.e. Z=1, or INFJ),
+        # as only its x and y coordinates are used:
+        # the multiplications involving its Z coordinate are saved
+
+        # as in _add_jac, Q or R equal to infinity
+        # are not handled has a special case here
+        # but taken care of at the end, after having performed all calculation
+
+        QZ2 = Q[2] * Q[2]
+        N = R[0] * QZ2 % self.p
+        U = R[1] * QZ2 * Q[2] % self.p
+
+        W = U - Q[1]
+        V = N - Q[0]
+
+        # FIXME: it would be better if doubling was not a special case
+        if V % self.p == 0 and W % self.p == 0:  # point doubling
+            X, Y, Z = self._double_jac(Q)
+        else:
+            V2 = V * V
+            V3 = V2 * V
+            MV2 = Q[0] * V2
+
+            X = (W * W - V3 - 2 * MV2) % self.p
+            Y = (W * (MV2 - X) - Q[1] * V3) % self.p
+            Z = (V * Q[2]) % self.p
+
+        # possible return values are:
+        ret_values = [(X, Y, Z), (R[0], R[1], 1), Q, INFJ]
+        #      Q==INFJ  +    R==INF  * 2
+        #            0  +         0  * 2 = 0 → (X, Y, Z)
+        #            1  +         0  * 2 = 1 → R
+        #            0  +         1  * 2 = 2 → Q
+        #            1  +         1  * 2 = 3 → INFJ
+        i = (Q[2] == 0) + (R[1] == 0) * 2
+        return ret_values[i]
+
+    def _add_jac_aff_vartime(self, Q: JacPoint, R: Union[Point, JacPoint]) -> JacPoint:
+        # points are assumed to be on curve
+
+        # variable-time version of _add_jac_aff, see _add_jac_vartime
+
+        if Q[2] == 0:
+            return INFJ if R[1] == 0 else (R[0], R[1], 1)
+        if R[1] == 0:
+            return Q
+
+        QZ2 = Q[2] * Q[2]
+        V = (R[0] * QZ2 - Q[0]) % self.p
+        W = (R[1] * QZ2 * Q[2] - Q[1]) % self.p
+
+        if V == 0:  # same affine x
+            return self._double_jac(Q) if W == 0 else INFJ
+
+        V2 = V * V
+        V3 = V2 * V
+        MV2 = Q[0] * V2
+
+        X = (W * W - V3 - 2 * MV2) % self.p
+        Y = (W * (MV2 - X) - Q[1] * V3) % self.p
+        Z = (V * Q[2]) % self.p
+        return X, Y, Z
+
+    def _normalize_jac_batch(self, QJs: Sequence[JacPoint]) -> List[JacPoint]:
+        """Return the Jacobian points normalized to Z=1 (INFJ for infinity).
+
+        It performs a single mod_inv for all the points,
+        so that the normalized points can be efficiently used
+        as second addend of the mixed addition _add_jac_aff.
+        The points are assumed to be on curve.
+        """
+
+        return [_jac_from_aff(Q) for Q in self._aff_from_jac_batch(QJs)]
+
     def _double_jac(self, Q: JacPoint) -> JacPoint:
         # point is assumed to be on curve
 
@@ -260,6 +422,31 @@ class CurveGroup:
         Z = 2 * Q[1] * Q[2]
         return X % self.p, Y % self.p, Z % self.p
 
+    def _double_jac_a0(self, Q: JacPoint) -> JacPoint:
+        # point is assumed to be on curve
+
+        # _double_jac for a=0: the a*Z^4 term vanishes
+        QY2 = Q[1] * Q[1]
+        W = 3 * Q[0] * Q[0]
+        V = 4 * Q[0] * QY2
+        X = W * W - 2 * V
+        Y = W * (V - X) - 8 * QY2 * QY2
+        Z = 2 * Q[1] * Q[2]
+        return X % self.p, Y % self.p, Z % self.p
+
+    def _double_jac_a3(self, Q: JacPoint) -> JacPoint:
+        # point is assumed to be on curve
+
+        # _double_jac for a=-3: 3*X^2 - 3*Z^4 = 3*(X - Z^2)*(X + Z^2)
+        QZ2 = Q[2] * Q[2]
+        QY2 = Q[1] * Q[1]
+        W = 3 * (Q[0] - QZ2) * (Q[0] + QZ2)
+        V = 4 * Q[0] * QY2
+        X = W * W - 2 * V
+        Y = W * (V - X) - 8 * QY2 * QY2
+        Z = 2 * Q[1] * Q[2]
+        return X % self.p, Y % self.p, Z % self.p
+
     def _add_aff(self, Q: Point, R: Point) -> Point:
         # points are assumed to be on curve
 
@@ -298,18 +485,31 @@ class CurveGroup:
         # This is a good reason to keep this method private
         return ((x ** 2 + self._a) * x + self._b) % self.p
 
-    def y(self, x: int) -> int:
-        """Return the y coordinate from x, as in (x, y)."""
+    def _checked_y2(self, x: int) -> int:
         if not 0 <= x < self.p:
             err_msg = "x-coordinate not in 0..p-1: "
             err_msg += f"{hex_string(x)}" if x > _HEXTHRESHOLD else f"{x}"
             raise ValueError(err_msg)
+        return self._y2(x)
+
+    def y(self, x: int) -> int:
+        """Return the y coordinate from x, as in (x, y)."""
+        y2 = self._checked_y2(x)
         try:
-            y2 = self._y2(x)
             return mod_sqrt(y2, self.p)
         except Exception:
             raise ValueError("invalid x-coordinate")
 
+    def require_valid_x(self, x: int) -> None:
+        """Require x to be the x-coordinate of a curve point.
+
+        It raises the same errors as y, but it is faster:
+        the square root of y^2 is not computed,
+        its existence is checked using the Jacobi symbol.
+        """
+        if jacobi_symbol(self._checked_y2(x), self.p) == -1:
+            raise ValueError("invalid x-coordinate")
+
     def require_on_curve(self, Q: Point) -> None:
         """Require the input curve Point to be on the curve.
 
@@ -333,11 +533,13 @@ class CurveGroup:
 
         The input point is not checked to be on the curve.
         """
+        # for the prime p the Jacobi symbol is the Legendre symbol,
+        # but it is computed without modular exponentiation
         if len(Q) == 2:
-            return legendre_symbol(Q[1], self.p) == 1
+            return jacobi_symbol(Q[1], self.p) == 1
         if len(Q) == 3:
             # FIXME: do not ignore
-            return legendre_symbol(Q[1] * Q[2] % self.p, self.p) == 1  # type: ignore
+            return jacobi_symbol(Q[1] * Q[2] % self.p, self.p) == 1  # type: ignore
         raise TypeError("not a point")
 
     def require_p_ThreeModFour(self) -> None:
@@ -373,10 +575,11 @@ class CurveGroup:
         if quad_res not in (0, 1):
             raise ValueError("quad_res must be bool or 1/0")
         self.require_p_ThreeModFour()
+        # for p = 3 mod 4 the root is y^2^((p+1)/4), i.e. a quadratic residue:
+        # there is no need to check it with the Legendre symbol
         root = self.y(x)
-        # switch to quadratic residue root as needed
-        legendre = legendre_symbol(root, self.p)
-        return root if legendre == quad_res else self.p - root
+        # switch to quadratic non-residue root as needed
+        return root if quad_res else self.p - root
 
 
 def _mult_recursive_aff(m: int, Q: Point, ec: CurveGroup) -> Point:
@@ -493,7 +696,11 @@ def _mult_jac(m: int, Q: JacPoint, ec: CurveGroup) -> JacPoint:
 
 
 def multiples(Q: JacPoint, size: int, ec: CurveGroup) -> List[JacPoint]:
-    "Return {k_i * Q} for k_i in {0, ..., size-1)"
+    """Return {k_i * Q} for k_i in {0, ..., size-1).
+
+    The points are normalized to Z=1 (with a single mod_inv),
+    to be used in mixed additions.
+    """
 
     if size < 2:
         raise ValueError(f"size too low: {size}")
@@ -507,31 +714,34 @@ def multiples(Q: JacPoint, size: int, ec: CurveGroup) -> List[JacPoint]:
     if odd:
         T.append(ec._double_jac(T[(size - 1) // 2]))
 
-    return T
+    return ec._normalize_jac_batch(T)
 
 
 _MAX_W = 5
 
 
-@functools.lru_cache()  # least recently used cache
 def cached_multiples(Q: JacPoint, ec: CurveGroup) -> List[JacPoint]:
+    """Return multiples(Q, 2**_MAX_W, ec), cached in TABLE_CACHE.
 
-    T = [INFJ, Q]
-    for i in range(3, 2 ** _MAX_W, 2):
-        T.append(ec._double_jac(T[(i - 1) // 2]))
-        T.append(ec._add_jac(T[-1], Q))
-    return T
+    See the pointcache module.
+    """
 
+    return TABLE_CACHE.get(("multiples", Q, ec), lambda: multiples(Q, 2 ** _MAX_W, ec))
 
-@functools.lru_cache()
-def cached_multiples_fixwind(
-    Q: JacPoint, ec: CurveGroup, w: int = 4
-) -> List[List[JacPoint]]:
-    """Made to precompute values for _mult_fixed_window_cached.
-    Do not use it for other functions.
-    Made to be used for w=4, do not use w.
+
+def multiples_fixwind(Q: JacPoint, ec: CurveGroup, w: int = 4) -> List[List[JacPoint]]:
+    """Return the fixed-window table of Q multiples.
+
+    The j-th row of the table is {k_i * 2^(w*j) * Q}
+    for k_i in {0, ..., 2^w-1}, with enough rows to cover
+    any scalar whose bit-length is not larger than ec.psize * 8 + 1.
+    The points are normalized to Z=1 (with a single mod_inv
+    for the whole table), to be used in mixed additions.
     """
 
+    if w <= 0:
+        raise ValueError(f"non positive w: {w}")
+
     T = []
     K = Q
     for _ in range((ec.psize * 8) // w + 1):
@@ -542,7 +752,38 @@ def cached_multiples_fixwind(
         K = ec._double_jac(sublist[2 ** (w - 1)])
         T.append(sublist)
 
-    return T
+    size = 2 ** w
+    points = ec._normalize_jac_batch([P for sublist in T for P in sublist])
+    return [points[i : i + size] for i in range(0, len(points), size)]
+
+
+def cached_multiples_fixwind(
+    Q: JacPoint, ec: CurveGroup, w: int = 4, pin: bool = False
+) -> List[List[JacPoint]]:
+    """Return multiples_fixwind(Q, ec, w), cached in TABLE_CACHE.
+
+    Made to precompute values for _mult_fixed_window_cached.
+    The table is never evicted from the cache if pinned.
+    See the pointcache module.
+    """
+
+    key = ("multiples_fixwind", Q, ec, w)
+    return TABLE_CACHE.get(key, lambda: multiples_fixwind(Q, ec, w), pin)
+
+
+def warm_up(
+    QJs: Iterable[JacPoint], ec: CurveGroup, w: int = 4, pin: bool = True
+) -> None:
+    """Precompute and cache the fixed-window tables of the points.
+
+    Made for hot points (e.g. frequently used public keys)
+    to be multiplied with _mult_fixed_window_cached:
+    by default their tables are pinned in TABLE_CACHE,
+    so that they are never evicted.
+    """
+
+    for QJ in QJs:
+        cached_multiples_fixwind(QJ, ec, w, pin)
 
 
 def convert_number_to_base(i: int, base: int) -> List[int]:
@@ -600,7 +841,7 @@ def _mult_base_3(m: int, Q: JacPoint, ec: CurveGroup) -> JacPoint:
         raise ValueError(f"negative m: {hex(m)}")
 
     # at each step one of the points in T will be added
-    T = [INFJ, Q, ec._double_jac(Q)]
+    T = ec._normalize_jac_batch([INFJ, Q, ec._double_jac(Q)])
     # T = multiples(Q, 3, ec)
     # T = cached_multiples(Q, ec)
 
@@ -611,8 +852,8 @@ def _mult_base_3(m: int, Q: JacPoint, ec: CurveGroup) -> JacPoint:
         # 'triple'
         R2 = ec._double_jac(R)
         R3 = ec._add_jac(R2, R)
-        # and 'add'
-        R = ec._add_jac(R3, T[i])
+        # and (mixed) 'add'
+        R = ec._add_jac_aff(R3, T[i])
     return R
 
 
@@ -653,8 +894,8 @@ def _mult_fixed_window(
         # multiple 'double'
         for _ in range(w):
             R = ec._double_jac(R)
-        # and 'add'
-        R = ec._add_jac(R, T[i])
+        # and (mixed) 'add'
+        R = ec._add_jac_aff(R, T[i])
     return R
 
 
@@ -685,20 +926,211 @@ def _mult_fixed_window_cached(
 
     T = cached_multiples_fixwind(Q, ec, w)
 
+    return _mult_fixed_base(m, T, ec, w)
+
+
+def _mult_fixed_base(
+    m: int, T: Sequence[Sequence[JacPoint]], ec: CurveGroup, w: int
+) -> JacPoint:
+    """Scalar multiplication using a precomputed fixed-window table.
+
+    This implementation uses
+    'left-to-right' window decomposition of the m coefficient,
+    Jacobian coordinates,
+    and the table T as returned by multiples_fixwind(Q, ec, w):
+    as the table already includes all the needed multiples of Q,
+    it just needs one addition for each w-bit window.
+
+    The table is assumed to be made of curve points normalized to Z=1
+    (as returned by multiples_fixwind) and the m coefficient
+    is assumed to have been reduced mod n
+    if appropriate (e.g. cyclic groups of order n).
+    """
+
+    if m < 0:
+        raise ValueError(f"negative m: {hex(m)}")
+
     digits = convert_number_to_base(m, 2 ** w)
 
     k = len(digits) - 1
+    if k >= len(T):
+        raise ValueError(f"too many digits for the table: {k + 1}")
 
     R = T[k][digits[0]]
 
     for i in range(1, len(digits)):
         k -= 1
-        # only 'add'
-        R = ec._add_jac(R, T[k][digits[i]])
+        # only (mixed) 'add'
+        R = ec._add_jac_aff(R, T[k][digits[i]])
     return R
 
 
-_mult = _mult_fixed_window
+def _glv_basis(lam: int, n: int) -> Tuple[int, int, int, int]:
+    """Return the (a1, b1), (a2, b2) short basis for GLV scalar splitting.
+
+    The basis vectors satisfy a + b*lambda = 0 (mod n);
+    they are found using the extended Euclidean algorithm
+    on (n, lambda), as in
+    D. Hankerson, 'Guide to Elliptic Curve Cryptography' algorithm 3.74
+    """
+
+    # r_i = s_i * n + t_i * lambda
+    r0, r1 = n, lam
+    t0, t1 = 0, 1
+    # stop at the last remainder not lower than sqrt(n)
+    while r1 * r1 >= n:
+        q = r0 // r1
+        r0, r1 = r1, r0 - q * r1
+        t0, t1 = t1, t0 - q * t1
+    a1, b1 = r1, -t1
+    q = r0 // r1
+    r2, t2 = r0 - q * r1, t0 - q * t1
+    if r0 * r0 + t0 * t0 <= r2 * r2 + t2 * t2:
+        a2, b2 = r0, -t0
+    else:
+        a2, b2 = r2, -t2
+    return a1, b1, a2, b2
+
+
+def _glv_split(m: int, glv: GLVParams) -> Tuple[int, int]:
+    """Return (k1, k2) such that m = k1 + k2*lambda (mod n).
+
+    Both k1 and k2 are about half the bit-length of n,
+    but they might be negative.
+    """
+
+    _, _, n, a1, b1, a2, b2 = glv
+    n2 = n // 2
+    c1 = (b2 * m + n2) // n
+    c2 = (-b1 * m + n2) // n
+    k1 = m - c1 * a1 - c2 * a2
+    k2 = -c1 * b1 - c2 * b2
+    return k1, k2
+
+
+def _mult_interleaved(
+    scalars: Sequence[int], tables: Sequence[Sequence[JacPoint]], ec: CurveGroup, w: int
+) -> JacPoint:
+    """Interleaved multi scalar multiplication using "fixed window".
+
+    This implementation uses
+    a single 'multiple-double' step for all the scalars,
+    followed by one 'add' for each scalar,
+    'left-to-right' window decomposition of the coefficients,
+    Jacobian coordinates.
+
+    Each table must be multiples(Q, 2**w, ec) for its point Q,
+    i.e. normalized to Z=1 for mixed additions.
+
+    The table points are assumed to be on curve and
+    the coefficients are assumed to be non-negative.
+    """
+
+    all_digits = [convert_number_to_base(m, 2 ** w) for m in scalars]
+    k = max(len(digits) for digits in all_digits)
+    all_digits = [[0] * (k - len(digits)) + digits for digits in all_digits]
+
+    R = INFJ
+    for i in range(k):
+        # multiple 'double'
+        for _ in range(w):
+            R = ec._double_jac(R)
+        # and (mixed) 'add'
+        for digits, T in zip(all_digits, tables):
+            R = ec._add_jac_aff(R, T[digits[i]])
+    return R
+
+
+def _glv_tables(
+    m: int, QJ: JacPoint, ec: CurveGroup, w: int
+) -> Tuple[List[int], List[List[JacPoint]]]:
+    "Return the GLV split of m and the tables for Q and its endomorphism."
+
+    glv = ec._glv
+    assert glv is not None, "missing GLV endomorphism"
+    beta = glv[0]
+    k1, k2 = _glv_split(m, glv)
+    T = multiples(QJ, 2 ** w, ec)
+    # negative coefficients are accounted for using the opposite points
+    T1 = [ec.negate_jac(P) for P in T] if k1 < 0 else T
+    # the endomorphism of Q multiples is just beta*x
+    T2 = [(beta * X % ec.p, Y, Z) for X, Y, Z in T]
+    if k2 < 0:
+        T2 = [ec.negate_jac(P) for P in T2]
+    return [abs(k1), abs(k2)], [T1, T2]
+
+
+def _mult_glv(m: int, Q: JacPoint, ec: CurveGroup, w: int = 4) -> JacPoint:
+    """Scalar multiplication using the GLV endomorphism.
+
+    The m coefficient is split as m = k1 + k2*lambda (mod n),
+    with k1 and k2 having half the bit-length of n;
+    then k1*Q + k2*lambda*Q is computed with interleaved "fixed window",
+    where lambda*Q is obtained at the cost of a field multiplication.
+    This halves the number of doublings, but not the number of additions
+    (one per window of each of the two half-size scalars)
+    nor the cost of the table of Q multiples, built at each call:
+    for a single scalar multiplication on secp256k1 the gain
+    over "fixed window" is only about 20%.
+    The GLV endomorphism is much more effective
+    for double scalar multiplication, see _double_mult_glv.
+
+    See Gallant, Lambert, Vanstone,
+    'Faster Point Multiplication on Elliptic Curves
+    with Efficient Endomorphisms'.
+
+    The input point is assumed to be on curve and
+    the m coefficient is assumed to have been reduced mod n.
+    """
+
+    if m < 0:
+        raise ValueError(f"negative m: {hex(m)}")
+
+    scalars, tables = _glv_tables(m, Q, ec, w)
+    return _mult_interleaved(scalars, tables, ec, w)
+
+
+def _double_mult_glv(
+    u: int, HJ: JacPoint, v: int, QJ: JacPoint, ec: CurveGroup, w: int = 4
+) -> JacPoint:
+    """Double scalar multiplication (u*H + v*Q) using the GLV endomorphism.
+
+    Both u and v are split according to the GLV endomorphism
+    and the resulting four half-size scalar multiplications
+    are performed in a single interleaved "fixed window" loop.
+
+    The input points are assumed to be on curve,
+    the u and v coefficients are assumed to have been reduced mod n.
+    """
+
+    if u < 0:
+        raise ValueError(f"negative first coefficient: {hex(u)}")
+    if v < 0:
+        raise ValueError(f"negative second coefficient: {hex(v)}")
+
+    scalars, tables = _glv_tables(u, HJ, ec, w)
+    scalars2, tables2 = _glv_tables(v, QJ, ec, w)
+    return _mult_interleaved(scalars + scalars2, tables + tables2, ec, w)
+
+
+def _mult(m: int, Q: JacPoint, ec: CurveGroup) -> JacPoint:
+    """Scalar multiplication of a curve point in Jacobian coordinates.
+
+    This is the default scalar multiplication:
+    it uses the algorithm selected for the curve (see the autotune module)
+    if any, else the GLV endomorphism if available for the curve,
+    "fixed window" otherwise.
+
+    The input point is assumed to be on curve and
+    the m coefficient is assumed to have been reduced mod n
+    if appropriate (e.g. cyclic groups of order n).
+    """
+
+    if ec._mult_func is not None:
+        return ec._mult_func(m, Q, ec)
+    if ec._glv is not None:
+        return _mult_glv(m, Q, ec)
+    return _mult_fixed_window(m, Q, ec)
 
 
 def _double_mult(
@@ -706,6 +1138,25 @@ def _double_mult(
 ) -> JacPoint:
     """Double scalar multiplication (u*H + v*Q).
 
+    This is the default double scalar multiplication:
+    it uses the GLV endomorphism if available for the curve,
+    the Shamir-Strauss algorithm otherwise.
+
+    The input points are assumed to be on curve,
+    the u and v coefficients are assumed to have been reduced mod n
+    if appropriate (e.g. cyclic groups of order n).
+    """
+
+    if ec._glv is not None:
+        return _double_mult_glv(u, HJ, v, QJ, ec)
+    return _double_mult_shamir(u, HJ, v, QJ, ec)
+
+
+def _double_mult_shamir(
+    u: int, HJ: JacPoint, v: int, QJ: JacPoint, ec: CurveGroup
+) -> JacPoint:
+    """Double scalar multiplication (u*H + v*Q).
+
     This implementation uses the Shamir-Strauss algorithm,
     'left-to-right' binary decomposition of the u and v coefficients,
     Jacobian coordinates.
@@ -730,7 +1181,8 @@ def _double_mult(
         raise ValueError(f"negative second coefficient: {hex(v)}")
 
     # at each step one of the following points will be added
-    T = [INFJ, HJ, QJ, ec._add_jac(HJ, QJ)]
+    # (normalized to Z=1 for mixed additions)
+    T = ec._normalize_jac_batch([INFJ, HJ, QJ, ec._add_jac(HJ, QJ)])
     # which one depends on binary digit for that step
     ui = bin(u)[2:]
     vi = bin(v)[2:].zfill(len(ui))
@@ -743,11 +1195,188 @@ def _double_mult(
         R = ec._double_jac(R)
         # always perform the 'add', even if useless, to be constant-time
         # 'add' it to R[0] only if appropriate
-        R = ec._add_jac(R, T[i])
+        R = ec._add_jac_aff(R, T[i])
+    return R
+
+
+# window size of the wNAF used by the variable-time engine
+_WNAF_W = 5
+
+
+def _wnaf(m: int, w: int) -> List[int]:
+    """Return the width-w NAF digits of m, least significant first.
+
+    The non-zero digits are odd and in (-2^(w-1), 2^(w-1)),
+    any w consecutive digits having at most one non-zero digit.
+    """
+
+    if m < 0:
+        raise ValueError(f"negative m: {hex(m)}")
+    if w < 2:
+        raise ValueError(f"w too low: {w}")
+
+    base = 2 ** w
+    half = base // 2
+    digits: List[int] = []
+    while m:
+        if m & 1:
+            d = m & (base - 1)
+            if d >= half:
+                d -= base
+            m -= d
+        else:
+            d = 0
+        digits.append(d)
+        m >>= 1
+    return digits
+
+
+def _odd_multiples_vartime(Q: JacPoint, size: int, ec: CurveGroup) -> List[JacPoint]:
+    """Return {k_i * Q} for k_i in {1, 3, ..., 2*size-1}.
+
+    The points are normalized to Z=1 (with a single mod_inv),
+    to be used in mixed additions.
+    It is variable-time: use it on public data only.
+    """
+
+    T = [Q]
+    Q2 = ec._double_jac(Q)
+    for _ in range(1, size):
+        T.append(ec._add_jac_vartime(T[-1], Q2))
+    return ec._normalize_jac_batch(T)
+
+
+# wNAF tables of a point, see _wnaf_tables
+WNAFTables = List[Tuple[List[JacPoint], List[JacPoint]]]
+
+
+def _wnaf_tables(QJ: JacPoint, ec: CurveGroup, w: int) -> WNAFTables:
+    """Return the width-w NAF tables of Q for _double_mult_vartime.
+
+    For each component (two if the GLV endomorphism is available
+    for the curve: Q and its endomorphism image)
+    the odd multiples {1, 3, ..., 2^(w-1)-1}*Q and their opposites,
+    normalized to Z=1.
+    The tables can be computed once and for all,
+    to be reused for repeated multiplications of the same point.
+    """
+
+    if w < 2:
+        raise ValueError(f"w too low: {w}")
+    T = _odd_multiples_vartime(QJ, 2 ** (w - 2), ec)
+    tables = [T]
+    if ec._glv is not None:
+        beta = ec._glv[0]
+        # the endomorphism of Q multiples is just beta*x
+        tables.append([(beta * X % ec.p, Y, Z) for X, Y, Z in T])
+    return [(T, [ec.negate_jac(P) for P in T]) for T in tables]
+
+
+def _double_mult_vartime(
+    u: int,
+    HJ: JacPoint,
+    v: int,
+    QJ: JacPoint,
+    ec: CurveGroup,
+    w: Optional[int] = None,
+    HT: Optional[WNAFTables] = None,
+    QT: Optional[WNAFTables] = None,
+) -> JacPoint:
+    """Variable-time double scalar multiplication (u*H + v*Q).
+
+    This implementation uses interleaved width-w NAF,
+    'left-to-right' decomposition of the coefficients,
+    Jacobian coordinates, and the GLV endomorphism if available
+    for the curve (splitting u and v in four half-size scalars).
+    If w is not provided, the window size selected for the curve
+    is used (see the autotune module), _WNAF_W by default.
+    Zero digits and infinity points are skipped
+    and no dummy operation is performed:
+    its running time depends on the coefficients,
+    so it must be used on public data only
+    (e.g. signature verification), never with secret values.
+
+    The wNAF tables of H and Q (see _wnaf_tables) can be provided
+    as HT and QT, if precomputed: their window size
+    can be different from w (e.g. larger for hot points).
+
+    The input points are assumed to be on curve,
+    the u and v coefficients are assumed to have been reduced mod n
+    if appropriate (e.g. cyclic groups of order n).
+    """
+
+    if u < 0:
+        raise ValueError(f"negative first coefficient: {hex(u)}")
+    if v < 0:
+        raise ValueError(f"negative second coefficient: {hex(v)}")
+
+    if w is None:
+        w = ec._vartime_w or _WNAF_W
+    elif w < 2:
+        raise ValueError(f"w too low: {w}")
+
+    all_digits: List[List[int]] = []
+    pos_tables: List[List[JacPoint]] = []
+    neg_tables: List[List[JacPoint]] = []
+    for m, PJ, PT in ((u, HJ, HT), (v, QJ, QT)):
+        if m == 0 or PJ[2] == 0:
+            continue
+        if PT is None:
+            PT = _wnaf_tables(PJ, ec, w)
+        scalars = [m] if ec._glv is None else list(_glv_split(m, ec._glv))
+        for k, (T, negT) in zip(scalars, PT):
+            if k == 0:
+                continue
+            # the window size of the table: len(T) == 2^(w-2)
+            all_digits.append(_wnaf(abs(k), len(T).bit_length() + 1))
+            # negative coefficients are accounted for using the opposite points
+            pos_tables.append(T if k > 0 else negT)
+            neg_tables.append(negT if k > 0 else T)
+
+    if not all_digits:
+        return INFJ
+
+    R = INFJ
+    for i in range(max(len(digits) for digits in all_digits) - 1, -1, -1):
+        if R[2] != 0:
+            R = ec._double_jac(R)
+        for digits, T, negT in zip(all_digits, pos_tables, neg_tables):
+            if i >= len(digits) or digits[i] == 0:
+                continue
+            d = digits[i]
+            if d > 0:
+                R = ec._add_jac_aff_vartime(R, T[d >> 1])
+            else:
+                R = ec._add_jac_aff_vartime(R, negT[-d >> 1])
     return R
 
 
 def _multi_mult(
+    scalars: Sequence[int],
+    JPoints: Sequence[JacPoint],
+    ec: CurveGroup,
+    w: Optional[int] = None,
+) -> JacPoint:
+    """Return the multi scalar multiplication u1*Q1 + ... + un*Qn.
+
+    Use Pippenger's bucket algorithm for efficient computation,
+    with window size w if provided (chosen automatically otherwise).
+    A single point is multiplied with Bos-Coster's algorithm,
+    reducing to double-and-add, when w is not provided.
+
+    The input points are assumed to be on curve,
+    the scalar coefficients are assumed to have been reduced mod n
+    if appropriate (e.g. cyclic groups of order n).
+    """
+
+    # with its mixed additions, Pippenger is faster than Bos-Coster
+    # already for two random 256-bit scalars, but not for one
+    if w is None and len(JPoints) == 1:
+        return _multi_mult_bos_coster(scalars, JPoints, ec)
+    return _multi_mult_pippenger(scalars, JPoints, ec, w)
+
+
+def _multi_mult_bos_coster(
     scalars: Sequence[int], JPoints: Sequence[JacPoint], ec: CurveGroup
 ) -> JacPoint:
     """Return the multi scalar multiplication u1*Q1 + ... + un*Qn.
@@ -793,3 +1422,120 @@ def _multi_mult(
     # assert n1 < ec.n, "better to take the mod n"
     # n1 %= ec.n
     return _mult(n1, p1, ec)
+
+
+def _pippenger_window(npoints: int, nbits: int) -> int:
+    "Return the window size minimizing Pippenger's algorithm additions."
+
+    # for each of the (nbits+1)/w windows:
+    # npoints mixed additions to fill the 2^(w-1) buckets and
+    # 2*2^(w-1) Jacobian additions to sum them up,
+    # each of them costing about as much as two mixed additions
+    costs = [(-(-(nbits + 1) // w) * (npoints + 2 ** (w + 1)), w) for w in range(1, 21)]
+    return min(costs)[1]
+
+
+def _signed_digits(m: int, w: int) -> List[int]:
+    """Return the signed base 2^w digits of m, least significant first.
+
+    The digits are in (-2^(w-1), 2^(w-1)].
+    """
+
+    base = 2 ** w
+    half = base // 2
+    digits: List[int] = []
+    while m:
+        d = m & (base - 1)
+        if d > half:
+            d -= base
+        digits.append(d)
+        m = (m - d) >> w
+    return digits
+
+
+def _multi_mult_pippenger(
+    scalars: Sequence[int],
+    JPoints: Sequence[JacPoint],
+    ec: CurveGroup,
+    w: Optional[int] = None,
+) -> JacPoint:
+    """Return the multi scalar multiplication u1*Q1 + ... + un*Qn.
+
+    Use Pippenger's bucket algorithm: for each w-bit window
+    the points are accumulated in buckets according to
+    the (signed) window digit of their coefficient;
+    then the buckets are summed up with a running sum,
+    which weighs each bucket by its digit.
+    The buckets are filled using mixed Jacobian-affine additions,
+    the input points being normalized to affine coordinates at once.
+    The results of the windows are combined
+    'left-to-right' with w doublings each.
+
+    It is the most efficient algorithm for a large number of points.
+    If the window size w is not provided,
+    it is chosen to minimize the number of additions.
+
+    The input points are assumed to be on curve,
+    the scalar coefficients are assumed to have been reduced mod n
+    if appropriate (e.g. cyclic groups of order n).
+    """
+
+    if len(scalars) != len(JPoints):
+        errMsg = "mismatch between number of scalars and points: "
+        errMsg += f"{len(scalars)} vs {len(JPoints)}"
+        raise ValueError(errMsg)
+
+    ns: List[int] = []
+    x: List[JacPoint] = []
+    for n, PJ in zip(scalars, JPoints):
+        if n == 0:
+            continue
+        if n < 0:
+            raise ValueError(f"negative coefficient: {hex(n)}")
+        ns.append(n)
+        x.append(PJ)
+
+    if not x:
+        return INFJ
+
+    nbits = max(n.bit_length() for n in ns)
+    if w is None:
+        w = _pippenger_window(len(x), nbits)
+    elif w <= 0:
+        raise ValueError(f"non positive w: {w}")
+
+    all_digits = [_signed_digits(n, w) for n in ns]
+    # buckets are filled using mixed additions of affine points
+    if all(PJ[2] == 1 for PJ in x):
+        aff = [(PJ[0], PJ[1]) for PJ in x]
+    else:
+        aff = ec._aff_from_jac_batch(x)
+    # negative digits use the opposite points
+    neg_aff = [ec.negate(P) for P in aff]
+    half = 2 ** (w - 1)
+    R = INFJ
+    for i in range(max(len(digits) for digits in all_digits) - 1, -1, -1):
+        if R[2] != 0:
+            for _ in range(w):
+                R = ec._double_jac(R)
+        # buckets[|d|] accumulates the points with window digit d
+        buckets: List[JacPoint] = [INFJ] * (half + 1)
+        for digits, P, neg_P in zip(all_digits, aff, neg_aff):
+            if i >= len(digits):
+                continue
+            d = digits[i]
+            if d == 0:  # buckets[0] is never used
+                continue
+            if d < 0:
+                d, P = -d, neg_P
+            buckets[d] = ec._add_jac_aff(buckets[d], P)
+        # running sum: the bucket of digit d is added d times
+        S = W = INFJ
+        for B in buckets[:0:-1]:
+            if B[2] != 0:
+                S = B if S[2] == 0 else ec._add_jac(S, B)
+            if S[2] != 0:
+                W = S if W[2] == 0 else ec._add_jac(W, S)
+        if W[2] != 0:
+            R = W if R[2] == 0 else ec._add_jac(R, W)
+    return R
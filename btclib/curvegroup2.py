@@ -42,7 +42,7 @@ TODO:
 from typing import List
 
 from .alias import INFJ, JacPoint
-from .curvegroup import CurveGroup, convert_number_to_base
+from .curvegroup import CurveGroup, _wnaf, convert_number_to_base
 
 
 def mods(m: int, w: int) -> int:
@@ -67,26 +67,13 @@ def wNAF_of_m(m: int, w: int) -> List[int]:
 
     For complete reference see:
     D. Hankerson, 'Guide to Elliptic Curve Cryptography' chapter 3
-    """
-
-    i = 0
 
-    M: List[int] = []
-    while m > 0:
-        if (m % 2) == 1:
-            if w == 1:
-                # Computing binary NAF of m
-                M.append(2 - (m % 4))
-            else:
-                # Computing wNAF of m
-                M.append(mods(m, w))
-            m -= M[i]
-        else:
-            M.append(0)
-        m //= 2
-        i += 1
+    The digits are computed by curvegroup._wnaf,
+    shared with the variable-time double scalar multiplication
+    (w=1 is the binary NAF, i.e. the width-2 NAF).
+    """
 
-    return M
+    return _wnaf(m, 2 if w == 1 else w)
 
 
 def _mult_sliding_window(m: int, Q: JacPoint, ec: CurveGroup, w: int = 4) -> JacPoint:
@@ -119,6 +106,8 @@ def _mult_sliding_window(m: int, Q: JacPoint, ec: CurveGroup, w: int = 4) -> Jac
     T = [P]
     for i in range(1, p):
         T.append(ec._add_jac(T[i - 1], Q))
+    # normalized to Z=1 for mixed additions
+    Q, *T = ec._normalize_jac_batch([Q] + T)
 
     digits = convert_number_to_base(m, 2)
 
@@ -138,12 +127,12 @@ def _mult_sliding_window(m: int, Q: JacPoint, ec: CurveGroup, w: int = 4) -> Jac
                 for b in range(i, (i + j)):
                     R = ec._double_jac(R)
                     if digits[b] == 1:
-                        R = ec._add_jac(R, Q)
+                        R = ec._add_jac_aff(R, Q)
                 return R
             else:
                 for _ in range(w):
                     R = ec._double_jac(R)
-                R = ec._add_jac(R, T[t - p])
+                R = ec._add_jac_aff(R, T[t - p])
                 i += j
     return R
 
@@ -183,6 +172,8 @@ def _mult_w_NAF(m: int, Q: JacPoint, ec: CurveGroup, w: int = 4) -> JacPoint:
     T = [Q]
     for i in range(1, (b // 4)):
         T.append(ec._add_jac(T[i - 1], Q2))
+    # normalized to Z=1 for mixed additions
+    T = ec._normalize_jac_batch(T)
     for i in range((b // 4), (b // 2)):
         T.append(ec.negate_jac(T[i - (b // 4)]))
 
@@ -192,12 +183,12 @@ def _mult_w_NAF(m: int, Q: JacPoint, ec: CurveGroup, w: int = 4) -> JacPoint:
         if M[j] != 0:
             if M[j] > 0:
                 # It adds the element jQ
-                R = ec._add_jac(R, T[(M[j] - 1) // 2])
+                R = ec._add_jac_aff(R, T[(M[j] - 1) // 2])
             else:
                 # In this case it adds the opposite, ie -jQ
                 if w != 1:
-                    R = ec._add_jac(R, T[(b // 4) - ((M[j] + 1) // 2)])
+                    R = ec._add_jac_aff(R, T[(b // 4) - ((M[j] + 1) // 2)])
                 else:
                     # Case w=1 must be studied on its own for now
-                    R = R = ec._add_jac(R, T[1])
+                    R = R = ec._add_jac_aff(R, T[1])
     return R
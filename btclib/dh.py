@@ -17,14 +17,32 @@ later utilized e.g. in symmetric cryptographic scheme.
 
 The two entities must agree on the elliptic curve and key derivation
 function to use.
+
+Only the x-coordinate of the shared secret point is used:
+it is obtained from the Jacobian coordinates as X/Z^2,
+without computing the affine y-coordinate.
+Bulk key agreements (e.g. an ECIES gateway) are supported by
+diffie_hellman_peers (one private key, many peer public keys)
+and diffie_hellman_keys (many private keys, one peer public key):
+both share a single modular inversion for all the x-coordinates,
+the latter also uses a fixed-window table of the peer public key,
+computed once (and cached) for all the private keys.
 """
 
 from hashlib import sha256
 from math import ceil
-from typing import Optional
+from typing import List, Optional, Sequence
 
-from .alias import HashF, Point
-from .curve import Curve, mult, secp256k1
+from .alias import HashF, Integer, JacPoint, Point
+from .curve import Curve, secp256k1
+from .curvegroup import (
+    _jac_from_aff,
+    _mult,
+    _mult_fixed_base,
+    cached_multiples_fixwind,
+)
+from .numbertheory import batch_mod_inv
+from .utils import int_from_integer
 
 
 def ansi_x9_63_kdf(
@@ -67,8 +85,89 @@ def diffie_hellman(
     http://www.secg.org/sec1-v2.pdf, section 6.1
     """
 
-    shared_secret_point = mult(dU, QV, ec)
-    assert shared_secret_point[1] != 0, "invalid (INF) key"
-    shared_secret_field_element = shared_secret_point[0]
+    ec.require_on_curve(QV)
+    RJ = _mult(int_from_integer(dU) % ec.n, _jac_from_aff(QV), ec)
+    assert RJ[2] != 0, "invalid (INF) key"
+    shared_secret_field_element = ec._x_aff_from_jac(RJ)
     z = shared_secret_field_element.to_bytes(ec.psize, "big")
     return ansi_x9_63_kdf(z, size, hf, shared_info)
+
+
+def _shared_keys(
+    RJs: Sequence[JacPoint],
+    size: int,
+    shared_info: Optional[bytes],
+    ec: Curve,
+    hf: HashF,
+) -> List[bytes]:
+    "Return the keying data of the shared secret points."
+
+    for RJ in RJs:
+        assert RJ[2] != 0, "invalid (INF) key"
+    # x = X/Z^2: a single modular inversion for all the points
+    invs = batch_mod_inv([RJ[2] * RJ[2] for RJ in RJs], ec.p)
+    return [
+        ansi_x9_63_kdf(
+            (RJ[0] * inv % ec.p).to_bytes(ec.psize, "big"), size, hf, shared_info
+        )
+        for RJ, inv in zip(RJs, invs)
+    ]
+
+
+def diffie_hellman_peers(
+    dU: int,
+    QVs: Sequence[Point],
+    size: int,
+    shared_info: Optional[bytes] = None,
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
+) -> List[bytes]:
+    """Diffie-Hellman key agreement of one private key with many public keys.
+
+    Same as diffie_hellman for each QV public key,
+    with a single modular inversion for all the shared secrets.
+    """
+
+    dU = int_from_integer(dU) % ec.n
+    RJs: List[JacPoint] = []
+    for QV in QVs:
+        ec.require_on_curve(QV)
+        RJs.append(_mult(dU, _jac_from_aff(QV), ec))
+    return _shared_keys(RJs, size, shared_info, ec, hf)
+
+
+# minimum number of private keys for the fixed-window table of the peer key
+# to pay off (a 4-bit window table costs about a dozen scalar multiplications),
+# and the number of private keys above which a 6-bit window is better
+_TABLE_THRESHOLD = 20
+_TABLE_THRESHOLD_W6 = 128
+
+
+def diffie_hellman_keys(
+    dUs: Sequence[Integer],
+    QV: Point,
+    size: int,
+    shared_info: Optional[bytes] = None,
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
+) -> List[bytes]:
+    """Diffie-Hellman key agreement of many private keys with one public key.
+
+    Same as diffie_hellman for each dU private key,
+    with a single modular inversion for all the shared secrets.
+    If there are enough private keys, a fixed-window table
+    of the public key is computed once
+    (and cached in pointcache.TABLE_CACHE):
+    then each scalar multiplication just needs additions.
+    """
+
+    ec.require_on_curve(QV)
+    QVJ = _jac_from_aff(QV)
+    ms = [int_from_integer(dU) % ec.n for dU in dUs]
+    if len(ms) < _TABLE_THRESHOLD:
+        RJs = [_mult(m, QVJ, ec) for m in ms]
+    else:
+        w = 6 if len(ms) >= _TABLE_THRESHOLD_W6 else 4
+        T = cached_multiples_fixwind(QVJ, ec, w)
+        RJs = [_mult_fixed_base(m, T, ec, w) for m in ms]
+    return _shared_keys(RJs, size, shared_info, ec, hf)
@@ -19,15 +19,18 @@
 
 import secrets
 from hashlib import sha256
-from typing import List, Optional, Tuple
+from typing import List, Optional, Sequence, Tuple, Union
 
 from . import der
 from .alias import DSASig, DSASigTuple, HashF, JacPoint, Octets, Point, String
-from .curve import Curve, secp256k1
-from .curvegroup import _double_mult, _mult
+from .curve import Curve, _generator_wnaf_tables, _mult_generator, secp256k1
+from .curvegroup import WNAFTables, _double_mult_vartime, _multi_mult
 from .hashes import reduce_to_hlen
 from .numbertheory import mod_inv
+from .prepared import REGISTRY, PreparedPubKey
 from .rfc6979 import __rfc6979
+from .secpoint import bytes_from_point
+from .sigcache import SIGCACHE
 from .to_prvkey import PrvKey, int_from_prvkey
 from .to_pubkey import Key, point_from_key
 from .utils import bytes_from_octets, int_from_bits
@@ -70,7 +73,7 @@ def gen_keys(prvkey: PrvKey = None, ec: Curve = secp256k1) -> Tuple[int, Point]:
     else:
         q = int_from_prvkey(prvkey, ec)
 
-    QJ = _mult(q, ec.GJ, ec)
+    QJ = _mult_generator(q, ec)
     Q = ec._aff_from_jac(QJ)
     # q.to_bytes(ec.nsize, 'big')
     # bytes_from_point(Q, ec, compressed)
@@ -101,7 +104,7 @@ def __sign(c: int, q: int, k: int, low_s: bool, ec: Curve) -> DSASigTuple:
 
     # Steps numbering follows SEC 1 v.2 section 4.1.3
 
-    KJ = _mult(k, ec.GJ, ec)  # 1
+    KJ = _mult_generator(k, ec)  # 1
 
     # affine x-coordinate of K (field element)
     K_x = (KJ[0] * mod_inv(KJ[2] * KJ[2], ec.p)) % ec.p
@@ -184,14 +187,18 @@ def sign(
     return _sign(m, prvkey, k, low_s, ec, hf)
 
 
-def __assert_as_valid(c: int, QJ: JacPoint, r: int, s: int, ec: Curve) -> None:
+def __assert_as_valid(
+    c: int, QJ: JacPoint, r: int, s: int, ec: Curve, QT: Optional[WNAFTables] = None
+) -> None:
     # Private function for test/dev purposes
+    # QT are the precomputed wNAF tables of Q, if available
 
     w = mod_inv(s, ec.n)
     u = c * w % ec.n
     v = r * w % ec.n  # 4
     # Let K = u*G + v*Q.
-    KJ = _double_mult(v, QJ, u, ec.GJ, ec)  # 5
+    GT = _generator_wnaf_tables(ec)
+    KJ = _double_mult_vartime(v, QJ, u, ec.GJ, ec, HT=QT, QT=GT)  # 5
 
     # Fail if infinite(K).
     assert KJ[2] != 0, "how did you do that?!?"  # 5
@@ -204,7 +211,11 @@ def __assert_as_valid(c: int, QJ: JacPoint, r: int, s: int, ec: Curve) -> None:
 
 
 def _assert_as_valid(
-    m: Octets, P: Key, sig: DSASig, ec: Curve = secp256k1, hf: HashF = sha256
+    m: Octets,
+    P: Union[Key, PreparedPubKey],
+    sig: DSASig,
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
 ) -> None:
     # Private function for test/dev purposes
     # It raises Errors, while verify should always return True or False
@@ -215,15 +226,26 @@ def _assert_as_valid(
     m = bytes_from_octets(m, hf().digest_size)
     c = _challenge(m, ec, hf)  # 2, 3
 
-    Q = point_from_key(P, ec)
-    QJ = Q[0], Q[1], 1
+    QT: Optional[WNAFTables]
+    if isinstance(P, PreparedPubKey):
+        QJ, QT = P.QJ, P.tables_for(ec)
+    else:
+        Q = point_from_key(P, ec)
+        QJ = Q[0], Q[1], 1
+        # hot public keys are automatically prepared
+        prepared = REGISTRY.lookup(Q, ec) if REGISTRY.enabled else None
+        QT = None if prepared is None else prepared.tables
 
     # second part delegated to helper function
-    __assert_as_valid(c, QJ, r, s, ec)
+    __assert_as_valid(c, QJ, r, s, ec, QT)
 
 
 def assert_as_valid(
-    msg: String, P: Key, sig: DSASig, ec: Curve = secp256k1, hf: HashF = sha256
+    msg: String,
+    P: Union[Key, PreparedPubKey],
+    sig: DSASig,
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
 ) -> None:
     # Private function for test/dev purposes
     # It raises Errors, while verify should always return True or False
@@ -233,28 +255,201 @@ def assert_as_valid(
 
 
 def _verify(
-    m: Octets, P: Key, sig: DSASig, ec: Curve = secp256k1, hf: HashF = sha256
+    m: Octets,
+    P: Union[Key, PreparedPubKey],
+    sig: DSASig,
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
 ) -> bool:
-    """ECDSA signature verification (SEC 1 v.2 section 4.1.4)."""
+    """ECDSA signature verification (SEC 1 v.2 section 4.1.4).
+
+    P can be a PreparedPubKey, with precomputed tables
+    for repeated verification against the same public key.
+    """
 
     # try/except wrapper for the Errors raised by assert_as_valid
     try:
+        entry = _sigcache_entry(m, P, sig, ec, hf) if SIGCACHE.enabled else None
+        if entry is not None and entry in SIGCACHE:
+            return True
         _assert_as_valid(m, P, sig, ec, hf)
     except Exception:
         return False
     else:
+        if entry is not None:
+            SIGCACHE.add(entry)
         return True
 
 
+def _sigcache_entry(
+    m: Octets, P: Union[Key, PreparedPubKey], sig: DSASig, ec: Curve, hf: HashF
+) -> bytes:
+    "Return the signature cache entry of the ECDSA signature verification."
+
+    m = bytes_from_octets(m, hf().digest_size)
+    Q = P.Q if isinstance(P, PreparedPubKey) else point_from_key(P, ec)
+    r, s = deserialize(sig, ec)
+    sig_bytes = r.to_bytes(ec.nsize, "big") + s.to_bytes(ec.nsize, "big")
+    scheme = "ecdsa " + hf().name
+    return SIGCACHE.entry(scheme, ec, m, bytes_from_point(Q, ec), sig_bytes)
+
+
 def verify(
-    msg: String, P: Key, sig: DSASig, ec: Curve = secp256k1, hf: HashF = sha256
+    msg: String,
+    P: Union[Key, PreparedPubKey],
+    sig: DSASig,
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
 ) -> bool:
-    """ECDSA signature verification (SEC 1 v.2 section 4.1.4)."""
+    """ECDSA signature verification (SEC 1 v.2 section 4.1.4).
+
+    P can be a PreparedPubKey, with precomputed tables
+    for repeated verification against the same public key.
+    """
 
     m = reduce_to_hlen(msg, hf)
     return _verify(m, P, sig, ec, hf)
 
 
+def _batch_verify(
+    ms: Sequence[Octets],
+    Ps: Sequence[Union[Key, PreparedPubKey]],
+    sigs: Sequence[DSASig],
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
+    key_ids: Optional[Sequence[Optional[int]]] = None,
+) -> None:
+    # It raises Errors, while batch_verify should always return True or False
+
+    batch_size = len(Ps)
+    if len(ms) != batch_size:
+        errMsg = f"mismatch between number of pubkeys ({batch_size}) "
+        errMsg += f"and number of messages ({len(ms)})"
+        raise ValueError(errMsg)
+    if len(sigs) != batch_size:
+        errMsg = f"mismatch between number of pubkeys ({batch_size}) "
+        errMsg += f"and number of signatures ({len(sigs)})"
+        raise ValueError(errMsg)
+    if key_ids is None:
+        key_ids = [None] * batch_size
+    elif len(key_ids) != batch_size:
+        errMsg = f"mismatch between number of pubkeys ({batch_size}) "
+        errMsg += f"and number of key_ids ({len(key_ids)})"
+        raise ValueError(errMsg)
+
+    t = 0
+    scalars: List[int] = list()
+    points: List[JacPoint] = list()
+    for m, P, sig, key_id in zip(ms, Ps, sigs, key_ids):
+        if key_id is None or batch_size < 2:
+            # K is unknown: the signature is verified on its own
+            _assert_as_valid(m, P, sig, ec, hf)
+            continue
+
+        r, s = deserialize(sig, ec)  # 1
+        m = bytes_from_octets(m, hf().digest_size)
+        c = _challenge(m, ec, hf)  # 2, 3
+
+        Q = P.Q if isinstance(P, PreparedPubKey) else point_from_key(P, ec)
+
+        # K is reconstructed from r, as in public key recovery
+        x = r + (key_id >> 1) * ec.n
+        if x >= ec.p:
+            raise ValueError(f"invalid key_id: {key_id}")
+        KJ = x, ec.y_odd(x, key_id & 1), 1
+
+        w = mod_inv(s, ec.n)
+        u = c * w % ec.n
+        v = r * w % ec.n
+        # a in [1, n-1]: a*K = a*u*G + a*v*Q
+        a = 1 if not scalars else 1 + secrets.randbelow(ec.n - 1)
+        scalars.append(a)
+        points.append(KJ)
+        scalars.append(ec.n - a * v % ec.n)
+        points.append((Q[0], Q[1], 1))
+        t += a * u
+
+    if not scalars:
+        return
+
+    # sum(a_i*K_i) - sum(a_i*v_i*Q_i) == sum(a_i*u_i)*G
+    TJ = _mult_generator(t % ec.n, ec)
+    RHSJ = _multi_mult(scalars, points, ec)
+    assert ec._jac_equality(TJ, RHSJ), "signature verification failed"
+
+
+def batch_verify(
+    ms: Sequence[Octets],
+    Ps: Sequence[Union[Key, PreparedPubKey]],
+    sigs: Sequence[DSASig],
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
+    key_ids: Optional[Sequence[Optional[int]]] = None,
+) -> bool:
+    """Batch verification of ECDSA signatures.
+
+    The batch is checked with a single multi scalar multiplication:
+    the random linear combination of the equations K_i = u_i*G + v_i*Q_i,
+    where each K_i point is reconstructed from r_i.
+    This requires the key_id recovery hint of each signature
+    (as in bms, i.e. the y-coordinate parity of K_i in the first bit
+    and x_K = r + n in the second one), as DER signatures
+    do not commit to it: signatures without a key_id (None)
+    are verified one at a time.
+    A wrong key_id makes the batch verification fail:
+    see invalid_indexes to identify the invalid signatures.
+
+    The per-signature cost decreases with the batch size
+    (Pippenger's multi scalar multiplication):
+    batches of a few dozens signatures are needed
+    to outperform one at a time verification.
+
+    The messages ms are hlen arrays, as in _verify.
+    """
+
+    # try/except wrapper for the Errors raised by _batch_verify
+    try:
+        _batch_verify(ms, Ps, sigs, ec, hf, key_ids)
+    except Exception:
+        return False
+    else:
+        return True
+
+
+def invalid_indexes(
+    ms: Sequence[Octets],
+    Ps: Sequence[Union[Key, PreparedPubKey]],
+    sigs: Sequence[DSASig],
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
+    key_ids: Optional[Sequence[Optional[int]]] = None,
+) -> List[int]:
+    """Return the indexes of the invalid ECDSA signatures in the batch.
+
+    Failing batches are bisected, down to single signatures:
+    a few invalid signatures are found with a few batch verifications
+    instead of verifying all the signatures one at a time.
+    Signatures are checked to be valid, regardless of their key_id.
+    """
+
+    batch_size = len(Ps)
+    if len(ms) != batch_size or len(sigs) != batch_size:
+        # raise the appropriate error
+        _batch_verify(ms, Ps, sigs, ec, hf, key_ids)
+    ids: Sequence[Optional[int]] = [None] * batch_size if key_ids is None else key_ids
+
+    def bisect(start: int, stop: int) -> List[int]:
+        if stop - start == 1:
+            return [] if _verify(ms[start], Ps[start], sigs[start], ec, hf) else [start]
+        batch = ms[start:stop], Ps[start:stop], sigs[start:stop]
+        if batch_verify(*batch, ec, hf, ids[start:stop]):
+            return []
+        middle = (start + stop) // 2
+        return bisect(start, middle) + bisect(middle, stop)
+
+    return bisect(0, batch_size) if batch_size else []
+
+
 def recover_pubkeys(
     msg: String, sig: DSASig, ec: Curve = secp256k1, hf: HashF = sha256
 ) -> List[Point]:
@@ -286,7 +481,7 @@ def _recover_pubkeys(
     r, s = deserialize(sig, ec)
 
     QJs = __recover_pubkeys(c, r, s, ec)
-    return [ec._aff_from_jac(QJ) for QJ in QJs]
+    return ec._aff_from_jac_batch(QJs)
 
 
 # TODO: use __recover_pubkey to avoid code duplication
@@ -297,6 +492,7 @@ def __recover_pubkeys(c: int, r: int, s: int, ec: Curve) -> List[JacPoint]:
     r1 = mod_inv(r, ec.n)
     r1s = r1 * s % ec.n
     r1e = -r1 * c % ec.n
+    GT = _generator_wnaf_tables(ec)
     keys: List[JacPoint] = list()
     # r = K[0] % ec.n
     # if ec.n < K[0] < ec.p (likely when cofactor ec.h > 1)
@@ -310,7 +506,7 @@ def __recover_pubkeys(c: int, r: int, s: int, ec: Curve) -> List[JacPoint]:
             yodd = ec.y_odd(x, False)
             KJ = x, yodd, 1  # 1.2, 1.3, and 1.4
             # 1.5 has been performed in the recover_pubkeys calling function
-            Q1J = _double_mult(r1s, KJ, r1e, ec.GJ, ec)  # 1.6.1
+            Q1J = _double_mult_vartime(r1s, KJ, r1e, ec.GJ, ec, QT=GT)  # 1.6.1
             try:
                 __assert_as_valid(c, Q1J, r, s, ec)  # 1.6.2
             except Exception:
@@ -318,7 +514,7 @@ def __recover_pubkeys(c: int, r: int, s: int, ec: Curve) -> List[JacPoint]:
             else:
                 keys.append(Q1J)  # 1.6.2
             KJ = x, ec.p - yodd, 1  # 1.6.3
-            Q2J = _double_mult(r1s, KJ, r1e, ec.GJ, ec)
+            Q2J = _double_mult_vartime(r1s, KJ, r1e, ec.GJ, ec, QT=GT)
             try:
                 __assert_as_valid(c, Q2J, r, s, ec)  # 1.6.2
             except Exception:
@@ -348,7 +544,8 @@ def __recover_pubkey(key_id: int, c: int, r: int, s: int, ec: Curve) -> JacPoint
     y = ec.y_odd(x, i)
     KJ = x, y, 1  # 1.2, 1.3, and 1.4
     # 1.5 has been performed in the recover_pubkeys calling function
-    QJ = _double_mult(r1s, KJ, r1e, ec.GJ, ec)  # 1.6.1
+    GT = _generator_wnaf_tables(ec)
+    QJ = _double_mult_vartime(r1s, KJ, r1e, ec.GJ, ec, QT=GT)  # 1.6.1
     __assert_as_valid(c, QJ, r, s, ec)  # 1.6.2
     return QJ
 
@@ -12,7 +12,9 @@
 
 """
 
-from typing import Optional, Tuple
+import hashlib
+import threading
+from typing import Any, Dict, Optional, Tuple
 
 from .alias import HashF, Script, String
 from .script import serialize
@@ -74,3 +76,40 @@ def reduce_to_hlen(msg: String, hf: HashF) -> bytes:
     h = hf()
     h.update(msg)
     return h.digest()  # 4
+
+
+# hash objects that have absorbed the tagged hash prefix, see tagged_hash
+_TAGGED_MIDSTATES: Dict[Tuple[bytes, HashF], Any] = {}
+_TAGGED_LOCK = threading.Lock()
+
+
+def _tagged_midstate(tag: bytes, hf: HashF) -> Any:
+    "Return the (cached) hash object that has absorbed the tag prefix."
+
+    key = (tag, hf)
+    midstate = _TAGGED_MIDSTATES.get(key)
+    if midstate is None:
+        h = hf()
+        h.update(tag)
+        tag_hash = h.digest()
+        midstate = hf()
+        midstate.update(tag_hash + tag_hash)
+        with _TAGGED_LOCK:
+            midstate = _TAGGED_MIDSTATES.setdefault(key, midstate)
+    return midstate
+
+
+def tagged_hash(tag: String, m: bytes, hf: HashF = hashlib.sha256) -> bytes:
+    """Return the BIP340 tagged hash of m: hf(hf(tag) || hf(tag) || m).
+
+    The hash object that has absorbed the hf(tag) || hf(tag) prefix
+    (a whole block for SHA256) is computed once per (tag, hf)
+    and copied for each message:
+    the prefix is not hashed again at each call.
+    """
+
+    if isinstance(tag, str):
+        tag = tag.encode()
+    h = _tagged_midstate(tag, hf).copy()
+    h.update(m)
+    return h.digest()
@@ -19,12 +19,30 @@ with the following modifications:
 * type annotated python3
 * minor improvements
 * added extensive unit test
+
+The modular inverse, the Legendre and Jacobi symbols,
+the modular exponentiation (used for square roots),
+and the modular multiplication are delegated to a backend:
+'python' uses CPython built-ins only, while 'gmpy2' uses
+the GMP library through gmpy2 (if installed).
+By default gmpy2 is used when importable;
+the BTCLIB_BACKEND environment variable can be used
+to select the backend at import time,
+set_backend and get_backend to select/report it at runtime.
 """
 
-from typing import Tuple
+import os
+import sys
+from math import gcd
+from typing import List, Optional, Sequence, Tuple
 
 from .utils import hex_string
 
+try:
+    import gmpy2  # type: ignore
+except ImportError:  # pragma: no cover
+    gmpy2 = None
+
 
 def xgcd(a: int, b: int) -> Tuple[int, int, int]:
     """Return (g, x, y) such that a*x + b*y = g = gcd(x, y).
@@ -41,36 +59,221 @@ def xgcd(a: int, b: int) -> Tuple[int, int, int]:
     return b, x0, y0
 
 
+def _jacobi(a: int, n: int) -> int:
+    # binary algorithm, see
+    # H. Cohen, 'A Course in Computational Algebraic Number Theory' algorithm 1.4.10
+    a %= n
+    t = 1
+    while a != 0:
+        while a & 1 == 0:
+            a >>= 1
+            if n & 7 in (3, 5):
+                t = -t
+        a, n = n, a
+        if a & n & 3 == 3:
+            t = -t
+        a %= n
+    return t if n == 1 else 0
+
+
+class _PythonBackend:
+    "Field arithmetic primitives using CPython built-ins only."
+
+    name = "python"
+
+    if sys.version_info >= (3, 8):
+
+        def mod_inv(self, a: int, m: int) -> Optional[int]:
+            "Return the inverse of a (mod m), None if it does not exist."
+
+            try:
+                return pow(a, -1, m)
+            except ValueError:
+                return None
+
+    else:  # pragma: no cover
+        # no modular inverse in pow before python 3.8
+
+        def mod_inv(self, a: int, m: int) -> Optional[int]:
+            "Return the inverse of a (mod m), None if it does not exist."
+
+            g, x, _ = xgcd(a % m, m)
+            return x % m if g == 1 else None
+
+    def legendre(self, a: int, p: int) -> int:
+        # for an odd prime p the Legendre symbol is the Jacobi symbol:
+        # the binary algorithm is faster than Euler's criterion
+        if p & 1:
+            return _jacobi(a, p)
+        # Euler's criterion
+        ls = pow(a, p >> 1, p)
+        return -1 if ls == p - 1 else ls
+
+    def jacobi(self, a: int, n: int) -> int:
+        return _jacobi(a, n)
+
+    def pow_mod(self, a: int, e: int, m: int) -> int:
+        return pow(a, e, m)
+
+    def mul_mod(self, a: int, b: int, m: int) -> int:
+        return a * b % m
+
+
+class _Gmpy2Backend(_PythonBackend):
+    "Field arithmetic primitives using gmpy2 mpz."
+
+    name = "gmpy2"
+
+    def mod_inv(self, a: int, m: int) -> Optional[int]:
+        "Return the inverse of a (mod m), None if it does not exist."
+
+        try:
+            return int(gmpy2.invert(a, m))
+        except ZeroDivisionError:
+            return None
+
+    def legendre(self, a: int, p: int) -> int:
+        # gmpy2.legendre requires an odd prime:
+        # for p=2 return the same as Euler's criterion
+        if p == 2:
+            return -(a & 1)
+        return int(gmpy2.legendre(a, p))
+
+    def jacobi(self, a: int, n: int) -> int:
+        return int(gmpy2.jacobi(a, n))
+
+    def pow_mod(self, a: int, e: int, m: int) -> int:
+        return int(gmpy2.powmod(a, e, m))
+
+    def mul_mod(self, a: int, b: int, m: int) -> int:
+        return int(gmpy2.mpz(a) * b % m)
+
+
+_BACKENDS = {"python": _PythonBackend()}
+if gmpy2 is not None:  # pragma: no cover
+    _BACKENDS["gmpy2"] = _Gmpy2Backend()
+
+_backend = _BACKENDS["python"]
+
+
+def available_backends() -> List[str]:
+    "Return the names of the available number theory backends."
+
+    return list(_BACKENDS)
+
+
+def get_backend() -> str:
+    "Return the name of the active number theory backend."
+
+    return _backend.name
+
+
+def set_backend(name: Optional[str] = None) -> None:
+    """Set the active number theory backend.
+
+    If name is None, gmpy2 is used if available, python otherwise.
+    """
+
+    global _backend
+    if name is None:
+        name = "gmpy2" if "gmpy2" in _BACKENDS else "python"
+    if name not in _BACKENDS:
+        err_msg = f"unavailable backend: {name!r} "
+        err_msg += f"(available: {', '.join(_BACKENDS)})"
+        raise ValueError(err_msg)
+    _backend = _BACKENDS[name]
+
+
+set_backend(os.environ.get("BTCLIB_BACKEND") or None)
+
+
 def mod_inv(a: int, m: int) -> int:
     """Return the inverse of a (mod m). m does not have to be a prime.
 
-    Based on Extended Euclidean Algorithm, see:
+    The 'python' backend uses pow(a, -1, m)
+    (Extended Euclidean Algorithm before python 3.8), see:
     https://en.wikibooks.org/wiki/Algorithm_Implementation/Mathematics/Extended_Euclidean_algorithm
     """
 
     a %= m
-    g, x, _ = xgcd(a, m)
-    if g == 1:
-        return x % m
+    inv = _backend.mod_inv(a, m)
+    if inv is None:
+        raise ValueError(_err_msg_no_inverse(a, m))
+    return inv
+
+
+def mul_mod(a: int, b: int, m: int) -> int:
+    """Return a*b (mod m).
+
+    Function calls being expensive in python,
+    the curve arithmetic hot loops use the inline a * b % m:
+    this is provided for callers with large operands
+    that can benefit from the gmpy2 backend.
+    """
+
+    return _backend.mul_mod(a, b, m)
+
+
+def _err_msg_no_inverse(a: int, m: int) -> str:
     err_msg = "No inverse for "
     err_msg += f"{hex_string(a)}" if a > 0xFFFFFFFF else f"{a}"
     err_msg += " mod "
     err_msg += f"{hex_string(m)}" if m > 0xFFFFFFFF else f"{m}"
-    raise ValueError(err_msg)
+    return err_msg
+
+
+def batch_mod_inv(values: Sequence[int], m: int) -> List[int]:
+    """Return the inverses of all values (mod m), with a single inversion.
+
+    Montgomery's trick: the running products of the values
+    are inverted at once, then the single inverses are recovered
+    with three multiplications each.
+    """
+
+    # prods[i] = values[0] * ... * values[i-1]
+    prods = [1]
+    for a in values:
+        prods.append(prods[-1] * a % m)
+
+    inv = _backend.mod_inv(prods[-1], m)
+    if inv is None:
+        # the product has no inverse only if one of the values has none
+        a = next(a % m for a in values if gcd(a, m) != 1)
+        raise ValueError(_err_msg_no_inverse(a, m))
+
+    inverses = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        inverses[i] = inv * prods[i] % m
+        inv = inv * values[i] % m
+    return inverses
 
 
 def legendre_symbol(a, p) -> int:
-    """Compute the Legendre symbol a|p using Euler's criterion.
+    """Compute the Legendre symbol a|p.
 
     p is a prime, a is relatively prime to p (if p divides a,
     then a|p = 0).
     It returns 1 if a has a square root modulo p, -1 otherwise.
 
+    For odd p, the 'python' backend computes it as the Jacobi symbol
+    (binary algorithm), faster than Euler's criterion.
+
     https://codereview.stackexchange.com/questions/43210/tonelli-shanks-algorithm-implementation-of-prime-modular-square-root/43267
     """
 
-    ls = pow(a, p >> 1, p)
-    return -1 if ls == p - 1 else ls
+    return _backend.legendre(a, p)
+
+
+def jacobi_symbol(a: int, n: int) -> int:
+    """Compute the Jacobi symbol a|n; n must be an odd positive integer.
+
+    For prime n it is equal to the Legendre symbol,
+    but it is computed without modular exponentiation.
+    """
+
+    if n < 1 or n & 1 == 0:
+        raise ValueError(f"not an odd positive integer: {n}")
+    return _backend.jacobi(a, n)
 
 
 def mod_sqrt(a: int, p: int) -> int:
@@ -91,15 +294,15 @@ def mod_sqrt(a: int, p: int) -> int:
 
     if p % 4 == 3:  # secp256k1 case
         # inverse candidate is pow(a, (p + 1) // 4, p)
-        r = pow(a, (p >> 2) + 1, p)
+        r = _backend.pow_mod(a, (p >> 2) + 1, p)
     elif p % 8 == 5:
         # inverse candidate is pow(a, (p + 3) // 8, p)
-        r = pow(a, (p >> 3) + 1, p)
+        r = _backend.pow_mod(a, (p >> 3) + 1, p)
         if r * r % p == a:
             return r
         else:
             # another inverse candidate
-            r = r * pow(2, p >> 2, p) % p
+            r = r * _backend.pow_mod(2, p >> 2, p) % p
     else:
         return tonelli(a, p)
 
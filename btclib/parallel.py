@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Bulk elliptic curve operations over a process pool.
+
+The work is split in chunks, submitted to a pool of worker processes;
+the results are streamed back in order, as a generator,
+while a bounded number of chunks is in flight:
+the input can be an arbitrarily long iterator.
+
+By default a module-level pool is used, created at first use
+and kept alive (warm) for later calls:
+its workers preload the fixed-base table of the generator
+of the curves they are initialized with
+(from the persistent table cache, see tablecache)
+and keep the curves they have already used.
+
+Available operations are scalar multiplication (mult_many)
+and signature verification (verify_many),
+each chunk of signatures being batch verified by a worker.
+"""
+
+import atexit
+import itertools
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from hashlib import sha256
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
+
+from . import dsa, ssa
+from .alias import HashF, Integer, Point
+from .autotune import _apply
+from .curve import CURVES, Curve, _mult_generator, secp256k1
+from .curvegroup import _jac_from_aff, _mult
+from .prepared import PreparedPubKey
+from .utils import int_from_integer
+
+# curve specification to be sent to the workers:
+# the name of a bundled curve, or (p, a, b, G, n, h) and tuned selections
+CurveSpec = Union[str, Tuple[Tuple[int, int, int, Point, int, int], Dict]]
+
+# curves already built in the worker process, by specification
+_WORKER_CURVES: Dict[Any, Curve] = {}
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_WORKERS: Optional[int] = None
+
+_CHUNKSIZE = 1024
+_VERIFY_CHUNKSIZE = 256
+
+# signature schemes supported by verify_many
+_SCHEMES = ("dsa", "ssa")
+
+
+def _curve_spec(ec: Curve) -> CurveSpec:
+    "Return the picklable specification of the curve."
+
+    if ec.name is not None and CURVES.get(ec.name) is ec:
+        return ec.name
+    return (ec.p, ec._a, ec._b, ec.G, ec.n, ec.h), dict(ec._tuned)
+
+
+def _worker_curve(spec: CurveSpec) -> Curve:
+    "Return the curve of the specification, building it if needed."
+
+    key = spec if isinstance(spec, str) else repr(spec)
+    ec = _WORKER_CURVES.get(key)
+    if ec is None:
+        if isinstance(spec, str):
+            ec = CURVES[spec]
+        else:
+            (p, a, b, G, n, h), tuned = spec
+            # already validated in the parent process
+            ec = Curve(p, a, b, G, n, h, False, trusted=True)
+            for use_case, choice in tuned.items():
+                _apply(ec, use_case, choice)
+        # preload the fixed-base table of the generator
+        _mult_generator(1, ec)
+        _WORKER_CURVES[key] = ec
+    return ec
+
+
+def _init_worker(specs: Sequence[CurveSpec]) -> None:
+    "Warm up the worker process, preloading the curves."
+
+    for spec in specs:
+        _worker_curve(spec)
+
+
+def _mult_chunk(
+    spec: CurveSpec,
+    scalars: Sequence[Integer],
+    points: Union[None, Point, Sequence[Point]],
+) -> List[Point]:
+    """Return the scalar multiplications of a chunk, in affine coordinates.
+
+    points can be None (the generator), a single point,
+    or one point for each scalar.
+    The resulting points are converted to affine coordinates
+    all at once, with a single modular inversion.
+    """
+
+    ec = _worker_curve(spec)
+    if points is None or points == ec.G:
+        RJs = [_mult_generator(int_from_integer(m) % ec.n, ec) for m in scalars]
+    elif _is_point(points):
+        Q = cast(Point, points)
+        ec.require_on_curve(Q)
+        QJ = _jac_from_aff(Q)
+        RJs = [_mult(int_from_integer(m) % ec.n, QJ, ec) for m in scalars]
+    else:
+        RJs = []
+        for m, Q in zip(scalars, cast(Sequence[Point], points)):
+            ec.require_on_curve(Q)
+            RJs.append(_mult(int_from_integer(m) % ec.n, _jac_from_aff(Q), ec))
+    return ec._aff_from_jac_batch(RJs)
+
+
+def _is_point(points: Any) -> bool:
+    "Return True if points is a single point, not a sequence of points."
+
+    return isinstance(points, tuple) and len(points) == 2 and isinstance(points[0], int)
+
+
+def get_pool(
+    max_workers: Optional[int] = None, ecs: Iterable[Curve] = (secp256k1,)
+) -> ProcessPoolExecutor:
+    """Return the module-level process pool, creating it if needed.
+
+    The pool is created with max_workers processes
+    (default: the number of processors)
+    and its workers preload the given curves;
+    it is kept alive for later calls,
+    unless a different number of workers is requested.
+    """
+
+    global _POOL, _POOL_WORKERS
+    if _POOL is not None and max_workers not in (None, _POOL_WORKERS):
+        shutdown_pool()
+    if _POOL is None:
+        specs = [_curve_spec(ec) for ec in ecs]
+        _POOL = ProcessPoolExecutor(
+            max_workers, initializer=_init_worker, initargs=(specs,)
+        )
+        _POOL_WORKERS = _POOL._max_workers  # type: ignore
+    return _POOL
+
+
+@atexit.register
+def shutdown_pool() -> None:
+    "Shut down the module-level process pool, if any."
+
+    global _POOL, _POOL_WORKERS
+    if _POOL is not None:
+        _POOL.shutdown()
+    _POOL = None
+    _POOL_WORKERS = None
+
+
+def _chunks(
+    scalars: Iterable[Integer],
+    points: Union[None, Point, Iterable[Point]],
+    chunksize: int,
+) -> Iterator[Tuple[List[Integer], Union[None, Point, List[Point]]]]:
+    "Return the (scalars, points) chunks."
+
+    it = iter(scalars)
+    if points is None or _is_point(points):
+        Q = cast(Optional[Point], points)
+        while True:
+            chunk = list(itertools.islice(it, chunksize))
+            if not chunk:
+                return
+            yield chunk, Q
+    pit = iter(cast(Iterable[Point], points))
+    while True:
+        chunk = list(itertools.islice(it, chunksize))
+        if not chunk:
+            return
+        pchunk = list(itertools.islice(pit, len(chunk)))
+        if len(pchunk) != len(chunk):
+            raise ValueError("mismatch between number of scalars and points")
+        yield chunk, pchunk
+
+
+def mult_many(
+    scalars: Iterable[Integer],
+    points: Union[None, Point, Iterable[Point]] = None,
+    ec: Curve = secp256k1,
+    max_workers: Optional[int] = None,
+    chunksize: int = _CHUNKSIZE,
+    executor: Optional[Executor] = None,
+) -> Iterator[Point]:
+    """Return the scalar multiplications m_i*Q_i, in order, as a generator.
+
+    points can be None (the generator G, the default),
+    a single point Q used for all the scalars,
+    or an iterable of points Q_i, one for each scalar.
+
+    The work is split in chunks of chunksize scalars,
+    computed by a process pool (the module-level one, see get_pool,
+    unless an executor is provided) and converted to
+    affine coordinates with a single modular inversion per chunk.
+    At most two chunks per worker are in flight at any time.
+    """
+
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be positive: {chunksize}")
+
+    if executor is None:
+        executor = get_pool(max_workers)
+        nworkers = _POOL_WORKERS or 1
+    else:
+        nworkers = max_workers or int(getattr(executor, "_max_workers", 1))
+
+    spec = _curve_spec(ec)
+    pending: Deque[Future] = deque()
+    for chunk, pchunk in _chunks(scalars, points, chunksize):
+        pending.append(executor.submit(_mult_chunk, spec, chunk, pchunk))
+        if len(pending) >= 2 * nworkers:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def _plain_item(item: Tuple[Any, ...], ec: Curve) -> Tuple[Any, ...]:
+    """Return the item, with a prepared public key reduced to its point.
+
+    The wNAF tables of a PreparedPubKey are bound to the curve object
+    of this process: they are not worth sending to the workers.
+    """
+
+    pubkey = item[1]
+    if isinstance(pubkey, PreparedPubKey) and pubkey.ec is ec:
+        return item[:1] + (pubkey.Q,) + item[2:]
+    return item
+
+
+def _verify_chunk(
+    scheme: str, spec: CurveSpec, hf: HashF, items: Sequence[Tuple[Any, ...]]
+) -> Tuple[List[bool], float]:
+    """Return the verification results of a chunk, and the elapsed time.
+
+    The chunk is batch verified, bisecting failing batches
+    to pinpoint the invalid signatures.
+    """
+
+    start = time.perf_counter()
+    ec = _worker_curve(spec)
+    ms = [item[0] for item in items]
+    pubkeys = [item[1] for item in items]
+    sigs = [item[2] for item in items]
+    if scheme == "ssa":
+        invalid = ssa.invalid_indexes(ms, pubkeys, sigs, ec, hf)
+    else:
+        key_ids = [item[3] if len(item) > 3 else None for item in items]
+        invalid = dsa.invalid_indexes(ms, pubkeys, sigs, ec, hf, key_ids)
+    results = [True] * len(items)
+    for i in invalid:
+        results[i] = False
+    return results, time.perf_counter() - start
+
+
+class VerifyStats:
+    """Per-stage counters of a verify_many pipeline.
+
+    - read: items consumed from the input,
+      read_time being the time spent in the input iterator
+    - verified: items verified by the workers,
+      verify_time being the time spent by the workers (summed over them)
+    - yielded: results yielded, wait_time being the time spent
+      waiting for the workers; invalid is the number of invalid signatures
+    """
+
+    def __init__(self) -> None:
+        self.read = 0
+        self.verified = 0
+        self.yielded = 0
+        self.invalid = 0
+        self.chunks = 0
+        self.read_time = 0.0
+        self.verify_time = 0.0
+        self.wait_time = 0.0
+        self.elapsed = 0.0
+
+    def throughput(self) -> Dict[str, float]:
+        """Return the throughput (items per second) of each stage.
+
+        The verify throughput is per worker;
+        the pipeline one is the overall throughput.
+        """
+
+        def rate(count: int, seconds: float) -> float:
+            return count / seconds if seconds > 0 else 0.0
+
+        return {
+            "read": rate(self.read, self.read_time),
+            "verify": rate(self.verified, self.verify_time),
+            "pipeline": rate(self.yielded, self.elapsed),
+        }
+
+    def __repr__(self) -> str:
+        rates = ", ".join(f"{k}: {v:.0f}/s" for k, v in self.throughput().items())
+        return f"VerifyStats({self.yielded}/{self.read} items, {rates})"
+
+
+def verify_many(
+    items: Iterable[Tuple[Any, ...]],
+    scheme: str = "ssa",
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
+    max_workers: Optional[int] = None,
+    chunksize: int = _VERIFY_CHUNKSIZE,
+    executor: Optional[Executor] = None,
+    stats: Optional[VerifyStats] = None,
+) -> Iterator[bool]:
+    """Return the signature verification results, in order, as a generator.
+
+    items are (m, pubkey, sig) tuples, m being the hlen message hash
+    (as in ssa._verify and dsa._verify); the scheme is
+    'ssa' (BIP340 Schnorr) or 'dsa' (ECDSA), where the items can also be
+    (m, pubkey, sig, key_id) tuples, key_id being the recovery hint
+    enabling the batch verification (see dsa.batch_verify).
+    Prepared public keys (PreparedPubKey) are sent to the workers
+    as plain points.
+
+    The work is split in chunks of chunksize items,
+    batch verified by a process pool (the module-level one,
+    see get_pool, unless an executor is provided),
+    failing batches being bisected to pinpoint the invalid signatures.
+    At most two chunks per worker are in flight at any time.
+    If provided, stats counts the throughput of each stage.
+    """
+
+    if scheme not in _SCHEMES:
+        raise ValueError(f"unknown signature scheme: {scheme!r}")
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be positive: {chunksize}")
+
+    if executor is None:
+        executor = get_pool(max_workers)
+        nworkers = _POOL_WORKERS or 1
+    else:
+        nworkers = max_workers or int(getattr(executor, "_max_workers", 1))
+    if stats is None:
+        stats = VerifyStats()
+
+    start = time.perf_counter()
+
+    def results(future: Future) -> Iterator[bool]:
+        wait_start = time.perf_counter()
+        chunk_results, verify_time = future.result()
+        stats.wait_time += time.perf_counter() - wait_start
+        stats.verified += len(chunk_results)
+        stats.verify_time += verify_time
+        stats.invalid += chunk_results.count(False)
+        for result in chunk_results:
+            stats.yielded += 1
+            stats.elapsed = time.perf_counter() - start
+            yield result
+
+    spec = _curve_spec(ec)
+    it = iter(items)
+    pending: Deque[Future] = deque()
+    while True:
+        read_start = time.perf_counter()
+        chunk: List[Tuple[Any, ...]] = list(itertools.islice(it, chunksize))
+        stats.read_time += time.perf_counter() - read_start
+        if not chunk:
+            break
+        stats.read += len(chunk)
+        stats.chunks += 1
+        chunk = [_plain_item(item, ec) for item in chunk]
+        pending.append(executor.submit(_verify_chunk, scheme, spec, hf, chunk))
+        if len(pending) >= 2 * nworkers:
+            yield from results(pending.popleft())
+    while pending:
+        yield from results(pending.popleft())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Array-backed batch of elliptic curve points, for bulk work.
+
+Points are usually represented as tuples of Python ints:
+a secp256k1 affine point takes about 180 bytes
+(the tuple and two int objects), i.e. millions of small objects
+to be allocated and tracked by the garbage collector in bulk jobs.
+
+A PointBatch stores the point coordinates contiguously
+in a single bytearray, as fixed-width (ec.psize bytes) big-endian
+integers: 64 bytes for a secp256k1 affine point.
+Coordinates can be affine (x, y) or Jacobian (X, Y, Z):
+Jacobian batches avoid modular inversions while computing,
+and are converted to affine coordinates chunk by chunk,
+with a single modular inversion per chunk.
+
+Bulk operations run over the whole batch:
+multi scalar multiplication, SEC serialization
+(compressed/uncompressed, directly from the stored bytes)
+and HASH160 for address generation.
+"""
+
+import itertools
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from .alias import Integer, JacPoint, Octets, Point
+from .curve import Curve, _mult_generator, secp256k1
+from .curvegroup import _jac_from_aff, _mult, _multi_mult
+from .secpoint import point_from_octets
+from .utils import bytes_from_octets, hash160, int_from_integer
+
+# number of points converted to affine coordinates with a single inversion
+_CHUNKSIZE = 4096
+
+
+class PointBatch:
+    """Batch of elliptic curve points, stored contiguously as bytes.
+
+    Items are returned as tuples of ints:
+    affine points (x, y) or Jacobian points (X, Y, Z)
+    if the batch has Jacobian coordinates.
+    """
+
+    def __init__(self, points: Iterable[Point] = (), ec: Curve = secp256k1) -> None:
+        "Build an affine batch from the points, checked to be on curve."
+
+        self.ec = ec
+        self.jacobian = False
+        self._data = bytearray()
+        self._len = 0
+        for Q in points:
+            ec.require_on_curve(Q)
+            self._append(Q)
+
+    @classmethod
+    def _empty(cls, ec: Curve, jacobian: bool) -> "PointBatch":
+        batch = cls((), ec)
+        batch.jacobian = jacobian
+        return batch
+
+    @property
+    def dims(self) -> int:
+        "Return the number of coordinates per point."
+        return 3 if self.jacobian else 2
+
+    @property
+    def nbytes(self) -> int:
+        "Return the size in bytes of the stored coordinates."
+        return len(self._data)
+
+    def _append(self, Q: Union[Point, JacPoint]) -> None:
+        size = self.ec.psize
+        for coord in Q:
+            self._data += coord.to_bytes(size, byteorder="big")
+        self._len += 1
+
+    def append(self, Q: Point) -> None:
+        "Append the affine point, checked to be on curve."
+
+        self.ec.require_on_curve(Q)
+        self._append(_jac_from_aff(Q) if self.jacobian else Q)
+
+    def extend(self, points: Iterable[Point]) -> None:
+        "Append the affine points, checked to be on curve."
+
+        for Q in points:
+            self.append(Q)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _item(self, i: int) -> Tuple[int, ...]:
+        size = self.ec.psize
+        start = i * self.dims * size
+        view = memoryview(self._data)
+        return tuple(
+            int.from_bytes(view[j : j + size], byteorder="big")
+            for j in range(start, start + self.dims * size, size)
+        )
+
+    def __getitem__(self, i: int) -> Tuple[int, ...]:
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError(f"index out of range: {i}")
+        return self._item(i)
+
+    def __iter__(self) -> Iterator[Tuple[int, ...]]:
+        for i in range(self._len):
+            yield self._item(i)
+
+    def _jac_points(self) -> Iterator[JacPoint]:
+        "Return the points in Jacobian coordinates."
+
+        for Q in self:
+            yield Q if self.jacobian else _jac_from_aff(Q)  # type: ignore
+
+    def to_affine(self) -> "PointBatch":
+        """Return the batch in affine coordinates.
+
+        Jacobian coordinates are converted chunk by chunk,
+        with a single modular inversion per chunk.
+        """
+
+        if not self.jacobian:
+            return self
+        batch = PointBatch._empty(self.ec, False)
+        it = self._jac_points()
+        while True:
+            chunk = list(itertools.islice(it, _CHUNKSIZE))
+            if not chunk:
+                return batch
+            batch._extend_jac(chunk)
+
+    def to_jacobian(self) -> "PointBatch":
+        "Return the batch in Jacobian coordinates."
+
+        if self.jacobian:
+            return self
+        batch = PointBatch._empty(self.ec, True)
+        for Q in self:
+            batch._append(_jac_from_aff(Q))  # type: ignore
+        return batch
+
+    @classmethod
+    def from_scalars(
+        cls,
+        scalars: Iterable[Integer],
+        Q: Optional[Point] = None,
+        ec: Curve = secp256k1,
+        jacobian: bool = False,
+    ) -> "PointBatch":
+        """Return the batch of the scalar multiplications m_i*Q.
+
+        Q is the curve generator by default.
+        Unless Jacobian coordinates are requested, the resulting points
+        are converted to affine coordinates chunk by chunk,
+        with a single modular inversion per chunk.
+        """
+
+        if Q is None or Q == ec.G:
+            QJ = None
+        else:
+            ec.require_on_curve(Q)
+            QJ = _jac_from_aff(Q)
+        batch = cls._empty(ec, jacobian)
+        chunk: List[JacPoint] = []
+        for m in scalars:
+            m = int_from_integer(m) % ec.n
+            chunk.append(_mult_generator(m, ec) if QJ is None else _mult(m, QJ, ec))
+            if len(chunk) == _CHUNKSIZE:
+                batch._extend_jac(chunk)
+                chunk = []
+        batch._extend_jac(chunk)
+        return batch
+
+    def _extend_jac(self, QJs: List[JacPoint]) -> None:
+        if self.jacobian:
+            for QJ in QJs:
+                self._append(QJ)
+        else:
+            for Q in self.ec._aff_from_jac_batch(QJs):
+                self._append(Q)
+
+    def multi_mult(self, scalars: Iterable[Integer]) -> Point:
+        "Return the multi scalar multiplication u1*Q1 + ... + un*Qn."
+
+        ints = [int_from_integer(m) % self.ec.n for m in scalars]
+        if len(ints) != self._len:
+            errMsg = "mismatch between number of scalars and points: "
+            errMsg += f"{len(ints)} vs {self._len}"
+            raise ValueError(errMsg)
+        R = _multi_mult(ints, list(self._jac_points()), self.ec)
+        return self.ec._aff_from_jac(R)
+
+    def _sec_encodings(self, compressed: bool) -> Iterator[bytes]:
+        "Return the SEC encodings, directly from the stored coordinates."
+
+        batch = self.to_affine()
+        size = batch.ec.psize
+        with memoryview(batch._data) as data:
+            for start in range(0, len(data), 2 * size):
+                if not any(data[start + size : start + 2 * size]):
+                    raise ValueError("no bytes representation for infinity point")
+                if compressed:
+                    prefix = b"\x03" if data[start + 2 * size - 1] & 1 else b"\x02"
+                    yield prefix + data[start : start + size]
+                else:
+                    yield b"\x04" + data[start : start + 2 * size]
+
+    def serialize(self, compressed: bool = True) -> bytes:
+        """Return the concatenated SEC encodings of the points.
+
+        Points are encoded as compressed (0x02, 0x03) or uncompressed (0x04)
+        octet sequences, according to SEC 1 v.2, section 2.3.3.
+        """
+
+        return b"".join(self._sec_encodings(compressed))
+
+    @classmethod
+    def deserialize(
+        cls, data: Octets, ec: Curve = secp256k1, compressed: bool = True
+    ) -> "PointBatch":
+        "Return the affine batch from the concatenated SEC encodings."
+
+        data = bytes_from_octets(data)
+        size = ec.psize + 1 if compressed else 2 * ec.psize + 1
+        if len(data) % size:
+            raise ValueError(f"invalid size for SEC encodings: {len(data)}")
+        batch = cls._empty(ec, False)
+        for start in range(0, len(data), size):
+            batch._append(point_from_octets(data[start : start + size], ec))
+        return batch
+
+    def hash160s(self, compressed: bool = True) -> List[bytes]:
+        """Return the HASH160 of the SEC encodings of the points.
+
+        HASH160 is RIPEMD160(SHA256), as used in public key addresses.
+        """
+
+        return [hash160(pubkey) for pubkey in self._sec_encodings(compressed)]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PointBatch):
+            return NotImplemented
+        if self.ec is not other.ec or self._len != other._len:
+            return False
+        if self.jacobian == other.jacobian and not self.jacobian:
+            return self._data == other._data
+        return all(
+            self.ec._jac_equality(P, Q)  # type: ignore
+            for P, Q in zip(self.to_jacobian(), other.to_jacobian())
+        )
+
+    def __repr__(self) -> str:
+        coords = "Jacobian" if self.jacobian else "affine"
+        return f"PointBatch({self._len} {coords} points, {self.nbytes} bytes)"
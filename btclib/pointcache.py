@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Bounded in-memory cache of per-point precomputed tables.
+
+Tables of point multiples (e.g. the fixed-window tables
+used by curvegroup._mult_fixed_window_cached) are large:
+a secp256k1 table for w=4 is made of 65x16 Jacobian points,
+i.e. more than 200kB.
+Instead of an unbounded number of them (or a fixed number,
+as with functools.lru_cache), the cache has a byte budget:
+when it is exceeded, tables are evicted according to
+the least recently used (LRU) or least frequently used (LFU) policy.
+Tables can be pinned, so that they are never evicted
+(e.g. the tables of hot public keys, see curvegroup.warm_up).
+
+Hit, miss, and eviction statistics are available.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+POLICIES = ("lru", "lfu")
+
+# default byte budget: 64MB
+_MAX_BYTES = 64 * 1024 * 1024
+
+
+@dataclass
+class CacheStats:
+    "Statistics of a TableCache."
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    nbytes: int
+    max_bytes: int
+    policy: str
+
+
+def nbytes(obj: Any) -> int:
+    """Return the estimated memory size of a (nested) table of ints.
+
+    Tuples and lists are recursively accounted for,
+    together with their items.
+    """
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple)):
+        size += sum(nbytes(item) for item in obj)
+    return size
+
+
+class TableCache:
+    """Cache of precomputed tables with a byte budget.
+
+    It is safe to be used from multiple threads.
+    """
+
+    def __init__(self, max_bytes: int = _MAX_BYTES, policy: str = "lru") -> None:
+        self._lock = threading.RLock()
+        # entries are kept in least recently used order
+        self._tables: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._uses: Dict[Hashable, int] = {}
+        self._pinned: Set[Hashable] = set()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.max_bytes = _MAX_BYTES
+        self.policy = "lru"
+        self.configure(max_bytes, policy)
+
+    def configure(
+        self, max_bytes: Optional[int] = None, policy: Optional[str] = None
+    ) -> None:
+        "Set byte budget and/or eviction policy, evicting tables if needed."
+
+        if max_bytes is not None and max_bytes < 0:
+            raise ValueError(f"negative max_bytes: {max_bytes}")
+        if policy is not None and policy not in POLICIES:
+            raise ValueError(f"invalid policy: {policy!r}")
+        with self._lock:
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if policy is not None:
+                self.policy = policy
+            self._evict()
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._tables
+
+    def get(self, key: Hashable, factory: Callable[[], Any], pin: bool = False) -> Any:
+        """Return the table for key, computing it with factory if missing.
+
+        A pinned table is never evicted (until unpinned).
+        A table larger than the byte budget is not cached, unless pinned.
+        """
+
+        with self._lock:
+            if key in self._tables:
+                self.hits += 1
+                self._uses[key] += 1
+                self._tables.move_to_end(key)
+                if pin:
+                    self._pinned.add(key)
+                return self._tables[key]
+            self.misses += 1
+
+        # computed without holding the lock:
+        # concurrent misses might compute the same table twice
+        table = factory()
+        size = nbytes(table)
+
+        with self._lock:
+            if key not in self._tables:
+                if size > self.max_bytes and not pin:
+                    return table
+                self._tables[key] = table
+                self._sizes[key] = size
+                self._uses[key] = 1
+                self._nbytes += size
+            if pin:
+                self._pinned.add(key)
+            # make room for the new table, evicting the other ones
+            self._evict(key)
+            return self._tables.get(key, table)
+
+    def unpin(self, key: Hashable) -> None:
+        "Make the table evictable again."
+
+        with self._lock:
+            self._pinned.discard(key)
+            self._evict()
+
+    def _remove(self, key: Hashable) -> None:
+        del self._tables[key]
+        self._nbytes -= self._sizes.pop(key)
+        del self._uses[key]
+        self._pinned.discard(key)
+
+    def _evict(self, keep: Optional[Hashable] = None) -> None:
+        """Evict unpinned tables until the byte budget is met.
+
+        The keep table is evicted only if there is no other candidate.
+        """
+
+        while self._nbytes > self.max_bytes:
+            candidates = [k for k in self._tables if k not in self._pinned]
+            if len(candidates) > 1 and keep in candidates:
+                candidates.remove(keep)
+            if not candidates:
+                return
+            if self.policy == "lru":
+                key = candidates[0]
+            else:
+                # least frequently used, least recently used among equals
+                key = min(candidates, key=self._uses.__getitem__)
+            self._remove(key)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        "Remove all the tables (pinned ones too) and reset the statistics."
+
+        with self._lock:
+            self._tables.clear()
+            self._sizes.clear()
+            self._uses.clear()
+            self._pinned.clear()
+            self._nbytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> CacheStats:
+        "Return the cache statistics."
+
+        with self._lock:
+            return CacheStats(
+                self.hits,
+                self.misses,
+                self.evictions,
+                len(self._tables),
+                self._nbytes,
+                self.max_bytes,
+                self.policy,
+            )
+
+
+# cache used for the per-point tables of curvegroup
+TABLE_CACHE = TableCache()
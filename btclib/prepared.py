@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Prepared public keys, for repeated signature verification.
+
+Signature verification computes u*G + v*Q:
+the wNAF tables of the generator G are computed once per curve
+(see curve._generator_wnaf_tables), while the ones of
+the public key Q are computed at each verification.
+A PreparedPubKey keeps the wNAF tables of Q,
+saving their computation when verifying many signatures
+against the same public key: it is accepted by
+dsa.verify and ssa.verify in place of the public key.
+
+Moreover, REGISTRY automatically prepares the hottest public keys:
+once enabled, dsa and ssa look up there the public keys
+they verify against, so that the most frequently used ones
+are prepared without any explicit action:
+
+REGISTRY.configure(enabled=True)
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Set, Tuple, Union
+
+from .alias import JacPoint, Point
+from .curve import Curve, secp256k1
+from .curvegroup import WNAFTables, _jac_from_aff, _wnaf_tables
+from .to_pubkey import Key, point_from_key
+
+# window size of the wNAF tables of prepared public keys
+_PREPARED_W = 6
+
+
+class PreparedPubKey:
+    """Public key with precomputed wNAF tables.
+
+    It is built from any key representation
+    supported by to_pubkey.point_from_key.
+    """
+
+    Q: Point
+    QJ: JacPoint
+    ec: Curve
+    w: int
+    tables: WNAFTables
+
+    def __init__(
+        self,
+        key: Union[Key, "PreparedPubKey"],
+        ec: Curve = secp256k1,
+        w: int = _PREPARED_W,
+    ) -> None:
+
+        if isinstance(key, PreparedPubKey):
+            if key.ec is not ec:
+                raise ValueError("curve mismatch")
+            key = key.Q
+        self.Q = point_from_key(key, ec)
+        self.QJ = _jac_from_aff(self.Q)
+        self.ec = ec
+        self.w = w
+        self.tables = _wnaf_tables(self.QJ, ec, w)
+
+    def tables_for(self, ec: Curve) -> WNAFTables:
+        "Return the wNAF tables, checking the curve."
+
+        if ec is not self.ec:
+            raise ValueError("curve mismatch")
+        return self.tables
+
+    def __repr__(self) -> str:
+        return f"PreparedPubKey(({hex(self.Q[0])}, {hex(self.Q[1])}), w={self.w})"
+
+
+# number of tracked use counts per prepared public key
+_COUNTS_PER_KEY = 16
+
+
+class KeyRegistry:
+    """Registry automatically preparing the hottest public keys.
+
+    Each lookup counts the uses of the public key:
+    when a key has been used threshold times,
+    it is prepared and kept for later lookups.
+
+    At most max_keys prepared keys are kept:
+    when exceeded, the least frequently used one is dropped,
+    unless pinned (see pin).
+    The use counts of not (yet) prepared keys are kept
+    for a bounded number of keys, the least recently used ones
+    being forgotten.
+
+    It is safe to be used from multiple threads:
+    hits are served without taking the lock.
+    """
+
+    def __init__(
+        self, max_keys: int = 256, threshold: int = 8, enabled: bool = True
+    ) -> None:
+        self._lock = threading.RLock()
+        self._prepared: Dict[Hashable, PreparedPubKey] = {}
+        self._uses: Dict[Hashable, int] = {}
+        self._pinned: Set[Hashable] = set()
+        # use counts of the not (yet) prepared keys, in LRU order
+        self._counts: "OrderedDict[Hashable, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.max_keys = max_keys
+        self.threshold = threshold
+        self.enabled = enabled
+        self.configure(max_keys, threshold, enabled)
+
+    def configure(
+        self,
+        max_keys: Optional[int] = None,
+        threshold: Optional[int] = None,
+        enabled: Optional[bool] = None,
+    ) -> None:
+        "Set max number of prepared keys, hotness threshold, enabled status."
+
+        if max_keys is not None and max_keys < 0:
+            raise ValueError(f"negative max_keys: {max_keys}")
+        if threshold is not None and threshold < 1:
+            raise ValueError(f"threshold must be positive: {threshold}")
+        with self._lock:
+            if max_keys is not None:
+                self.max_keys = max_keys
+            if threshold is not None:
+                self.threshold = threshold
+            if enabled is not None:
+                self.enabled = enabled
+            self._evict()
+            while len(self._counts) > _COUNTS_PER_KEY * self.max_keys:
+                self._counts.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._prepared)
+
+    def __contains__(self, key: Tuple[Point, Curve]) -> bool:
+        return key in self._prepared
+
+    def lookup(self, Q: Point, ec: Curve = secp256k1) -> Optional[PreparedPubKey]:
+        """Return the prepared public key, if hot enough.
+
+        The public key use is counted:
+        if it has become hot, it is prepared.
+        Q is assumed to be a valid point on the curve.
+        """
+
+        key = (Q, ec)
+        # lock-free fast path for hits: dict.get is atomic,
+        # while hits and use counts are just statistics
+        prepared = self._prepared.get(key)
+        if prepared is not None:
+            self.hits += 1
+            self._uses[key] = self._uses.get(key, 0) + 1
+            return prepared
+
+        with self._lock:
+            prepared = self._prepared.get(key)
+            if prepared is not None:
+                return prepared
+            self.misses += 1
+            count = self._counts.pop(key, 0) + 1
+            if count < self.threshold or self.max_keys == 0:
+                self._counts[key] = count
+                if len(self._counts) > _COUNTS_PER_KEY * self.max_keys:
+                    self._counts.popitem(last=False)
+                return None
+
+        # computed without holding the lock
+        prepared = PreparedPubKey(Q, ec)
+
+        with self._lock:
+            if key not in self._prepared:
+                self._prepared[key] = prepared
+                self._uses[key] = count
+                self._evict(key)
+            return self._prepared.get(key, prepared)
+
+    def pin(
+        self, key: Union[Key, PreparedPubKey], ec: Curve = secp256k1
+    ) -> PreparedPubKey:
+        """Prepare the public key, keeping it until unpinned.
+
+        Return the prepared public key.
+        """
+
+        if isinstance(key, PreparedPubKey) and key.ec is ec:
+            prepared = key
+        else:
+            prepared = PreparedPubKey(key, ec)
+        k = (prepared.Q, ec)
+        with self._lock:
+            if k not in self._prepared:
+                self._prepared[k] = prepared
+                self._uses[k] = self._counts.pop(k, 0)
+            self._pinned.add(k)
+            return self._prepared[k]
+
+    def unpin(self, key: Union[Key, PreparedPubKey], ec: Curve = secp256k1) -> None:
+        "Make the prepared public key evictable again."
+
+        Q = key.Q if isinstance(key, PreparedPubKey) else point_from_key(key, ec)
+        with self._lock:
+            self._pinned.discard((Q, ec))
+            self._evict()
+
+    def _evict(self, keep: Optional[Hashable] = None) -> None:
+        """Drop the least frequently used unpinned keys, if exceeding max_keys.
+
+        The keep key is dropped only if there is no other candidate.
+        """
+
+        while len(self._prepared) > self.max_keys:
+            candidates = [k for k in self._prepared if k not in self._pinned]
+            if len(candidates) > 1 and keep in candidates:
+                candidates.remove(keep)
+            if not candidates:
+                return
+            key = min(candidates, key=self._uses.__getitem__)
+            del self._prepared[key]
+            del self._uses[key]
+
+    def clear(self) -> None:
+        "Remove all the prepared keys (pinned ones too) and reset the statistics."
+
+        with self._lock:
+            self._prepared.clear()
+            self._uses.clear()
+            self._pinned.clear()
+            self._counts.clear()
+            self.hits = self.misses = 0
+
+
+# registry used by dsa and ssa signature verification, disabled by default
+REGISTRY = KeyRegistry(enabled=False)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Signature verification cache, as Bitcoin Core CSignatureCache.
+
+A transaction signature is usually verified twice:
+when the transaction enters the mempool and
+when the block including it is validated.
+A SigCache remembers the successfully verified signatures,
+so that the second verification is just a lookup.
+
+Entries are the salted SHA256 of scheme, curve,
+message hash, public key, and signature:
+the random salt prevents an attacker from crafting colliding entries.
+Only valid signatures are cached;
+the least recently used entries are evicted
+when exceeding the maximum number of entries.
+
+SIGCACHE is consulted by dsa.verify, ssa.verify, and bms.verify
+(and their private counterparts) once enabled:
+
+SIGCACHE.configure(enabled=True)
+"""
+
+import secrets
+import threading
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Optional
+
+from .curve import Curve
+
+
+def _curve_id(ec: Curve) -> bytes:
+    "Return the bytes identifying the curve."
+
+    size = ec.psize
+    ints = (ec.p, ec._a, ec._b, ec.G[0], ec.G[1], ec.n)
+    return b"".join(i.to_bytes(size + 1, byteorder="big") for i in ints)
+
+
+class SigCache:
+    """Bounded cache of valid signatures, with LRU eviction.
+
+    It is disabled by default.
+    It is safe to be used from multiple threads.
+    """
+
+    def __init__(self, max_entries: int = 100_000, enabled: bool = False) -> None:
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, None]" = OrderedDict()
+        self._salt = secrets.token_bytes(32)
+        self.hits = 0
+        self.misses = 0
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.configure(max_entries, enabled)
+
+    def configure(
+        self, max_entries: Optional[int] = None, enabled: Optional[bool] = None
+    ) -> None:
+        "Set the maximum number of entries and/or enable/disable the cache."
+
+        if max_entries is not None and max_entries < 0:
+            raise ValueError(f"negative max_entries: {max_entries}")
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if enabled is not None:
+                self.enabled = enabled
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def entry(
+        self, scheme: str, ec: Curve, m: bytes, pubkey: bytes, sig: bytes
+    ) -> bytes:
+        "Return the salted hash identifying the signature verification."
+
+        h = sha256(self._salt)
+        h.update(scheme.encode())
+        h.update(_curve_id(ec))
+        for data in (m, pubkey, sig):
+            # length prefix, to make the concatenation unambiguous
+            h.update(len(data).to_bytes(4, byteorder="big"))
+            h.update(data)
+        return h.digest()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, entry: bytes) -> bool:
+        "Return True if the entry is cached, counting hits and misses."
+
+        with self._lock:
+            if entry in self._entries:
+                self._entries.move_to_end(entry)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, entry: bytes) -> None:
+        "Add the entry of a valid signature, evicting the LRU one if needed."
+
+        with self._lock:
+            if self.max_entries == 0:
+                return
+            self._entries[entry] = None
+            self._entries.move_to_end(entry)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        "Remove all the entries and reset the statistics."
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+# signature cache used by dsa, ssa, and bms signature verification
+SIGCACHE = SigCache()
@@ -49,9 +49,10 @@ The signature size is p-size*n-size, where p-size is the field element
 For sepcp256k1 the resulting signature size is 64 bytes.
 """
 
+import itertools
 import secrets
 from hashlib import sha256
-from typing import List, Optional, Sequence, Tuple, Union
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 from .alias import (
     HashF,
@@ -64,10 +65,12 @@ from .alias import (
     String,
 )
 from .bip32 import BIP32Key
-from .curve import Curve, secp256k1
-from .curvegroup import _double_mult, _mult, _multi_mult
-from .hashes import reduce_to_hlen
+from .curve import Curve, _generator_wnaf_tables, _mult_generator, secp256k1
+from .curvegroup import WNAFTables, _double_mult_vartime, _multi_mult
+from .hashes import reduce_to_hlen, tagged_hash
 from .numbertheory import mod_inv
+from .prepared import REGISTRY, PreparedPubKey
+from .sigcache import SIGCACHE
 from .to_prvkey import PrvKey, int_from_prvkey
 from .to_pubkey import point_from_pubkey
 from .utils import bytes_from_octets, hex_string, int_from_bits
@@ -121,7 +124,7 @@ def _validate_sig(r: int, s: int, ec: Curve) -> None:
     ec.require_p_ThreeModFour()
 
     # Fail if r is not a field element, i.e. not a valid x-coordinate
-    ec.y(r)
+    ec.require_valid_x(r)
 
     # Fail if s is not [0, n-1].
     if not 0 <= s < ec.n:
@@ -170,7 +173,7 @@ def gen_keys(prvkey: PrvKey = None, ec: Curve = secp256k1) -> Tuple[int, int]:
     else:
         q = int_from_prvkey(prvkey, ec)
 
-    QJ = _mult(q, ec.GJ, ec)
+    QJ = _mult_generator(q, ec)
     x_Q = ec._x_aff_from_jac(QJ)
     if not ec.has_square_y(QJ):
         q = ec.n - q
@@ -178,19 +181,6 @@ def gen_keys(prvkey: PrvKey = None, ec: Curve = secp256k1) -> Tuple[int, int]:
     return q, x_Q
 
 
-# TODO move to hashes
-# This implementation can be sped up by storing the midstate after hashing
-# tag_hash instead of rehashing it all the time.
-def _tagged_hash(tag: str, m: bytes, hf: HashF) -> bytes:
-    t = tag.encode()
-    h1 = hf()
-    h1.update(t)
-    tag_hash = h1.digest()
-    h2 = hf()
-    h2.update(tag_hash + tag_hash + m)
-    return h2.digest()
-
-
 def __det_nonce(m: bytes, q: int, ec: Curve, hf: HashF) -> Tuple[int, int]:
 
     # assume the random oracle model for the hash function,
@@ -206,7 +196,7 @@ def __det_nonce(m: bytes, q: int, ec: Curve, hf: HashF) -> Tuple[int, int]:
     # which works also for very-low-cardinality test curves
     t = q.to_bytes(ec.nsize, "big") + m
     while True:
-        t = _tagged_hash("BIPSchnorrDerive", t, hf)
+        t = tagged_hash("BIPSchnorrDerive", t, hf)
         # The following lines would introduce a bias
         # k = int.from_bytes(t, 'big') % ec.n
         # k = int_from_bits(t, ec.nlen) % ec.n
@@ -247,7 +237,7 @@ def __challenge(m: bytes, x_Q: int, r: int, ec: Curve, hf: HashF) -> int:
     t += x_Q.to_bytes(ec.psize, "big")
     # m size must have been already checked to be equal to hsize
     t += m
-    t = _tagged_hash("BIPSchnorr", t, hf)
+    t = tagged_hash("BIPSchnorr", t, hf)
     # if c == 0 then private key is removed from the equations,
     # so the signature is valid for any private/public key pair
     # if c == 0:
@@ -335,16 +325,20 @@ def sign(
     return _sign(m, prvkey, k, ec, hf)
 
 
-def __assert_as_valid(c: int, QJ: JacPoint, r: int, s: int, ec: Curve) -> None:
+def __assert_as_valid(
+    c: int, QJ: JacPoint, r: int, s: int, ec: Curve, QT: Optional[WNAFTables] = None
+) -> None:
     # Private function for test/dev purposes
     # It raises Errors, while verify should always return True or False
+    # QT are the precomputed wNAF tables of Q, if available
 
     # BIP340 is defined for curves whose field prime p = 3 % 4
     ec.require_p_ThreeModFour()
 
     # Let K = sG - eQ.
     # in Jacobian coordinates
-    KJ = _double_mult(ec.n - c, QJ, s, ec.GJ, ec)
+    GT = _generator_wnaf_tables(ec)
+    KJ = _double_mult_vartime(ec.n - c, QJ, s, ec.GJ, ec, HT=QT, QT=GT)
 
     # Fail if infinite(KJ).
     # Fail if jacobi(y_K) ≠ 1.
@@ -356,23 +350,43 @@ def __assert_as_valid(c: int, QJ: JacPoint, r: int, s: int, ec: Curve) -> None:
 
 
 def _assert_as_valid(
-    m: Octets, Q: BIP340PubKey, sig: SSASig, ec: Curve = secp256k1, hf: HashF = sha256
+    m: Octets,
+    Q: Union[BIP340PubKey, PreparedPubKey],
+    sig: SSASig,
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
 ) -> None:
     # Private function for test/dev purposes
     # It raises Errors, while verify should always return True or False
 
     r, s = deserialize(sig, ec)
 
-    x_Q, y_Q = point_from_bip340pubkey(Q, ec)
+    QT: Optional[WNAFTables]
+    if isinstance(Q, PreparedPubKey):
+        QT = Q.tables_for(ec)
+        x_Q, y_Q = Q.Q
+        if not ec.has_square_y(Q.Q):
+            # the BIP340 public key is the opposite point
+            y_Q = ec.p - y_Q
+            QT = [(negT, T) for T, negT in QT]
+    else:
+        x_Q, y_Q = point_from_bip340pubkey(Q, ec)
+        # hot public keys are automatically prepared
+        prepared = REGISTRY.lookup((x_Q, y_Q), ec) if REGISTRY.enabled else None
+        QT = None if prepared is None else prepared.tables
 
     # Let c = int(hf(bytes(r) || bytes(Q) || m)) mod n.
     c = _challenge(m, x_Q, r, ec, hf)
 
-    __assert_as_valid(c, (x_Q, y_Q, 1), r, s, ec)
+    __assert_as_valid(c, (x_Q, y_Q, 1), r, s, ec, QT)
 
 
 def assert_as_valid(
-    msg: String, Q: BIP340PubKey, sig: SSASig, ec: Curve = secp256k1, hf: HashF = sha256
+    msg: String,
+    Q: Union[BIP340PubKey, PreparedPubKey],
+    sig: SSASig,
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
 ) -> None:
 
     m = reduce_to_hlen(msg, hf)
@@ -380,23 +394,64 @@ def assert_as_valid(
 
 
 def _verify(
-    m: Octets, Q: BIP340PubKey, sig: SSASig, ec: Curve = secp256k1, hf: HashF = sha256
+    m: Octets,
+    Q: Union[BIP340PubKey, PreparedPubKey],
+    sig: SSASig,
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
 ) -> bool:
-    """Verify the BIP340 signature of the provided message."""
+    """Verify the BIP340 signature of the provided message.
+
+    Q can be a PreparedPubKey, with precomputed tables
+    for repeated verification against the same public key.
+    """
 
     # try/except wrapper for the Errors raised by _assert_as_valid
     try:
+        entry = _sigcache_entry(m, Q, sig, ec, hf) if SIGCACHE.enabled else None
+        if entry is not None and entry in SIGCACHE:
+            return True
         _assert_as_valid(m, Q, sig, ec, hf)
     except Exception:
         return False
     else:
+        if entry is not None:
+            SIGCACHE.add(entry)
         return True
 
 
+def _sigcache_entry(
+    m: Octets,
+    Q: Union[BIP340PubKey, PreparedPubKey],
+    sig: SSASig,
+    ec: Curve,
+    hf: HashF,
+) -> bytes:
+    "Return the signature cache entry of the BIP340 signature verification."
+
+    m = bytes_from_octets(m, hf().digest_size)
+    if isinstance(Q, PreparedPubKey):
+        x_Q = Q.Q[0]
+    else:
+        x_Q = point_from_bip340pubkey(Q, ec)[0]
+    r, s = deserialize(sig, ec)
+    scheme = "bip340 " + hf().name
+    pubkey = x_Q.to_bytes(ec.psize, "big")
+    return SIGCACHE.entry(scheme, ec, m, pubkey, serialize(r, s, ec))
+
+
 def verify(
-    msg: String, Q: BIP340PubKey, sig: SSASig, ec: Curve = secp256k1, hf: HashF = sha256
+    msg: String,
+    Q: Union[BIP340PubKey, PreparedPubKey],
+    sig: SSASig,
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
 ) -> bool:
-    """ECDSA signature verification (SEC 1 v.2 section 4.1.4)."""
+    """Verify the BIP340 signature of the provided message.
+
+    Q can be a PreparedPubKey, with precomputed tables
+    for repeated verification against the same public key.
+    """
 
     m = reduce_to_hlen(msg, hf)
     return _verify(m, Q, sig, ec, hf)
@@ -411,7 +466,8 @@ def __recover_pubkey(c: int, r: int, s: int, ec: Curve) -> int:
     KJ = r, ec.y_quadratic_residue(r, True), 1
 
     e1 = mod_inv(c, ec.n)
-    QJ = _double_mult(ec.n - e1, KJ, e1 * s, ec.GJ, ec)
+    GT = _generator_wnaf_tables(ec)
+    QJ = _double_mult_vartime(ec.n - e1, KJ, e1 * s, ec.GJ, ec, QT=GT)
     assert QJ[2] != 0, "how did you do that?!?"
     return ec._x_aff_from_jac(QJ)
 
@@ -446,12 +502,47 @@ def _crack_prvkey(
     return q, k
 
 
+# batch verification is performed in chunks of at most _CHUNK_SIZE signatures
+_CHUNK_SIZE = 512
+# smaller batches are not faster than one at a time verification
+# (see tests/bench_batch_verify.py)
+_MIN_BATCH_SIZE = 32
+
+
+def _batch_weights(
+    ms: Sequence[bytes],
+    x_Qs: Sequence[int],
+    sigs: Sequence[SSASigTuple],
+    ec: Curve,
+    hf: HashF,
+) -> List[int]:
+    """Return the batch verification weights, derived from all the inputs.
+
+    The weights are generated by a CSPRNG (tagged hash in counter mode)
+    seeded by the hash of all the inputs of the batch verification,
+    as suggested by BIP340: the first weight is always 1.
+    """
+
+    h = hf()
+    for m, x_Q, (r, s) in zip(ms, x_Qs, sigs):
+        h.update(x_Q.to_bytes(ec.psize, "big"))
+        h.update(m)
+        h.update(r.to_bytes(ec.psize, "big") + s.to_bytes(ec.nsize, "big"))
+    seed = h.digest()
+    weights = [1]
+    for i in range(1, len(sigs)):
+        t = tagged_hash("BIPSchnorrBatch", seed + i.to_bytes(4, "big"), hf)
+        weights.append(1 + int.from_bytes(t, "big") % (ec.n - 1))
+    return weights
+
+
 def _batch_verify(
     ms: Sequence[Octets],
     Qs: Sequence[BIP340PubKey],
     sigs: Sequence[SSASig],
     ec: Curve,
     hf: HashF,
+    deterministic: bool = False,
 ) -> None:
 
     batch_size = len(Qs)
@@ -470,33 +561,34 @@ def _batch_verify(
     # BIP340 is defined for curves whose field prime p = 3 % 4
     ec.require_p_ThreeModFour()
 
+    hsize = hf().digest_size
+    hms = [bytes_from_octets(m, hsize) for m in ms]
+    Q_points = [point_from_bip340pubkey(Q, ec) for Q in Qs]
+    x_Qs = [Q[0] for Q in Q_points]
+    rs_sigs = [deserialize(sig, ec) for sig in sigs]
+
+    if deterministic:
+        weights = _batch_weights(hms, x_Qs, rs_sigs, ec, hf)
+    else:
+        # a in [1, n-1]
+        # randomly generated independently for each run
+        # of the batch verification algorithm
+        weights = [1] + [1 + secrets.randbelow(ec.n - 1) for _ in rs_sigs[1:]]
+
     t = 0
     scalars: List[int] = list()
     points: List[JacPoint] = list()
-    for i, (m, Q, sig) in enumerate(zip(ms, Qs, sigs)):
-        m = bytes_from_octets(m, hf().digest_size)
-
-        r, s = deserialize(sig, ec)
+    for m, (x_Q, y_Q), (r, s), a in zip(hms, Q_points, rs_sigs, weights):
         KJ = r, ec.y_quadratic_residue(r, True), 1
-
-        x_Q, y_Q = point_from_bip340pubkey(Q, ec)
         QJ = x_Q, y_Q, 1
-
         c = _challenge(m, x_Q, r, ec, hf)
-
-        # a in [1, n-1]
-        # deterministically generated using a CSPRNG seeded by a
-        # cryptographic hash (e.g., SHA256) of all inputs of the
-        # algorithm, or randomly generated independently for each
-        # run of the batch verification algorithm
-        a = 1 if i == 0 else 1 + secrets.randbelow(ec.n - 1)
         scalars.append(a)
         points.append(KJ)
         scalars.append(a * c % ec.n)
         points.append(QJ)
         t += a * s
 
-    TJ = _mult(t, ec.GJ, ec)
+    TJ = _mult_generator(t, ec)
     RHSJ = _multi_mult(scalars, points, ec)
 
     # return T == RHS, checked in Jacobian coordinates
@@ -516,13 +608,87 @@ def batch_verify(
     sig: Sequence[SSASig],
     ec: Curve = secp256k1,
     hf: HashF = sha256,
+    deterministic: bool = False,
 ) -> bool:
-    """Batch verification of BIP340 signatures."""
+    """Batch verification of BIP340 signatures.
+
+    The batch weights are random,
+    or derived from the hash of all the inputs if deterministic.
+    """
 
     # try/except wrapper for the Errors raised by _batch_verify
     try:
-        _batch_verify(m, Q, sig, ec, hf)
+        _batch_verify(m, Q, sig, ec, hf, deterministic)
     except Exception:
         return False
     else:
         return True
+
+
+def invalid_indexes(
+    ms: Sequence[Octets],
+    Qs: Sequence[BIP340PubKey],
+    sigs: Sequence[SSASig],
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
+    deterministic: bool = False,
+) -> List[int]:
+    """Return the indexes of the invalid BIP340 signatures in the batch.
+
+    Failing batches are bisected:
+    a few invalid signatures are found with a few batch verifications
+    instead of verifying all the signatures one at a time.
+    Batches smaller than _MIN_BATCH_SIZE are verified
+    one signature at a time, as batching them would not be faster.
+    """
+
+    batch_size = len(Qs)
+    if len(ms) != batch_size or len(sigs) != batch_size:
+        # raise the appropriate error
+        _batch_verify(ms, Qs, sigs, ec, hf)
+
+    def bisect(start: int, stop: int, failing: bool = False) -> List[int]:
+        if stop - start < _MIN_BATCH_SIZE:
+            return [
+                i
+                for i in range(start, stop)
+                if not _verify(ms[i], Qs[i], sigs[i], ec, hf)
+            ]
+        batch = ms[start:stop], Qs[start:stop], sigs[start:stop]
+        if not failing and batch_verify(*batch, ec, hf, deterministic):
+            return []
+        middle = (start + stop) // 2
+        left = bisect(start, middle)
+        # if the left half is valid, then the right one must be failing
+        return left + bisect(middle, stop, not left)
+
+    return bisect(0, batch_size) if batch_size else []
+
+
+def stream_invalid_indexes(
+    items: Iterable[Tuple[Octets, BIP340PubKey, SSASig]],
+    ec: Curve = secp256k1,
+    hf: HashF = sha256,
+    deterministic: bool = False,
+    chunk_size: int = _CHUNK_SIZE,
+) -> Iterator[int]:
+    """Yield the indexes of the invalid BIP340 signatures in the stream.
+
+    The (message, public key, signature) items are consumed
+    in chunks of chunk_size items, batch verified one chunk at a time:
+    memory usage is bounded regardless of the stream length.
+    See invalid_indexes.
+    """
+
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive: {chunk_size}")
+    it = iter(items)
+    offset = 0
+    while True:
+        chunk = list(itertools.islice(it, chunk_size))
+        if not chunk:
+            return
+        ms, Qs, sigs = zip(*chunk)
+        for i in invalid_indexes(ms, Qs, sigs, ec, hf, deterministic):
+            yield offset + i
+        offset += len(chunk)
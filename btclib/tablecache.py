@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Persistent cache of precomputed fixed-base tables.
+
+The fixed-window tables of multiples of a point
+(see curvegroup.multiples_fixwind) are stored on disk,
+keyed by curve parameters, point, and window size.
+They are loaded using mmap, so that the table pages are shared
+read-only among all the processes using them,
+with table points decoded only when accessed.
+
+The table file format is:
+
+- 8 bytes magic
+- 32 bytes key, the SHA256 of curve parameters, point, and window size
+- 1 byte window size w
+- 2 bytes (big endian) byte-length of the field elements
+- 2 bytes (big endian) number of table rows
+- 32 bytes SHA256 of the payload
+- payload: for each row, the 2^w-1 non-infinity entries
+  as x and y affine coordinates (y=0 for the infinity point)
+
+A missing or corrupted file is (re)generated;
+if the cache directory is not writable,
+the table is just built in memory.
+As the checksum does not prevent a planted file from being used,
+at load time all the table entries are checked to be
+the expected multiples of the point.
+
+The cache directory is given by the BTCLIB_CACHE_DIR
+environment variable, defaulting to the btclib subdirectory
+of XDG_CACHE_HOME (or ~/.cache);
+if BTCLIB_CACHE_DIR is set to an empty string,
+the persistent cache is disabled.
+"""
+
+import hashlib
+import mmap
+import os
+import tempfile
+from typing import List, Optional, Sequence, Union
+
+from .alias import INF, INFJ, JacPoint, Point
+from .curvegroup import CurveGroup, _jac_from_aff, multiples_fixwind
+
+_MAGIC = b"btclibT1"
+_HEADER_SIZE = len(_MAGIC) + 32 + 1 + 2 + 2 + 32
+
+
+def cache_dir() -> Optional[str]:
+    "Return the persistent cache directory, None if disabled."
+
+    directory = os.environ.get("BTCLIB_CACHE_DIR")
+    if directory is not None:
+        return directory or None
+    xdg_cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(xdg_cache, "btclib")
+
+
+def _table_key(Q: Point, ec: CurveGroup, w: int, rows: int) -> bytes:
+    "Return the key identifying the table of Q multiples."
+
+    ints = [ec.p, ec._a, ec._b, Q[0], Q[1], w, rows]
+    data = b"".join(i.to_bytes(ec.psize, byteorder="big") for i in ints)
+    return hashlib.sha256(_MAGIC + data).digest()
+
+
+class _MappedRow(Sequence[JacPoint]):
+    "Row of a memory-mapped table, decoding points on access."
+
+    def __init__(self, buf: mmap.mmap, offset: int, size: int, psize: int) -> None:
+        self._buf = buf
+        self._offset = offset
+        self._size = size
+        self._psize = psize
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, i):  # type: ignore
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._size))]
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError(f"table index out of range: {i}")
+        if i == 0:
+            return INFJ
+        start = self._offset + (i - 1) * 2 * self._psize
+        mid = start + self._psize
+        x = int.from_bytes(self._buf[start:mid], byteorder="big")
+        y = int.from_bytes(self._buf[mid : mid + self._psize], byteorder="big")
+        return (x, y, 1) if y else INFJ
+
+
+class MappedTable(Sequence[Sequence[JacPoint]]):
+    """Fixed-window table of point multiples, memory-mapped from file.
+
+    It is the same table as returned by multiples_fixwind,
+    with all points normalized to affine coordinates (Z=1).
+    """
+
+    def __init__(self, filename: str, key: bytes, w: int, psize: int) -> None:
+
+        with open(filename, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if len(buf) < _HEADER_SIZE:
+                raise ValueError(f"truncated table header: {len(buf)}")
+            offset = len(_MAGIC)
+            if buf[:offset] != _MAGIC:
+                raise ValueError("invalid table magic")
+            if buf[offset : offset + 32] != key:
+                raise ValueError("table key mismatch")
+            offset += 32
+            if buf[offset] != w:
+                raise ValueError(f"table window mismatch: {buf[offset]}")
+            offset += 1
+            if int.from_bytes(buf[offset : offset + 2], "big") != psize:
+                raise ValueError("table field size mismatch")
+            offset += 2
+            rows = int.from_bytes(buf[offset : offset + 2], "big")
+            offset += 2
+            row_size = (2 ** w - 1) * 2 * psize
+            if len(buf) != _HEADER_SIZE + rows * row_size:
+                raise ValueError(f"invalid table size: {len(buf)}")
+            digest = buf[offset : offset + 32]
+            if hashlib.sha256(buf[_HEADER_SIZE:]).digest() != digest:
+                raise ValueError("table checksum mismatch")
+        except ValueError:
+            buf.close()
+            raise
+
+        self._buf = buf
+        self.w = w
+        self.filename = filename
+        self._rows = [
+            _MappedRow(buf, _HEADER_SIZE + j * row_size, 2 ** w, psize)
+            for j in range(rows)
+        ]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, i):  # type: ignore
+        return self._rows[i]
+
+
+def _is_sum(A: JacPoint, B: JacPoint, C: JacPoint, ec: CurveGroup) -> bool:
+    """Return True if C = A + B, the points being on curve.
+
+    In the general case of affine points with distinct x-coordinates,
+    C = A + B if and only if A, B, and -C are collinear:
+    no modular inversion is needed.
+    """
+
+    if A[2] == B[2] == C[2] == 1 and len({A[0], B[0], C[0]}) == 3:
+        lhs = (B[1] - A[1]) * (C[0] - A[0])
+        rhs = (-C[1] - A[1]) * (B[0] - A[0])
+        return (lhs - rhs) % ec.p == 0
+    return ec._jac_equality(C, ec._add_jac(A, B))
+
+
+def _validate_table(T: MappedTable, Q: Point, ec: CurveGroup) -> None:
+    """Check the memory-mapped table of Q multiples.
+
+    All the table points must be on curve.
+    The first row must start with Q, each other row with
+    the sum of the last and first entries of the previous row;
+    each row entry must be the sum of the previous entry
+    and the first one of the row.
+    As all entries are checked, a planted file cannot
+    provide wrong multiples (e.g. for the generator G,
+    used with secret scalars).
+    """
+
+    prev: List[JacPoint] = []
+    for row in T:
+        points = list(row)
+        for P in points:
+            if not ec.is_on_curve((P[0], P[1]) if P[2] else INF):
+                raise ValueError("table point not on curve")
+        if prev:
+            if not _is_sum(prev[-1], prev[1], points[1], ec):
+                raise ValueError("table point mismatch")
+        elif points[1] != (Q[0], Q[1], 1):
+            raise ValueError("table point mismatch")
+        for k in range(2, len(points)):
+            if not _is_sum(points[k - 1], points[1], points[k], ec):
+                raise ValueError("table point mismatch")
+        prev = points
+
+
+def _load_table(
+    filename: str, key: bytes, Q: Point, ec: CurveGroup, w: int
+) -> MappedTable:
+    "Return the validated memory-mapped table of Q multiples."
+
+    T = MappedTable(filename, key, w, ec.psize)
+    try:
+        _validate_table(T, Q, ec)
+    except ValueError:
+        T._buf.close()
+        raise
+    return T
+
+
+def _write_table(
+    filename: str, key: bytes, T: Sequence[Sequence[JacPoint]], ec: CurveGroup, w: int
+) -> None:
+    "Write the table to file, atomically replacing any previous one."
+
+    points = ec._aff_from_jac_batch([P for row in T for P in row[1:]])
+    payload = b"".join(
+        x.to_bytes(ec.psize, byteorder="big") + y.to_bytes(ec.psize, byteorder="big")
+        for x, y in points
+    )
+    header = _MAGIC + key + bytes([w])
+    header += ec.psize.to_bytes(2, byteorder="big")
+    header += len(T).to_bytes(2, byteorder="big")
+    header += hashlib.sha256(payload).digest()
+
+    directory = os.path.dirname(filename)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmpname = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header + payload)
+        # read-only table, to be shared among processes
+        os.chmod(tmpname, 0o444)
+        os.replace(tmpname, filename)
+    except OSError:
+        os.remove(tmpname)
+        raise
+
+
+def table_filename(Q: Point, ec: CurveGroup, w: int, directory: str) -> str:
+    "Return the cache file name for the fixed-window table of Q multiples."
+
+    rows = (ec.psize * 8) // w + 1
+    key = _table_key(Q, ec, w, rows)
+    return os.path.join(directory, f"fixwind_w{w}_{key[:16].hex()}.bin")
+
+
+def fixwind_table(
+    Q: Point, ec: CurveGroup, w: int, directory: Optional[str] = None
+) -> Union[MappedTable, List[List[JacPoint]]]:
+    """Return the fixed-window table of Q multiples.
+
+    The table is memory-mapped from the persistent cache,
+    (re)generating the cache file if missing or corrupted;
+    if the cache is disabled or not writable,
+    the table is built in memory.
+    The default cache directory is given by cache_dir().
+
+    The input point is assumed to be on curve.
+    """
+
+    if w <= 0:
+        raise ValueError(f"non positive w: {w}")
+
+    if directory is None:
+        directory = cache_dir()
+    QJ = _jac_from_aff(Q)
+    if directory is None:
+        return multiples_fixwind(QJ, ec, w)
+
+    rows = (ec.psize * 8) // w + 1
+    key = _table_key(Q, ec, w, rows)
+    filename = table_filename(Q, ec, w, directory)
+    try:
+        return _load_table(filename, key, Q, ec, w)
+    except (OSError, ValueError):
+        pass
+
+    T = multiples_fixwind(QJ, ec, w)
+    try:
+        _write_table(filename, key, T, ec, w)
+        return _load_table(filename, key, Q, ec, w)
+    except (OSError, ValueError):
+        return T
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""Benchmark of BIP340 batch verification.
+
+It reports the per-signature cost of ssa batch verification
+as the batch size grows, compared to one at a time verification:
+
+python -m btclib.tests.bench_batch_verify [max_batch_size]
+
+It is not collected by pytest.
+"""
+
+import secrets
+import sys
+import time
+from functools import partial
+from hashlib import sha256
+from typing import Callable, List, Tuple
+
+from btclib import ssa
+from btclib.curve import mult
+
+
+def _best_time(f: Callable[[], object], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _verify_one_by_one(
+    ms: List[bytes], Qs: List[int], sigs: List[Tuple[int, int]]
+) -> List[bool]:
+    return [ssa._verify(m, Q, sig) for m, Q, sig in zip(ms, Qs, sigs)]
+
+
+def bench(max_batch_size: int = 512) -> List[Tuple[int, float, float, float]]:
+    """Return the per-signature costs (in microseconds) by batch size.
+
+    For each batch size: one at a time verification,
+    batch verification with random weights,
+    and batch verification with deterministic weights.
+    """
+
+    ms, Qs, sigs = [], [], []
+    for i in range(max_batch_size):
+        ms.append(sha256(f"message {i}".encode()).digest())
+        q = 1 + secrets.randbelow(ssa.secp256k1.n - 1)
+        Qs.append(mult(q)[0])
+        sigs.append(ssa._sign(ms[-1], q))
+
+    results = []
+    size = 1
+    while size <= max_batch_size:
+        batch = ms[:size], Qs[:size], sigs[:size]
+        single = _best_time(partial(_verify_one_by_one, *batch))
+        rand = _best_time(partial(ssa.batch_verify, *batch))
+        det = _best_time(partial(ssa.batch_verify, *batch, deterministic=True))
+        results.append((size, 1e6 * single / size, 1e6 * rand / size, 1e6 * det / size))
+        size *= 2
+    return results
+
+
+if __name__ == "__main__":  # pragma: no cover
+    max_batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    print(f"{'batch size':>10} {'single':>10} {'random':>10} {'determ.':>10}")
+    print(f"{'':>10} {'(us/sig)':>10} {'(us/sig)':>10} {'(us/sig)':>10}")
+    for size, single, rand, det in bench(max_batch_size):
+        print(f"{size:>10} {single:>10.0f} {rand:>10.0f} {det:>10.0f}")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"""pytest configuration shared by the btclib tests.
+
+The tests must not write fixed-base tables and autotuning selections
+to the user cache directory: BTCLIB_CACHE_DIR points to
+a temporary directory for the whole test session.
+It is set at configuration time, as some test modules
+already multiply the generator at import (collection) time.
+"""
+
+import os
+import shutil
+import tempfile
+from typing import Iterator, Optional
+
+import pytest
+from _pytest.config import Config
+
+_PREVIOUS_CACHE_DIR: Optional[str] = None
+_CACHE_DIR = ""
+
+
+def pytest_configure(config: Config) -> None:
+    global _PREVIOUS_CACHE_DIR, _CACHE_DIR
+    _PREVIOUS_CACHE_DIR = os.environ.get("BTCLIB_CACHE_DIR")
+    _CACHE_DIR = tempfile.mkdtemp(prefix="btclib_cache_")
+    os.environ["BTCLIB_CACHE_DIR"] = _CACHE_DIR
+
+
+def pytest_unconfigure(config: Config) -> None:
+    if _PREVIOUS_CACHE_DIR is None:
+        os.environ.pop("BTCLIB_CACHE_DIR", None)
+    else:
+        os.environ["BTCLIB_CACHE_DIR"] = _PREVIOUS_CACHE_DIR
+    shutil.rmtree(_CACHE_DIR, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def btclib_cache_dir() -> Iterator[str]:
+    "Point the persistent cache to the temporary directory of the session."
+
+    os.environ["BTCLIB_CACHE_DIR"] = _CACHE_DIR
+    yield _CACHE_DIR
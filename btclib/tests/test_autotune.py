@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.autotune` module."
+
+import json
+import secrets
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from btclib import autotune
+from btclib.curve import Curve, _mult_generator, secp256k1
+from btclib.curvegroup import _double_mult_shamir, _double_mult_vartime, _mult
+from btclib.tests.test_curve import low_card_curves
+
+
+def _copy(ec: Curve) -> Curve:
+    "Return a copy of the curve, not to alter the shared ones."
+    return Curve(ec.p, ec._a, ec._b, ec.G, ec.n, ec.h, False, trusted=True)
+
+
+def test_candidates() -> None:
+    ec = _copy(secp256k1)
+    mult_candidates = autotune.candidates(ec, "mult")
+    assert ("glv", 4) in mult_candidates
+    assert ("mont_ladder", 0) in mult_candidates
+    # no GLV endomorphism for a!=0 curves
+    ec2 = _copy(low_card_curves["ec23_31"])
+    assert all(algo != "glv" for algo, _ in autotune.candidates(ec2, "mult"))
+
+    m = secrets.randbelow(ec.n)
+    exp = _mult(m, ec.GJ, ec)
+    for algo, w in mult_candidates:
+        autotune.pin(ec, "mult", algo, w)
+        assert autotune.tuned(ec) == {"mult": (algo, w)}
+        assert ec._jac_equality(_mult(m, ec.GJ, ec), exp)
+
+    for _, w in autotune.candidates(ec, "fixed_base"):
+        autotune.pin(ec, "fixed_base", "fixed_base", w)
+        assert ec._GT_w == w
+        assert ec._jac_equality(_mult_generator(m, ec), exp)
+
+    u = secrets.randbelow(ec.n)
+    exp = _double_mult_shamir(u, ec.GJ, m, ec.GJ, ec)
+    for _, w in autotune.candidates(ec, "verify"):
+        autotune.pin(ec, "verify", "wnaf", w)
+        assert ec._vartime_w == w
+        assert ec._jac_equality(_double_mult_vartime(u, ec.GJ, m, ec.GJ, ec), exp)
+
+    autotune.reset(ec)
+    assert autotune.tuned(ec) == {}
+    assert ec._mult_func is None
+    assert ec._vartime_w is None
+
+    with pytest.raises(ValueError, match="unknown use case: "):
+        autotune.candidates(ec, "notausecase")
+    with pytest.raises(ValueError, match="unknown use case: "):
+        autotune.pin(ec, "notausecase", "fixed_window", 4)
+    with pytest.raises(ValueError, match="unknown use case: "):
+        autotune.reset(ec, ["notausecase"])
+    with pytest.raises(ValueError, match="unknown mult algorithm: "):
+        autotune.pin(ec, "mult", "notanalgo", 4)
+    with pytest.raises(ValueError, match="invalid window size for fixed_window: "):
+        autotune.pin(ec, "mult", "fixed_window", 0)
+    with pytest.raises(ValueError, match="invalid fixed_base choice: "):
+        autotune.pin(ec, "fixed_base", "fixed_base", 1)
+    with pytest.raises(ValueError, match="invalid verify choice: "):
+        autotune.pin(ec, "verify", "fixed_window", 4)
+    assert autotune.tuned(ec) == {}
+
+
+def test_autotune(tmp_path: Path) -> None:
+    ec = _copy(low_card_curves["ec23_31"])
+    directory = str(tmp_path)
+    result = autotune.autotune(ec, number=1, repeat=1, directory=directory)
+    assert set(result) == set(autotune.USE_CASES)
+    assert autotune.tuned(ec) == result
+    for use_case, choice in result.items():
+        assert choice in autotune.candidates(ec, use_case)
+
+    # the selections are persisted
+    ec2 = _copy(ec)
+    assert autotune.load(ec2, directory)
+    assert autotune.tuned(ec2) == result
+    # other curves are not affected
+    ec3 = _copy(low_card_curves["ec13_19"])
+    assert not autotune.load(ec3, directory)
+    assert autotune.tuned(ec3) == {}
+
+    # a pinned choice can be persisted too
+    autotune.pin(ec3, "mult", "mont_ladder", persist=True, directory=directory)
+    ec4 = _copy(ec3)
+    assert autotune.load(ec4, directory)
+    assert autotune.tuned(ec4) == {"mult": ("mont_ladder", 0)}
+    ec4 = _copy(ec)
+    assert autotune.load(ec4, directory)
+    assert autotune.tuned(ec4) == result
+
+    autotune.autotune(ec, ["verify"], number=1, repeat=1, persist=False)
+
+    with pytest.raises(ValueError, match="number must be positive: "):
+        autotune.autotune(ec, number=0)
+    with pytest.raises(ValueError, match="repeat must be positive: "):
+        autotune.autotune(ec, repeat=0)
+
+
+def test_persistence(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    ec = _copy(low_card_curves["ec23_31"])
+    autotune.pin(ec, "mult", "fixed_window", 3)
+    autotune.pin(ec, "verify", "wnaf", 4)
+
+    # persistence disabled
+    monkeypatch.setenv("BTCLIB_CACHE_DIR", "")
+    assert not autotune.save(ec)
+    assert not autotune.load(ec)
+
+    # default directory
+    monkeypatch.setenv("BTCLIB_CACHE_DIR", str(tmp_path))
+    assert autotune.save(ec)
+    filename = tmp_path / "autotune.json"
+    assert filename.exists()
+    ec2 = _copy(ec)
+    assert autotune.load(ec2)
+    assert autotune.tuned(ec2) == autotune.tuned(ec)
+
+    # variable-time mult algorithms are never applied
+    for algo in ("w_NAF", "sliding_window", "base_3"):
+        with pytest.raises(ValueError, match="unknown mult algorithm: "):
+            autotune.pin(ec, "mult", algo, 3)
+    data = json.loads(filename.read_text())
+    key = list(data)[0]
+    data[key]["mult"] = ["w_NAF", 3]
+    filename.write_text(json.dumps(data))
+    ec2 = _copy(ec)
+    assert autotune.load(ec2)
+    assert "mult" not in autotune.tuned(ec2)
+    assert ec2._mult_func is None
+
+    # invalid selections are ignored
+    data = json.loads(filename.read_text())
+    key = list(data)[0]
+    data[key]["mult"] = ["notanalgo", 3]
+    data[key]["fixed_base"] = "notachoice"
+    filename.write_text(json.dumps(data))
+    ec2 = _copy(ec)
+    assert autotune.load(ec2)
+    assert autotune.tuned(ec2) == {"verify": ("wnaf", 4)}
+
+    # corrupted file
+    filename.write_text("{notjson")
+    assert not autotune.load(_copy(ec))
+    filename.write_text("[]")
+    assert not autotune.load(_copy(ec))
+    assert autotune.save(ec)
+    assert autotune.load(_copy(ec))
+
+    # not writable directory
+    not_a_dir = tmp_path / "not_a_dir"
+    not_a_dir.write_text("")
+    assert not autotune.save(ec, str(not_a_dir))
@@ -25,6 +25,7 @@ from btclib.bip32 import (
     bytes_from_bip32_path,
     crack_prvkey,
     derive,
+    derive_children,
     derive_from_account,
     indexes_from_bip32_path,
     mxprv_from_bip39_mnemonic,
@@ -291,6 +292,37 @@ def test_derive() -> None:
     assert derive(rootxprv, "m").decode("ascii") == rootxprv
 
 
+def test_derive_children() -> None:
+    rootxprv = "xprv9s21ZrQH143K2ZP8tyNiUtgoezZosUkw9hhir2JFzDhcUWKz8qFYk3cxdgSFoCMzt8E2Ubi1nXw71TLhwgCfzqFHfM5Snv4zboSebePRmLS"
+    xprv = derive(rootxprv, "m/44h/0h/0h/0")
+    xpub = xpub_from_xprv(xprv)
+
+    indexes = list(range(20)) + [0x7FFFFFFF]
+    exp = [derive(xpub, index) for index in indexes]
+    assert derive_children(xpub, indexes) == exp
+    assert derive_children(BIP32KeyData.deserialize(xpub), indexes) == exp
+    assert derive_children(xpub, []) == []
+
+    # private parent key
+    indexes.append(0x80000000)
+    exp = [derive(xprv, index) for index in indexes]
+    assert derive_children(xprv, indexes) == exp
+
+    err_msg = "hardened derivation from public key"
+    with pytest.raises(ValueError, match=err_msg):
+        derive_children(xpub, [0, 0x80000000])
+
+    for xkey in (xprv, xpub):
+        with pytest.raises(ValueError, match="negative index: "):
+            derive_children(xkey, [0, -1])
+        with pytest.raises(ValueError, match="index too high: "):
+            derive_children(xkey, [0, 0x100000000])
+
+    xpub = xpub_from_xprv(derive(rootxprv, "m" + 255 * "/0"))
+    with pytest.raises(ValueError, match="final depth greater than 255: "):
+        derive_children(xpub, [0])
+
+
 def test_derive_exceptions() -> None:
     # root key, zero depth
     rootmxprv = "xprv9s21ZrQH143K3QTDL4LXw2F7HEK3wJUD2nW2nRk4stbPy6cq3jPPqjiChkVvvNKmPGJxWUtg6LnF5kejMRNNU3TGtRBeJgk33yuGBxrMPHi"
@@ -10,14 +10,35 @@
 
 "Tests for `btclib.curve` module."
 
+import pickle
 import secrets
 from typing import Dict
 
 import pytest
 
 from btclib.alias import INF, INFJ
-from btclib.curve import CURVES, Curve, double_mult, mult, multi_mult, secp256k1
-from btclib.curvegroup import _jac_from_aff
+from btclib.curve import (
+    CURVES,
+    NIST,
+    Brainpool,
+    Curve,
+    SEC2v1,
+    SEC2v2,
+    _generator_wnaf_tables,
+    _mult_generator,
+    add_jac,
+    batch_mult,
+    double_mult,
+    double_mult_jac,
+    jac_from_point,
+    mult,
+    mult_jac,
+    multi_mult,
+    point_from_jac,
+    points_from_jac,
+    secp256k1,
+)
+from btclib.curvegroup import CurveGroup, _jac_from_aff, _mult
 from btclib.numbertheory import mod_sqrt
 from btclib.pedersen import second_generator
 
@@ -98,6 +119,45 @@ def test_exceptions() -> None:
         Curve(11, 2, 7, (6, 9), 7, 2, True)
 
 
+def test_curve_registries() -> None:
+
+    assert len(SEC2v1) == len(set(SEC2v1))
+    assert set(SEC2v2) < set(SEC2v1)
+    assert set(CURVES) == set(SEC2v1) | set(NIST) | set(Brainpool)
+    assert len(CURVES) == len(list(CURVES.values()))
+
+    # curves are shared among registries
+    assert SEC2v1["secp256k1"] is SEC2v2["secp256k1"] is CURVES["secp256k1"]
+    assert CURVES["secp256k1"] is secp256k1
+    assert NIST["nistp256"] is CURVES["nistp256"]
+
+    with pytest.raises(KeyError):
+        CURVES["secp256k2"]  # pylint: disable=pointless-statement
+
+    # already built curves are not leaked across registries
+    assert "secp256k1" in CURVES
+    assert "secp256k1" not in NIST
+    assert "secp256k1" not in Brainpool
+    assert "nistp256" not in SEC2v1
+    assert NIST.get("secp256k1") is None
+    with pytest.raises(KeyError):
+        NIST["secp256k1"]  # pylint: disable=pointless-statement
+    with pytest.raises(KeyError):
+        Brainpool["nistp256"]  # pylint: disable=pointless-statement
+    assert len(NIST) == len(list(NIST.values())) == len(NIST.keys())
+
+    # the trusted fast path builds the same curves
+    for ec_name, ec in CURVES.items():
+        ec2 = Curve(ec.p, ec._a, ec._b, ec.G, ec.n, ec.h, True, ec_name)
+        assert repr(ec2) == repr(ec)
+        assert ec2.name == ec.name == ec_name
+        assert ec2._glv == ec._glv
+
+    # the trusted fast path skips the expensive checks
+    Curve(13, 0, 2, (1, 9), 17, 1, False, trusted=True)
+    Curve(11, 2, 7, (6, 9), 7, 2, True, trusted=True)
+
+
 def test_aff_jac_conversions() -> None:
     for ec in all_curves.values():
 
@@ -119,6 +179,65 @@ def test_aff_jac_conversions() -> None:
             ec.has_square_y("notapoint")  # type: ignore
 
 
+def test_aff_from_jac_batch() -> None:
+    for ec in all_curves.values():
+        qs = list(range(20)) + [ec.n - 2, ec.n - 1, ec.n]
+        QJs = [_mult(q, ec.GJ, ec) for q in qs]
+        assert ec._aff_from_jac_batch(QJs) == [ec._aff_from_jac(QJ) for QJ in QJs]
+        assert ec._aff_from_jac_batch([INFJ, INFJ]) == [INF, INF]
+        assert ec._aff_from_jac_batch([]) == []
+
+        QJs_norm = ec._normalize_jac_batch(QJs)
+        for QJ, QJ_norm in zip(QJs, QJs_norm):
+            assert ec._jac_equality(QJ, QJ_norm)
+            assert QJ_norm[2] in (0, 1)
+
+
+def test_batch_mult() -> None:
+    for ec in all_curves.values():
+        qs = [0, 1, ec.n - 1, ec.n, 2 * ec.n + 2, secrets.randbits(ec.nlen + 8)]
+        assert batch_mult(qs, None, ec) == [mult(q, ec.G, ec) for q in qs]
+        assert batch_mult(qs, ec.G, ec) == [mult(q, ec.G, ec) for q in qs]
+        H = second_generator(ec)
+        assert batch_mult(qs, H, ec) == [mult(q, H, ec) for q in qs]
+        assert batch_mult([], H, ec) == []
+
+
+def test_jacobian_pipeline() -> None:
+    for ec in all_curves.values():
+        H = second_generator(ec)
+        HJ = jac_from_point(H, ec)
+        assert HJ == _jac_from_aff(H)
+        assert point_from_jac(HJ, ec) == H
+        assert jac_from_point(INF, ec) == INFJ
+        assert point_from_jac(INFJ, ec) == INF
+
+        u, v = secrets.randbelow(ec.n), secrets.randbelow(ec.n)
+        assert point_from_jac(mult_jac(u, HJ, ec), ec) == mult(u, H, ec)
+        assert point_from_jac(mult_jac(v, None, ec), ec) == mult(v, ec.G, ec)
+        assert point_from_jac(mult_jac(-v, ec.GJ, ec), ec) == mult(-v, ec.G, ec)
+        sum_HG = ec.add(H, ec.G)
+        assert point_from_jac(add_jac(HJ, ec.GJ, ec), ec) == sum_HG
+
+        exp = double_mult(u, H, v, ec.G, ec)
+        for vartime in (False, True):
+            RJ = double_mult_jac(u, HJ, v, ec.GJ, ec, vartime)
+            assert point_from_jac(RJ, ec) == exp
+            RJ = double_mult_jac(v, ec.GJ, u, HJ, ec, vartime)
+            assert point_from_jac(RJ, ec) == exp
+            RJ = double_mult_jac(u, ec.GJ, -u, ec.GJ, ec, vartime)
+            assert point_from_jac(RJ, ec) == INF
+        K = mult(2, H, ec)
+        RJ = double_mult_jac(u, HJ, v, jac_from_point(K, ec), ec, True)
+        assert point_from_jac(RJ, ec) == double_mult(u, H, v, K, ec)
+
+        QJs = [mult_jac(q, HJ, ec) for q in range(5)]
+        assert points_from_jac(QJs, ec) == [mult(q, H, ec) for q in range(5)]
+
+    with pytest.raises(ValueError, match="point not on curve"):
+        jac_from_point((1, 1))
+
+
 def test_add_double_aff() -> None:
     "Test self-consistency of add and double in affine coordinates."
     for ec in all_curves.values():
@@ -164,6 +283,38 @@ def test_add_double_jac() -> None:
         # add INF and "minus" INF
         assert ec._jac_equality(ec._add_jac(INFJ, ec.negate_jac(INFJ)), INFJ)
 
+        # mixed addition
+        assert ec._jac_equality(ec._add_jac_aff(ec.GJ, INF), ec.GJ)
+        assert ec._jac_equality(ec._add_jac_aff(INFJ, ec.G), ec.GJ)
+        assert ec._jac_equality(ec._add_jac_aff(INFJ, INF), INFJ)
+        # non-canonical Jacobian infinity point
+        assert ec._jac_equality(ec._add_jac_aff((1, 1, 0), ec.G), ec.GJ)
+        assert ec._jac_equality(ec._add_jac_aff(ec.GJ, ec.G), GJ2)
+        assert ec._jac_equality(ec._add_jac_aff(ec.GJ, ec.negate(ec.G)), INFJ)
+
+
+def test_double_jac_specialized() -> None:
+    "Test the a=0 and a=-3 doubling formulas against the generic one."
+    assert secp256k1._double_jac == secp256k1._double_jac_a0
+    assert CURVES["secp256r1"]._double_jac == CURVES["secp256r1"]._double_jac_a3
+    assert "_double_jac" not in vars(CURVES["bpp256r1"])
+
+    for ec in all_curves.values():
+        q = 1 + secrets.randbelow(ec.n - 1)
+        QJ = _mult(q, ec.GJ, ec)
+        # non-normalized Jacobian point
+        QJ = ec._add_jac(ec._double_jac(QJ), ec.negate_jac(QJ))
+        for RJ in (ec.GJ, QJ, INFJ):
+            exp = CurveGroup._double_jac(ec, RJ)
+            assert ec._double_jac_a0(RJ) == exp or ec._a != 0
+            assert ec._double_jac_a3(RJ) == exp or ec._a != ec.p - 3
+            assert ec._double_jac(RJ) == exp
+
+    # a=-3 low cardinality curve
+    ec = Curve(13, 10, 1, (0, 1), 19, 1, False)
+    assert ec._double_jac == ec._double_jac_a3
+    assert ec._double_jac(ec.GJ) == CurveGroup._double_jac(ec, ec.GJ)
+
 
 def test_add_double_aff_jac() -> None:
     "Test consistency between affine and Jacobian add/double methods."
@@ -178,6 +329,8 @@ def test_add_double_aff_jac() -> None:
         R = ec._add_aff(Q, ec.G)
         RJ = ec._add_jac(QJ, ec.GJ)
         assert R == ec._aff_from_jac(RJ)
+        RJ = ec._add_jac_aff(ec._double_jac(ec.GJ), Q)
+        assert ec._add_aff(Q, ec._double_aff(ec.G)) == ec._aff_from_jac(RJ)
 
         # double Q
         R = ec._double_aff(Q)
@@ -319,6 +472,58 @@ def test_symmetry() -> None:
         ec.y_quadratic_residue(x_Q, 2)
 
 
+def test_require_valid_x() -> None:
+    for ec in low_card_curves.values():
+        for x in range(ec.p):
+            try:
+                ec.y(x)
+            except ValueError:
+                with pytest.raises(ValueError, match="invalid x-coordinate"):
+                    ec.require_valid_x(x)
+            else:
+                ec.require_valid_x(x)
+        with pytest.raises(ValueError, match="x-coordinate not in 0..p-1: "):
+            ec.require_valid_x(ec.p)
+    secp256k1.require_valid_x(secp256k1.G[0])
+    with pytest.raises(ValueError, match="invalid x-coordinate"):
+        secp256k1.require_valid_x(5)
+
+
+def test_mult_generator() -> None:
+    for ec in all_curves.values():
+        assert ec._jac_equality(_mult_generator(0, ec), INFJ)
+        assert ec._jac_equality(_mult_generator(1, ec), ec.GJ)
+        assert ec._jac_equality(_mult_generator(ec.n, ec), INFJ)
+        assert ec._jac_equality(_mult_generator(ec.n + 1, ec), ec.GJ)
+        # the fixed-base table has been built at first use
+        assert ec._GT
+
+        # just a random scalar, not reduced mod n
+        q = secrets.randbits(ec.nlen + 8)
+        assert ec._jac_equality(_mult_generator(q, ec), _mult(q % ec.n, ec.GJ, ec))
+        assert mult(q, ec=ec) == ec._aff_from_jac(_mult(q % ec.n, ec.GJ, ec))
+
+        with pytest.raises(ValueError, match="negative m: "):
+            _mult_generator(-1, ec)
+
+
+def test_pickle() -> None:
+    for ec in (secp256k1, CURVES["secp256r1"]):
+        # generator tables already built
+        assert mult(3, ec=ec) == ec.add(ec.add(ec.G, ec.G), ec.G)
+        assert ec._GT and _generator_wnaf_tables(ec)
+        ec2 = pickle.loads(pickle.dumps(ec))
+        assert repr(ec2) == repr(ec)
+        # generator tables are not pickled, being rebuilt at first use
+        assert not ec2._GT and not ec2._GT_wnaf
+        assert mult(3, ec=ec2) == mult(3, ec=ec)
+        assert ec2._GT
+
+    ec = ec23_31
+    for q in range(ec.n):
+        assert ec._jac_equality(_mult_generator(q, ec), _mult(q, ec.GJ, ec))
+
+
 @pytest.mark.fifth
 def test_assorted_mult() -> None:
     ec = ec23_31
@@ -365,6 +570,9 @@ def test_assorted_mult() -> None:
             assert K1 == multi_mult([k1, 0, 0, 0], points, ec)
             assert INF == multi_mult([0, 0, 0, 0], points, ec)
 
+            # Pippenger with fixed window
+            assert K1K2K3K4 == multi_mult([k1, k2, k3, k4], points, ec, w=2)
+
     err_msg = "mismatch between number of scalars and points: "
     with pytest.raises(ValueError, match=err_msg):
         multi_mult([k1, k2, k3, k4], [ec.G, H, ec.G], ec)
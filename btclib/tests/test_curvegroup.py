@@ -15,23 +15,35 @@ import secrets
 import pytest
 
 from btclib.alias import INF, INFJ
-from btclib.curve import secp256k1
+from btclib.curve import CURVES, secp256k1
 from btclib.curvegroup import (
     _MAX_W,
     _double_mult,
+    _double_mult_glv,
+    _double_mult_shamir,
+    _double_mult_vartime,
+    _glv_split,
     _jac_from_aff,
     _mult,
     _mult_aff,
     _mult_base_3,
+    _mult_fixed_base,
     _mult_fixed_window,
     _mult_fixed_window_cached,
+    _mult_glv,
     _mult_jac,
     _mult_mont_ladder,
     _mult_recursive_aff,
     _mult_recursive_jac,
     _multi_mult,
+    _multi_mult_bos_coster,
+    _multi_mult_pippenger,
+    _signed_digits,
+    _wnaf,
+    _wnaf_tables,
     cached_multiples,
     multiples,
+    multiples_fixwind,
 )
 from btclib.pedersen import second_generator
 from btclib.tests.test_curve import all_curves, low_card_curves
@@ -235,47 +247,56 @@ def test_multiples() -> None:
     T = [INFJ, ec.GJ]
     M = multiples(ec.GJ, 2, ec)
     assert len(M) == 2
-    assert M == T
+    assert all(ec._jac_equality(P, exp_P) for P, exp_P in zip(M, T))
+    assert all(P[2] == 1 for P in M[1:])
 
     T.append(ec._double_jac(ec.GJ))
     M = multiples(ec.GJ, 3, ec)
     assert len(M) == 3
-    assert M == T
+    assert all(ec._jac_equality(P, exp_P) for P, exp_P in zip(M, T))
+    assert all(P[2] == 1 for P in M[1:])
 
     T.append(ec._add_jac(T[-1], ec.GJ))
     M = multiples(ec.GJ, 4, ec)
     assert len(M) == 4
-    assert M == T
+    assert all(ec._jac_equality(P, exp_P) for P, exp_P in zip(M, T))
+    assert all(P[2] == 1 for P in M[1:])
 
     T.append(ec._double_jac(T[2]))
     M = multiples(ec.GJ, 5, ec)
     assert len(M) == 5
-    assert M == T
+    assert all(ec._jac_equality(P, exp_P) for P, exp_P in zip(M, T))
+    assert all(P[2] == 1 for P in M[1:])
 
     T.append(ec._add_jac(T[-1], ec.GJ))
     M = multiples(ec.GJ, 6, ec)
     assert len(M) == 6
-    assert M == T
+    assert all(ec._jac_equality(P, exp_P) for P, exp_P in zip(M, T))
+    assert all(P[2] == 1 for P in M[1:])
 
     T.append(ec._double_jac(T[3]))
     M = multiples(ec.GJ, 7, ec)
     assert len(M) == 7
-    assert M == T
+    assert all(ec._jac_equality(P, exp_P) for P, exp_P in zip(M, T))
+    assert all(P[2] == 1 for P in M[1:])
 
     T.append(ec._add_jac(T[-1], ec.GJ))
     M = multiples(ec.GJ, 8, ec)
     assert len(M) == 8
-    assert M == T
+    assert all(ec._jac_equality(P, exp_P) for P, exp_P in zip(M, T))
+    assert all(P[2] == 1 for P in M[1:])
 
     T.append(ec._double_jac(T[4]))
     M = multiples(ec.GJ, 9, ec)
     assert len(M) == 9
-    assert M == T
+    assert all(ec._jac_equality(P, exp_P) for P, exp_P in zip(M, T))
+    assert all(P[2] == 1 for P in M[1:])
 
     T.append(ec._add_jac(T[-1], ec.GJ))
     M = multiples(ec.GJ, 10, ec)
     assert len(M) == 10
-    assert M == T
+    assert all(ec._jac_equality(P, exp_P) for P, exp_P in zip(M, T))
+    assert all(P[2] == 1 for P in M[1:])
 
 
 def test_mult_fixed_window() -> None:
@@ -344,6 +365,32 @@ def test_mult_fixed_window_cached() -> None:
             assert ec._jac_equality(K1, _mult_jac(k1, ec.GJ, ec))
 
 
+def test_mult_fixed_base() -> None:
+    ec = secp256k1
+    with pytest.raises(ValueError, match="non positive w: "):
+        multiples_fixwind(ec.GJ, ec, 0)
+
+    for w in range(1, 8):
+        T = multiples_fixwind(ec.GJ, ec, w)
+        assert len(T) == (ec.psize * 8) // w + 1
+        assert all(len(row) == 2 ** w for row in T)
+        q = secrets.randbelow(ec.n)
+        assert ec._jac_equality(_mult_fixed_base(q, T, ec, w), _mult(q, ec.GJ, ec))
+
+        with pytest.raises(ValueError, match="negative m: "):
+            _mult_fixed_base(-1, T, ec, w)
+
+        with pytest.raises(ValueError, match="too many digits for the table: "):
+            _mult_fixed_base(2 ** (w * len(T)), T, ec, w)
+
+    ec = ec23_31
+    for w in range(1, 6):
+        T = multiples_fixwind(ec.GJ, ec, w)
+        for k1 in range(ec.n):
+            K1 = _mult_fixed_base(k1, T, ec, w)
+            assert ec._jac_equality(K1, _mult_jac(k1, ec.GJ, ec))
+
+
 def test_assorted_jac_mult() -> None:
     ec = ec23_31
     H = second_generator(ec)
@@ -419,3 +466,167 @@ def test_jac_equality() -> None:
     assert ec._jac_equality(QJ, _jac_from_aff(Q))
     assert not ec._jac_equality(QJ, ec.negate_jac(QJ))
     assert not ec._jac_equality(QJ, ec.GJ)
+
+
+def test_glv() -> None:
+    glv_curves = [ec for ec in all_curves.values() if ec._glv is not None]
+    assert secp256k1 in glv_curves
+    assert low_card_curves["ec13_19"] in glv_curves
+    # no endomorphism for a!=0 curves
+    assert CURVES["secp256r1"]._glv is None
+    # no endomorphism for cofactor h!=1 curves
+    assert low_card_curves["ec19_13"]._glv is None
+
+    for ec in glv_curves:
+        assert ec._glv is not None
+        beta, lam, n, a1, b1, a2, b2 = ec._glv
+        assert n == ec.n
+        assert (a1 + b1 * lam) % n == 0
+        assert (a2 + b2 * lam) % n == 0
+        LJ = _mult_fixed_window(lam, ec.GJ, ec)
+        assert ec._jac_equality(LJ, (beta * ec.G[0] % ec.p, ec.G[1], 1))
+
+        for m in (0, 1, 2, lam, ec.n - 1, ec.n, secrets.randbelow(ec.n)):
+            k1, k2 = _glv_split(m, ec._glv)
+            assert (k1 + k2 * lam - m) % n == 0
+            assert abs(k1).bit_length() <= ec.nlen // 2 + 2
+            assert abs(k2).bit_length() <= ec.nlen // 2 + 2
+            exp = _mult_fixed_window(m, ec.GJ, ec)
+            assert ec._jac_equality(_mult_glv(m, ec.GJ, ec), exp)
+            assert ec._jac_equality(_mult(m, ec.GJ, ec), exp)
+
+        u = secrets.randbelow(ec.n)
+        v = secrets.randbelow(ec.n)
+        HJ = _mult_fixed_window(secrets.randbelow(ec.n - 1) + 1, ec.GJ, ec)
+        exp = _double_mult_shamir(u, HJ, v, ec.GJ, ec)
+        assert ec._jac_equality(_double_mult_glv(u, HJ, v, ec.GJ, ec), exp)
+        assert ec._jac_equality(_double_mult(u, HJ, v, ec.GJ, ec), exp)
+        assert ec._jac_equality(_double_mult_glv(0, HJ, 0, ec.GJ, ec), INFJ)
+
+        with pytest.raises(ValueError, match="negative m: "):
+            _mult_glv(-1, ec.GJ, ec)
+        with pytest.raises(ValueError, match="negative first coefficient: "):
+            _double_mult_glv(-1, HJ, v, ec.GJ, ec)
+        with pytest.raises(ValueError, match="negative second coefficient: "):
+            _double_mult_glv(u, HJ, -1, ec.GJ, ec)
+
+    ec = low_card_curves["ec13_19"]
+    for k1 in range(ec.n):
+        K1J = _mult_jac(k1, ec.GJ, ec)
+        assert ec._jac_equality(_mult_glv(k1, ec.GJ, ec), K1J)
+        for k2 in range(ec.n):
+            exp = _mult_jac((k1 + k2) % ec.n, ec.GJ, ec)
+            assert ec._jac_equality(_double_mult_glv(k1, ec.GJ, k2, ec.GJ, ec), exp)
+
+
+def test_signed_digits() -> None:
+    for w in range(1, 9):
+        for m in (0, 1, 2 ** w - 1, 2 ** w, secrets.randbits(256)):
+            digits = _signed_digits(m, w)
+            assert all(-(2 ** (w - 1)) < d <= 2 ** (w - 1) for d in digits)
+            assert m == sum(d << (w * i) for i, d in enumerate(digits))
+
+
+def test_wnaf() -> None:
+    for w in range(2, 9):
+        for m in (0, 1, 2 ** w - 1, 2 ** w, secrets.randbits(256)):
+            digits = _wnaf(m, w)
+            assert all(
+                d % 2 == 1 and -(2 ** (w - 1)) < d < 2 ** (w - 1) for d in digits if d
+            )
+            assert all(
+                sum(map(bool, digits[i : i + w])) <= 1 for i in range(len(digits))
+            )
+            assert m == sum(d << i for i, d in enumerate(digits))
+
+    with pytest.raises(ValueError, match="negative m: "):
+        _wnaf(-1, 4)
+    with pytest.raises(ValueError, match="w too low: "):
+        _wnaf(1, 1)
+
+
+def test_double_mult_vartime() -> None:
+    for ec in all_curves.values():
+        u = secrets.randbelow(ec.n)
+        v = secrets.randbelow(ec.n)
+        HJ = _mult(secrets.randbelow(ec.n - 1) + 1, ec.GJ, ec)
+        exp = _double_mult_shamir(u, HJ, v, ec.GJ, ec)
+        for w in range(2, 7):
+            assert ec._jac_equality(_double_mult_vartime(u, HJ, v, ec.GJ, ec, w), exp)
+        assert ec._jac_equality(_double_mult_vartime(0, HJ, 0, ec.GJ, ec), INFJ)
+        exp = _mult(v, ec.GJ, ec)
+        assert ec._jac_equality(_double_mult_vartime(u, INFJ, v, ec.GJ, ec), exp)
+        # precomputed tables, with different window sizes
+        exp = _double_mult_shamir(u, HJ, v, ec.GJ, ec)
+        for wH, wG in ((2, 8), (6, 3), (4, 4)):
+            HT = _wnaf_tables(HJ, ec, wH)
+            GT = _wnaf_tables(ec.GJ, ec, wG)
+            R = _double_mult_vartime(u, HJ, v, ec.GJ, ec, HT=HT, QT=GT)
+            assert ec._jac_equality(R, exp)
+            R = _double_mult_vartime(u, HJ, v, ec.GJ, ec, 5, QT=GT)
+            assert ec._jac_equality(R, exp)
+
+    for ec in (ec23_31, low_card_curves["ec13_19"]):
+        H = second_generator(ec)
+        HJ = _jac_from_aff(H)
+        for k1 in range(ec.n):
+            for k2 in range(ec.n):
+                exp = _double_mult_shamir(k1, HJ, k2, ec.GJ, ec)
+                R = _double_mult_vartime(k1, HJ, k2, ec.GJ, ec)
+                assert ec._jac_equality(R, exp)
+                R = _double_mult_vartime(k1, ec.GJ, k2, ec.GJ, ec)
+                assert ec._jac_equality(R, _mult((k1 + k2) % ec.n, ec.GJ, ec))
+
+    with pytest.raises(ValueError, match="negative first coefficient: "):
+        _double_mult_vartime(-1, ec.GJ, 1, ec.GJ, ec)
+    with pytest.raises(ValueError, match="negative second coefficient: "):
+        _double_mult_vartime(1, ec.GJ, -1, ec.GJ, ec)
+    with pytest.raises(ValueError, match="w too low: "):
+        _wnaf_tables(ec.GJ, ec, 1)
+
+
+def test_multi_mult_pippenger() -> None:
+    ec = secp256k1
+    scalars = [secrets.randbelow(ec.n) for _ in range(40)]
+    points = [_mult(secrets.randbelow(ec.n - 1) + 1, ec.GJ, ec) for _ in range(40)]
+    exp = _multi_mult_bos_coster(scalars, points, ec)
+    assert ec._jac_equality(_multi_mult_pippenger(scalars, points, ec), exp)
+    for w in range(1, 10):
+        assert ec._jac_equality(_multi_mult_pippenger(scalars, points, ec, w), exp)
+
+    # unbalanced scalars are not a problem
+    R = _multi_mult_pippenger([2 ** 200, 1], [ec.GJ, ec.GJ], ec)
+    assert ec._jac_equality(R, _mult(2 ** 200 + 1, ec.GJ, ec))
+
+    assert ec._jac_equality(INFJ, _multi_mult_pippenger([0, 0], points[:2], ec))
+    assert ec._jac_equality(INFJ, _multi_mult_pippenger([], [], ec))
+
+    # non-normalized Jacobian points
+    points2 = [ec._add_jac(ec._double_jac(P), ec.negate_jac(P)) for P in points]
+    assert ec._jac_equality(_multi_mult_pippenger(scalars, points2, ec), exp)
+
+    # _multi_mult uses Pippenger for more than one point
+    assert ec._jac_equality(_multi_mult(scalars, points, ec), exp)
+    assert ec._jac_equality(_multi_mult(scalars, points, ec, 5), exp)
+    exp = _multi_mult_bos_coster(scalars[:1], points[:1], ec)
+    assert ec._jac_equality(_multi_mult(scalars[:1], points[:1], ec), exp)
+    assert ec._jac_equality(_multi_mult(scalars[:1], points[:1], ec, 5), exp)
+
+    err_msg = "mismatch between number of scalars and points: "
+    with pytest.raises(ValueError, match=err_msg):
+        _multi_mult_pippenger(scalars, points[:-1], ec)
+
+    with pytest.raises(ValueError, match="negative coefficient: "):
+        _multi_mult_pippenger([-1, 1], points[:2], ec)
+
+    with pytest.raises(ValueError, match="non positive w: "):
+        _multi_mult_pippenger(scalars, points, ec, 0)
+
+    ec = ec23_31
+    H = second_generator(ec)
+    HJ = _jac_from_aff(H)
+    for k1 in range(ec.n):
+        for k2 in range(ec.n):
+            exp = _multi_mult_bos_coster([k1, k2], [ec.GJ, HJ], ec)
+            R = _multi_mult_pippenger([k1, k2], [ec.GJ, HJ], ec)
+            assert ec._jac_equality(R, exp)
@@ -12,8 +12,8 @@
 import pytest
 
 from btclib.alias import INFJ
-from btclib.curvegroup import _mult
-from btclib.curvegroup2 import _mult_sliding_window, _mult_w_NAF
+from btclib.curvegroup import _mult, _wnaf
+from btclib.curvegroup2 import _mult_sliding_window, _mult_w_NAF, wNAF_of_m
 from btclib.tests.test_curve import low_card_curves
 
 ec23_31 = low_card_curves["ec23_31"]
@@ -51,6 +51,16 @@ def test_mult_sliding_window() -> None:
             assert ec._jac_equality(K1, _mult(k1, ec.GJ, ec))
 
 
+def test_wNAF_of_m() -> None:
+    for m in (0, 1, 2, 0xFF, 0x1234567, 2 ** 256 - 1):
+        # binary NAF: no adjacent non-zero digits
+        digits = wNAF_of_m(m, 1)
+        assert digits == _wnaf(m, 2)
+        assert sum(d << i for i, d in enumerate(digits)) == m
+        for w in range(2, 8):
+            assert wNAF_of_m(m, w) == _wnaf(m, w)
+
+
 def test_mult_w_NAF() -> None:
     for w in range(1, 6):
         for ec in low_card_curves.values():
@@ -14,9 +14,14 @@ from hashlib import sha1, sha224, sha256, sha384, sha512
 
 import pytest
 
-from btclib import dsa
+from btclib import dh, dsa
 from btclib.curve import CURVES, mult
-from btclib.dh import ansi_x9_63_kdf, diffie_hellman
+from btclib.dh import (
+    ansi_x9_63_kdf,
+    diffie_hellman,
+    diffie_hellman_keys,
+    diffie_hellman_peers,
+)
 from btclib.secpoint import bytes_from_point
 
 
@@ -59,6 +64,36 @@ def test_ecdh() -> None:
         ansi_x9_63_kdf(z, size, hf, None)
 
 
+def test_ecdh_batch() -> None:
+    shared_info = b"deadbeef"
+    for ec in (CURVES["secp256k1"], CURVES["secp256r1"]):
+        a, A = dsa.gen_keys(ec=ec)
+        keys = [dsa.gen_keys(ec=ec) for _ in range(5)]
+        qs = [q for q, _ in keys]
+        Qs = [Q for _, Q in keys]
+
+        exp = [diffie_hellman(a, Q, 32, shared_info, ec) for Q in Qs]
+        assert diffie_hellman_peers(a, Qs, 32, shared_info, ec) == exp
+        exp = [diffie_hellman(q, A, 32, shared_info, ec) for q in qs]
+        assert diffie_hellman_keys(qs, A, 32, shared_info, ec) == exp
+
+        # with the fixed-window table of the peer public key
+        thresholds = dh._TABLE_THRESHOLD, dh._TABLE_THRESHOLD_W6
+        try:
+            for dh._TABLE_THRESHOLD_W6 in (4, 8):
+                dh._TABLE_THRESHOLD = 4
+                assert diffie_hellman_keys(qs, A, 32, shared_info, ec) == exp
+        finally:
+            dh._TABLE_THRESHOLD, dh._TABLE_THRESHOLD_W6 = thresholds
+
+    assert diffie_hellman_peers(a, [], 32, None, ec) == []
+    assert diffie_hellman_keys([], A, 32, None, ec) == []
+    with pytest.raises(AssertionError, match="invalid \\(INF\\) key"):
+        diffie_hellman_keys([ec.n], A, 32, None, ec)
+    with pytest.raises(ValueError, match="point not on curve"):
+        diffie_hellman_peers(a, [(1, 1)], 32)
+
+
 def test_gec_2() -> None:
     """GEC 2: Test Vectors for SEC 1, section 4.1
 
@@ -10,15 +10,18 @@
 
 "Tests for `btclib.dsa` module."
 
-from hashlib import sha1
+import secrets
+from hashlib import sha1, sha256
+from typing import List, Optional
 
 import pytest
 
 from btclib import dsa
 from btclib.alias import INF
-from btclib.curve import CURVES, double_mult, mult
+from btclib.curve import CURVES, double_mult, mult, secp256k1
 from btclib.curvegroup import _mult
 from btclib.numbertheory import mod_inv
+from btclib.prepared import PreparedPubKey
 from btclib.rfc6979 import rfc6979
 from btclib.secpoint import bytes_from_point, point_from_octets
 from btclib.tests.test_curve import low_card_curves
@@ -211,6 +214,71 @@ def test_pubkey_recovery() -> None:
         assert dsa.verify(msg, Q, sig, ec)
 
 
+def _key_id(m: bytes, Q, sig, ec) -> int:
+    r, s = sig
+    c = dsa._challenge(m, ec)
+    w = mod_inv(s, ec.n)
+    K = double_mult(c * w % ec.n, ec.G, r * w % ec.n, Q, ec)
+    return (K[1] & 1) + 2 * (K[0] // ec.n)
+
+
+def test_batch_verify() -> None:
+
+    for ec in (CURVES["secp112r2"], CURVES["secp256r1"], secp256k1):
+        ms, Qs, sigs, key_ids = [], [], [], []
+        for i in range(10):
+            m = sha256(f"message {i}".encode()).digest()
+            q = 1 + secrets.randbelow(ec.n - 1)
+            Q = mult(q, ec.G, ec)
+            sig = dsa._sign(m, q, None, True, ec)
+            ms.append(m)
+            Qs.append(Q)
+            sigs.append(sig)
+            key_ids.append(_key_id(m, Q, sig, ec))
+
+        assert dsa.batch_verify(ms, Qs, sigs, ec, key_ids=key_ids)
+        # without key_ids, or only some, signatures are verified one by one
+        assert dsa.batch_verify(ms, Qs, sigs, ec)
+        some_ids: List[Optional[int]] = [None]
+        some_ids += key_ids[1:]
+        assert dsa.batch_verify(ms, Qs, sigs, ec, key_ids=some_ids)
+        assert dsa.batch_verify(ms[:1], Qs[:1], sigs[:1], ec, key_ids=key_ids[:1])
+        assert dsa.batch_verify([], [], [], ec)
+        assert dsa.invalid_indexes(ms, Qs, sigs, ec, key_ids=key_ids) == []
+
+        # a wrong key_id makes the batch fail, not the signature invalid
+        wrong_ids = key_ids[:]
+        wrong_ids[3] ^= 1
+        assert not dsa.batch_verify(ms, Qs, sigs, ec, key_ids=wrong_ids)
+        assert dsa.invalid_indexes(ms, Qs, sigs, ec, key_ids=wrong_ids) == []
+
+        # invalid signatures are pinpointed
+        invalid_sigs = sigs[:]
+        invalid_sigs[2] = sigs[3]
+        invalid_sigs[7] = (sigs[7][0], sigs[7][1] % (ec.n - 1) + 1)
+        assert not dsa.batch_verify(ms, Qs, invalid_sigs, ec, key_ids=key_ids)
+        assert not dsa.batch_verify(ms, Qs, invalid_sigs, ec)
+        for ids in (key_ids, None):
+            assert dsa.invalid_indexes(ms, Qs, invalid_sigs, ec, key_ids=ids) == [2, 7]
+
+    # PreparedPubKey and DER signatures
+    Ps = [PreparedPubKey(Q, ec) for Q in Qs]
+    dersigs = [dsa.serialize(*sig, ec) for sig in sigs]
+    assert dsa.batch_verify(ms, Ps, dersigs, ec, key_ids=key_ids)
+
+    err_msg = "mismatch between number of pubkeys "
+    with pytest.raises(ValueError, match=err_msg):
+        dsa._batch_verify(ms, Qs[:-1], sigs, ec)
+    with pytest.raises(ValueError, match=err_msg):
+        dsa._batch_verify(ms, Qs, sigs[:-1], ec)
+    with pytest.raises(ValueError, match=err_msg):
+        dsa._batch_verify(ms, Qs, sigs, ec, key_ids=key_ids[:-1])
+    with pytest.raises(ValueError, match=err_msg):
+        dsa.invalid_indexes(ms[:-1], Qs, sigs, ec)
+    with pytest.raises(ValueError, match="invalid key_id: "):
+        dsa._batch_verify(ms, Qs, sigs, ec, key_ids=[2] * len(ms))
+
+
 def test_crack_prvkey() -> None:
 
     ec = CURVES["secp256k1"]
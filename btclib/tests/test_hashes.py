@@ -10,8 +10,11 @@
 
 "Tests for `btclib.hashes` module."
 
+import hashlib
+
+from btclib import hashes
 from btclib.bip32 import BIP32KeyData, derive, rootxprv_from_seed
-from btclib.hashes import fingerprint
+from btclib.hashes import fingerprint, tagged_hash
 
 
 def test_fingerprint() -> None:
@@ -22,3 +25,17 @@ def test_fingerprint() -> None:
     child_key = derive(xprv, 0x80000000)
     pf2 = BIP32KeyData.deserialize(child_key).parent_fingerprint
     assert pf == pf2
+
+
+def test_tagged_hash() -> None:
+    for hf in (hashlib.sha256, hashlib.sha512, hashlib.sha1):
+        for tag in ("BIPSchnorr", "BIPSchnorrDerive", "TapLeaf", b"", ""):
+            t = tag.encode() if isinstance(tag, str) else tag
+            tag_hash = hf(t).digest()
+            for m in (b"", b"\x00" * 32, b"Satoshi Nakamoto" * 10):
+                exp = hf(tag_hash + tag_hash + m).digest()
+                assert tagged_hash(tag, m, hf) == exp
+                # the midstate is not consumed by previous hashings
+                assert tagged_hash(tag, m, hf) == exp
+            assert (t, hf) in hashes._TAGGED_MIDSTATES
+    assert tagged_hash("BIPSchnorr", b"") == tagged_hash(b"BIPSchnorr", b"")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.lockstep` module."
+
+import secrets
+
+import pytest
+
+from btclib import lockstep
+from btclib.curve import CURVES, batch_mult, mult, secp256k1
+from btclib.curvegroup import _jac_from_aff
+from btclib.tests.test_curve import low_card_curves
+
+pytest.importorskip("numpy")
+
+ec23_31 = low_card_curves["ec23_31"]
+
+
+def test_field() -> None:
+    for p in (secp256k1.p, CURVES["secp256r1"].p, 13):
+        F = lockstep.LockstepField(p)
+        xs = [secrets.randbelow(p) for _ in range(50)] + [0, 1, p - 1]
+        ys = [secrets.randbelow(p) for _ in range(53)]
+        a, b = F.from_ints(xs), F.from_ints(ys)
+        assert len(a) == 53
+        assert F.to_ints(a) == xs
+        assert F.to_ints(F.mul(a, b)) == [x * y % p for x, y in zip(xs, ys)]
+        assert F.to_ints(F.add(a, b)) == [(x + y) % p for x, y in zip(xs, ys)]
+        assert F.to_ints(F.sub(a, b)) == [(x - y) % p for x, y in zip(xs, ys)]
+        assert F.to_ints(F.mul_small(a, 8)) == [8 * x % p for x in xs]
+
+        # lazy reduction: bounds grow until a reduction is needed
+        c = a
+        for _ in range(40):
+            c = F.sub(F.add(c, c), b)
+        exp = xs
+        for _ in range(40):
+            exp = [(2 * x - y) % p for x, y in zip(exp, ys)]
+        assert F.to_ints(c) == exp
+        assert F.to_ints(F.sqr(c)) == [x * x % p for x in exp]
+
+    with pytest.raises(ValueError, match="p is not an odd prime: "):
+        lockstep.LockstepField(16)
+
+
+def test_formulas() -> None:
+    "Compare the lockstep formulas with the CurveGroup ones."
+
+    # generic, a=0, and a=-3 doubling formulas
+    for ec in (CURVES["bpp256r1"], secp256k1, CURVES["secp256r1"]):
+        lc = lockstep.lockstep_curve(ec)
+        assert lockstep.lockstep_curve(ec) is lc
+        Ps = [_jac_from_aff(P) for P in batch_mult(range(1, 21), ec.G, ec)]
+        # not normalized Jacobian points
+        Qs = [ec._double_jac(P) for P in Ps]
+        P_lanes, Q_lanes = lc.to_lanes(Ps), lc.to_lanes(Qs)
+
+        for R, P in zip(lc.from_lanes(lc.double_jac(Q_lanes)), Qs):
+            assert ec._jac_equality(R, ec._double_jac(P))
+        for R, P, Q in zip(lc.from_lanes(lc.add_jac(Q_lanes, P_lanes)), Qs, Ps):
+            assert ec._jac_equality(R, ec._add_jac(P, Q))
+        R_lanes = lc.add_jac_aff(Q_lanes, P_lanes[:2])  # type: ignore
+        for R, P, Q in zip(lc.from_lanes(R_lanes), Qs, Ps):
+            assert ec._jac_equality(R, ec._add_jac_aff(P, Q))
+
+    # exceptional cases are not handled: Z=0, i.e. INFJ
+    lc = lockstep.lockstep_curve(secp256k1)
+    Ps = [secp256k1.GJ]
+    assert lc.from_lanes(lc.add_jac(lc.to_lanes(Ps), lc.to_lanes(Ps)))[0][2] == 0
+
+
+def test_batch_mult() -> None:
+    for ec in (secp256k1, CURVES["secp256r1"], CURVES["bpp256r1"]):
+        scalars = [secrets.randbelow(ec.n) for _ in range(30)] + [0, 1, ec.n - 1]
+        assert lockstep.batch_mult(scalars, ec=ec) == batch_mult(scalars, ec=ec)
+        Q = mult(secrets.randbelow(ec.n - 1) + 1, ec.G, ec)
+        assert lockstep.batch_mult(scalars, Q, ec) == batch_mult(scalars, Q, ec)
+
+    # many exceptional lanes, recomputed with the scalar path
+    for ec in (ec23_31, low_card_curves["ec13_11"]):
+        scalars = list(range(ec.n + 3))
+        assert lockstep.batch_mult(scalars, ec=ec) == batch_mult(scalars, ec=ec)
+        Q = mult(2, ec.G, ec)
+        assert lockstep.batch_mult(scalars, Q, ec) == batch_mult(scalars, Q, ec)
+
+    # lanes are processed in chunks
+    lanes = lockstep._LANES
+    try:
+        lockstep._LANES = 7
+        scalars = [secrets.randbelow(secp256k1.n) for _ in range(20)]
+        assert lockstep.batch_mult(scalars) == batch_mult(scalars)
+    finally:
+        lockstep._LANES = lanes
+    assert lockstep.batch_mult([]) == []
+
+    with pytest.raises(ValueError, match="point not on curve"):
+        lockstep.batch_mult([1], (1, 1))
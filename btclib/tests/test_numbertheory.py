@@ -10,9 +10,23 @@
 
 "Tests for `btclib.numbertheory` module."
 
+from typing import Iterator
+
 import pytest
 
-from btclib.numbertheory import mod_inv, mod_sqrt, tonelli
+from btclib import numbertheory
+from btclib.numbertheory import (
+    available_backends,
+    batch_mod_inv,
+    get_backend,
+    jacobi_symbol,
+    legendre_symbol,
+    mod_inv,
+    mod_sqrt,
+    mul_mod,
+    set_backend,
+    tonelli,
+)
 
 primes = [
     2,
@@ -57,6 +71,69 @@ primes = [
 ]
 
 
+@pytest.fixture(params=available_backends(), autouse=True)
+def backend(request: pytest.FixtureRequest) -> Iterator[str]:
+    "Run each test with all the available backends."
+    active = get_backend()
+    set_backend(request.param)
+    yield request.param
+    set_backend(active)
+
+
+def test_backend(backend: str) -> None:
+    assert "python" in available_backends()
+    assert get_backend() == backend
+
+    err_msg = "unavailable backend: 'notabackend'"
+    with pytest.raises(ValueError, match=err_msg):
+        set_backend("notabackend")
+    assert get_backend() == backend
+
+    set_backend()
+    assert get_backend() == ("gmpy2" if numbertheory.gmpy2 else "python")
+
+
+def test_mul_mod() -> None:
+    for p in primes:
+        a, b = p // 3 + 1, p - 2
+        assert mul_mod(a, b, p) == a * b % p
+        assert isinstance(mul_mod(a, b, p), int)
+
+
+def test_legendre_jacobi() -> None:
+    for p in primes[:30]:
+        squares = {i * i % p for i in range(1, p)}
+        for a in range(-p, 2 * p):
+            ls = legendre_symbol(a, p)
+            exp = 0 if a % p == 0 else (1 if a % p in squares else -1)
+            if p != 2:
+                assert ls == exp
+                assert jacobi_symbol(a, p) == exp
+
+    for n in range(1, 200, 2):
+        for a in range(n):
+            exp = 1
+            # multiplicativity in n
+            m, d = n, 3
+            factors = []
+            while m > 1:
+                while m % d == 0:
+                    factors.append(d)
+                    m //= d
+                d += 2
+            for q in factors:
+                exp *= legendre_symbol(a, q)
+            assert jacobi_symbol(a, n) == exp
+
+    for p in primes[30:]:
+        for a in (2, 3, p - 1, p // 2):
+            assert jacobi_symbol(a, p) == legendre_symbol(a, p)
+
+    for n in (0, -3, 8):
+        with pytest.raises(ValueError, match="not an odd positive integer: "):
+            jacobi_symbol(5, n)
+
+
 def test_mod_inv_prime() -> None:
     for p in primes:
         with pytest.raises(ValueError, match="No inverse for 0 mod"):
@@ -85,6 +162,23 @@ def test_mod_inv() -> None:
                     mod_inv(a, m)
 
 
+def test_batch_mod_inv() -> None:
+    for p in primes:
+        values = list(range(1, min(p, 500)))
+        assert batch_mod_inv(values, p) == [mod_inv(a, p) for a in values]
+        values = [a + p for a in values]
+        assert batch_mod_inv(values, p) == [mod_inv(a, p) for a in values]
+        with pytest.raises(ValueError, match="No inverse for 0 mod"):
+            batch_mod_inv(values + [0], p)
+
+    assert batch_mod_inv([], 7) == []
+
+    m = 100
+    assert batch_mod_inv([3, 7, 99], m) == [mod_inv(a, m) for a in (3, 7, 99)]
+    with pytest.raises(ValueError, match="No inverse for 2 mod 100"):
+        batch_mod_inv([3, 7, 2, 99], m)
+
+
 def test_mod_sqrt() -> None:
     for p in primes[:30]:  # exhaustable only for small p
         has_root = {0, 1}
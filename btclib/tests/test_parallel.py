@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.parallel` module."
+
+import itertools
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha1, sha256
+from typing import Any, List, Tuple
+
+import pytest
+
+from btclib import dsa, parallel, ssa
+from btclib.alias import INF
+from btclib.curve import CURVES, batch_mult, mult, secp256k1
+from btclib.parallel import (
+    VerifyStats,
+    get_pool,
+    mult_many,
+    shutdown_pool,
+    verify_many,
+)
+from btclib.prepared import PreparedPubKey
+from btclib.tests.test_curve import low_card_curves
+from btclib.tests.test_dsa import _key_id
+
+
+def test_mult_many() -> None:
+    ec = secp256k1
+    qs = [secrets.randbelow(ec.n) for _ in range(50)] + [0, ec.n]
+    Q = mult(secrets.randbelow(ec.n - 1) + 1)
+    try:
+        pool = get_pool(2)
+        assert get_pool() is pool
+        assert get_pool(2) is pool
+
+        assert list(mult_many(qs, chunksize=7)) == batch_mult(qs)
+        assert list(mult_many(qs, ec.G, ec, chunksize=7)) == batch_mult(qs)
+        assert list(mult_many(qs, Q, chunksize=7)) == batch_mult(qs, Q)
+        points = batch_mult(range(1, len(qs) + 1))
+        exp = [mult(q, P) for q, P in zip(qs, points)]
+        assert list(mult_many(qs, points, chunksize=7)) == exp
+        assert list(mult_many(qs, iter(points), chunksize=100)) == exp
+        assert list(mult_many([])) == []
+
+        # streaming from an endless input
+        results = mult_many(itertools.count(), chunksize=3)
+        assert list(itertools.islice(results, 5)) == [INF] + batch_mult(range(1, 5))
+
+        # not bundled curve
+        ec = low_card_curves["ec23_31"]
+        qs = list(range(2 * ec.n))
+        assert list(mult_many(qs, None, ec, chunksize=5)) == batch_mult(qs, ec.G, ec)
+
+        # a different number of workers restarts the pool
+        assert get_pool(1) is not pool
+        assert parallel._POOL_WORKERS == 1
+        ec = CURVES["secp256r1"]
+        assert list(mult_many(qs, None, ec)) == batch_mult(qs, ec.G, ec)
+
+        with pytest.raises(ValueError, match="point not on curve"):
+            list(mult_many(qs, (1, 1)))
+        with pytest.raises(ValueError, match="mismatch between number of scalars"):
+            list(mult_many(qs, points[:3], chunksize=7))
+        with pytest.raises(ValueError, match="chunksize must be positive: "):
+            list(mult_many(qs, chunksize=0))
+    finally:
+        shutdown_pool()
+    assert parallel._POOL is None
+    shutdown_pool()
+
+
+def test_mult_many_executor() -> None:
+    ec = low_card_curves["ec13_19"]
+    # the autotuning selections are sent to the workers
+    ec._tuned = {"verify": ("wnaf", 4)}
+    qs = list(range(ec.n))
+    with ThreadPoolExecutor(2) as executor:
+        results = mult_many(qs, ec.G, ec, chunksize=4, executor=executor)
+        assert list(results) == batch_mult(qs, ec.G, ec)
+    ec._tuned = {}
+    assert parallel._POOL is None
+
+
+def test_verify_many() -> None:
+    ec = secp256k1
+    ms = [sha256(f"message {i}".encode()).digest() for i in range(40)]
+    qs = [secrets.randbelow(ec.n - 1) + 1 for _ in ms]
+    Qs = batch_mult(qs)
+    ssa_sigs = [ssa._sign(m, q) for m, q in zip(ms, qs)]
+    dsa_sigs = [dsa._sign(m, q) for m, q in zip(ms, qs)]
+    exp = [True] * len(ms)
+    for i in (3, 17, 39):
+        exp[i] = False
+        ssa_sigs[i] = ssa_sigs[i - 1]
+        dsa_sigs[i] = dsa_sigs[i - 1]
+    ssa_items = list(zip(ms, [Q[0] for Q in Qs], ssa_sigs))
+    dsa_items = list(zip(ms, Qs, dsa_sigs))
+    try:
+        stats = VerifyStats()
+        results = verify_many(ssa_items, chunksize=7, max_workers=2, stats=stats)
+        assert list(results) == exp
+        assert stats.read == stats.verified == stats.yielded == len(ms)
+        assert stats.invalid == 3
+        assert stats.chunks == 6
+        assert stats.read_time > 0
+        assert stats.verify_time > 0
+        assert stats.throughput()["pipeline"] > 0
+        assert "40/40 items" in repr(stats)
+
+        assert list(verify_many(dsa_items, "dsa", chunksize=7)) == exp
+        # ECDSA key_id hints, enabling the batch verification
+        items: List[Tuple[Any, ...]] = [
+            (m, Q, sig, _key_id(m, Q, sig, ec)) for m, Q, sig in dsa_items
+        ]
+        assert list(verify_many(items, "dsa", chunksize=20)) == exp
+        items[0] = dsa_items[0] + (None,)
+        assert list(verify_many(items, "dsa", chunksize=20)) == exp
+        assert list(verify_many(iter(ssa_items))) == exp
+        # prepared public keys, after the generator table has been built
+        assert ec._GT
+        prepared = {Q: PreparedPubKey(Q) for Q in Qs}
+        items = [(m, prepared[Q], sig) for m, Q, sig in dsa_items]
+        assert list(verify_many(items, "dsa", chunksize=7, max_workers=2)) == exp
+        items = [(m, prepared[Q], sig) for m, Q, sig in zip(ms, Qs, ssa_sigs)]
+        assert list(verify_many(items, chunksize=7, max_workers=2)) == exp
+        # a prepared public key for another curve is not a valid key
+        prepared_r1 = PreparedPubKey(CURVES["secp256r1"].G, CURVES["secp256r1"])
+        items = [(ms[0], prepared_r1, dsa_sigs[0])]
+        assert list(verify_many(items, "dsa", max_workers=2)) == [False]
+        assert list(verify_many([])) == []
+
+        # streaming from an endless input
+        results = verify_many(itertools.cycle(ssa_items), chunksize=16)
+        assert list(itertools.islice(results, 80)) == exp + exp
+
+        # other curves and hash functions
+        ec = CURVES["secp256r1"]
+        m = sha1(b"Satoshi Nakamoto").digest()
+        sig = dsa._sign(m, 1, None, True, ec, sha1)
+        items = [(m, ec.G, sig), (m, ec.G, (sig[0], sig[1] + 1))]
+        assert list(verify_many(items, "dsa", ec, sha1)) == [True, False]
+
+        with pytest.raises(ValueError, match="unknown signature scheme: "):
+            list(verify_many(ssa_items, "ecdsa"))
+        with pytest.raises(ValueError, match="chunksize must be positive: "):
+            list(verify_many(ssa_items, chunksize=0))
+    finally:
+        shutdown_pool()
+
+    with ThreadPoolExecutor(2) as executor:
+        results = verify_many(ssa_items, chunksize=7, executor=executor)
+        assert list(results) == exp
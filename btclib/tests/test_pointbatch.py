@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.pointbatch` module."
+
+import secrets
+
+import pytest
+
+from btclib import pointbatch
+from btclib.alias import INF
+from btclib.curve import CURVES, batch_mult, mult, multi_mult, secp256k1
+from btclib.pointbatch import PointBatch
+from btclib.secpoint import bytes_from_point
+from btclib.tests.test_curve import low_card_curves
+from btclib.utils import hash160
+
+
+def test_pointbatch() -> None:
+    ec = secp256k1
+    scalars = [secrets.randbelow(ec.n - 1) + 1 for _ in range(20)]
+    points = batch_mult(scalars)
+
+    batch = PointBatch(points)
+    assert len(batch) == 20
+    assert batch.nbytes == 20 * 2 * ec.psize
+    assert list(batch) == points
+    assert batch[0] == points[0]
+    assert batch[-1] == points[-1]
+    assert "20 affine points" in repr(batch)
+    with pytest.raises(IndexError, match="index out of range: "):
+        batch[20]
+    with pytest.raises(ValueError, match="point not on curve"):
+        PointBatch([(1, 1)])
+
+    assert PointBatch.from_scalars(scalars) == batch
+    assert PointBatch.from_scalars(scalars, ec.G) == batch
+    jac_batch = PointBatch.from_scalars(scalars, jacobian=True)
+    assert jac_batch.jacobian
+    assert jac_batch.nbytes == 20 * 3 * ec.psize
+    assert jac_batch == batch
+    assert jac_batch.to_affine()._data == batch._data
+    assert batch.to_affine() is batch
+    assert jac_batch.to_jacobian() is jac_batch
+    assert batch.to_jacobian() == batch
+    assert batch != PointBatch(points[:-1])
+    assert batch != PointBatch(points[:-1] + points[:1])
+    assert batch != points
+
+    Q = points[0]
+    exp = batch_mult(scalars, Q)
+    assert list(PointBatch.from_scalars(scalars, Q)) == exp
+
+    # the infinity point
+    batch2 = PointBatch([INF, Q])
+    batch2.append(INF)
+    assert list(batch2) == [INF, Q, INF]
+    assert batch2 == PointBatch.from_scalars([0, scalars[0], ec.n], jacobian=True)
+    jac_batch = batch2.to_jacobian()
+    jac_batch.extend([Q])
+    assert list(jac_batch.to_affine()) == [INF, Q, INF, Q]
+
+    # chunked conversion to affine coordinates
+    chunksize = pointbatch._CHUNKSIZE
+    try:
+        pointbatch._CHUNKSIZE = 3
+        jac_batch = PointBatch.from_scalars(scalars, jacobian=True)
+        assert jac_batch.to_affine() == batch
+        assert PointBatch.from_scalars(scalars) == batch
+    finally:
+        pointbatch._CHUNKSIZE = chunksize
+
+
+def test_multi_mult() -> None:
+    for ec in (secp256k1, CURVES["secp256r1"], low_card_curves["ec13_19"]):
+        scalars = [secrets.randbelow(ec.n) for _ in range(10)]
+        batch = PointBatch.from_scalars(range(1, 11), ec=ec)
+        exp = multi_mult(scalars, batch_mult(range(1, 11), ec.G, ec), ec)
+        assert batch.multi_mult(scalars) == exp
+        assert batch.to_jacobian().multi_mult(scalars) == exp
+    with pytest.raises(ValueError, match="mismatch between number of scalars"):
+        batch.multi_mult(scalars[:-1])
+
+
+def test_serialize() -> None:
+    for ec in (secp256k1, CURVES["secp256r1"], low_card_curves["ec13_19"]):
+        points = [mult(q, ec.G, ec) for q in range(1, min(ec.n, 20))]
+        batch = PointBatch.from_scalars(range(1, min(ec.n, 20)), ec=ec, jacobian=True)
+        for compressed in (True, False):
+            pubkeys = [bytes_from_point(Q, ec, compressed) for Q in points]
+            data = batch.serialize(compressed)
+            assert data == b"".join(pubkeys)
+            assert batch.hash160s(compressed) == [hash160(p) for p in pubkeys]
+            batch2 = PointBatch.deserialize(data, ec, compressed)
+            assert list(batch2) == points
+            assert PointBatch.deserialize(data.hex(), ec, compressed) == batch2
+
+    with pytest.raises(ValueError, match="invalid size for SEC encodings: "):
+        PointBatch.deserialize(data[:-1], ec, False)
+    with pytest.raises(ValueError, match="no bytes representation for infinity"):
+        PointBatch([INF]).serialize()
+    assert PointBatch().serialize() == b""
+    assert PointBatch.deserialize(b"") == PointBatch()
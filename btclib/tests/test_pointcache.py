@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.pointcache` module."
+
+import secrets
+from typing import List
+
+import pytest
+
+from btclib.curve import mult, secp256k1
+from btclib.curvegroup import (
+    _jac_from_aff,
+    _mult,
+    _mult_fixed_window_cached,
+    cached_multiples_fixwind,
+    multiples_fixwind,
+    warm_up,
+)
+from btclib.pointcache import TABLE_CACHE, CacheStats, TableCache, nbytes
+
+
+def test_nbytes() -> None:
+    assert nbytes(1) < nbytes(2 ** 256)
+    assert nbytes((1, 2)) > nbytes(())
+    assert nbytes([[(1, 2, 3)]]) > nbytes([(1, 2, 3)])
+
+
+def test_lru() -> None:
+    size = nbytes([1])
+    cache = TableCache(3 * size)
+    assert cache.get("a", lambda: [1]) == [1]
+    assert cache.get("b", lambda: [2]) == [2]
+    assert cache.get("c", lambda: [3]) == [3]
+    assert cache.get("a", lambda: [0]) == [1]
+    assert cache.stats() == CacheStats(1, 3, 0, 3, 3 * size, 3 * size, "lru")
+
+    # "b" is the least recently used
+    cache.get("d", lambda: [4])
+    assert "b" not in cache
+    assert "a" in cache
+    assert len(cache) == 3
+    assert cache.stats().evictions == 1
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats() == CacheStats(0, 0, 0, 0, 0, 3 * size, "lru")
+
+
+def test_lfu() -> None:
+    size = nbytes([1])
+    cache = TableCache(3 * size, "lfu")
+    cache.get("a", lambda: [1])
+    cache.get("a", lambda: [1])
+    cache.get("b", lambda: [2])
+    cache.get("b", lambda: [2])
+    cache.get("c", lambda: [3])
+    cache.get("a", lambda: [1])
+    # "c" is the least frequently used
+    cache.get("d", lambda: [4])
+    assert "c" not in cache
+    # "d" is least frequently used, "b" is least recently used among equals
+    cache.get("d", lambda: [4])
+    cache.get("e", lambda: [5])
+    assert "b" not in cache
+    assert "a" in cache and "d" in cache and "e" in cache
+
+    # switching policy
+    cache.configure(policy="lru")
+    cache.get("f", lambda: [6])
+    assert "a" not in cache
+
+
+def test_budget() -> None:
+    size = nbytes([1])
+    cache = TableCache(2 * size)
+
+    # a table larger than the budget is not cached
+    calls = []
+
+    def factory() -> List[int]:
+        calls.append(1)
+        return list(range(9))
+
+    assert cache.get("big", factory) == list(range(9))
+    assert cache.get("big", factory) == list(range(9))
+    assert len(calls) == 2
+    assert len(cache) == 0
+
+    # unless pinned
+    cache.get("big", factory, pin=True)
+    assert "big" in cache
+    assert cache.stats().nbytes > cache.max_bytes
+    # pinned tables are not evicted
+    cache.get("a", lambda: [1])
+    assert "big" in cache
+    assert "a" not in cache
+    cache.unpin("big")
+    assert "big" not in cache
+
+    # pinning a table already in the cache
+    cache.get("a", lambda: [1])
+    cache.get("a", lambda: [1], pin=True)
+    cache.get("b", lambda: [2])
+    cache.get("c", lambda: [3])
+    assert "a" in cache and "b" not in cache and "c" in cache
+
+    # shrinking the budget evicts tables
+    cache.configure(max_bytes=size)
+    assert len(cache) == 1
+    cache.configure(max_bytes=0)
+    assert "a" in cache
+    cache.unpin("a")
+    assert len(cache) == 0
+    assert cache.stats().nbytes == 0
+
+    with pytest.raises(ValueError, match="negative max_bytes: "):
+        cache.configure(max_bytes=-1)
+    with pytest.raises(ValueError, match="invalid policy: "):
+        cache.configure(policy="fifo")
+    with pytest.raises(ValueError, match="invalid policy: "):
+        TableCache(policy="fifo")
+
+
+def test_warm_up() -> None:
+    ec = secp256k1
+    QJs = [_jac_from_aff(mult(secrets.randbelow(ec.n - 1) + 1)) for _ in range(3)]
+    max_bytes = TABLE_CACHE.max_bytes
+    try:
+        TABLE_CACHE.clear()
+        warm_up(QJs, ec)
+        stats = TABLE_CACHE.stats()
+        assert stats.misses == stats.entries == 3
+        assert stats.hits == 0
+
+        # pinned tables survive a small budget
+        TABLE_CACHE.configure(max_bytes=0)
+        assert len(TABLE_CACHE) == 3
+        m = secrets.randbelow(ec.n)
+        for QJ in QJs:
+            RJ = _mult_fixed_window_cached(m, QJ, ec)
+            assert ec._jac_equality(RJ, _mult(m, QJ, ec))
+        assert TABLE_CACHE.stats().hits == 3
+        assert cached_multiples_fixwind(QJs[0], ec) == multiples_fixwind(QJs[0], ec)
+
+        # not pinned tables are not cached when exceeding the budget
+        warm_up(QJs, ec, 5, pin=False)
+        assert len(TABLE_CACHE) == 3
+    finally:
+        TABLE_CACHE.clear()
+        TABLE_CACHE.configure(max_bytes=max_bytes)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.prepared` module."
+
+import pytest
+
+from btclib import dsa, ssa
+from btclib.curve import CURVES, mult, secp256k1
+from btclib.prepared import REGISTRY, KeyRegistry, PreparedPubKey
+from btclib.secpoint import bytes_from_point
+
+
+def test_prepared_pubkey() -> None:
+    ec = secp256k1
+    q = 0x18E14A7B6A307F426A94F8114701E7C8E774E7F9A47E2C2035DB29A206321725
+    Q = mult(q)
+    for key in (q, Q, bytes_from_point(Q), bytes_from_point(Q, compressed=False)):
+        prepared = PreparedPubKey(key)
+        assert prepared.Q == Q
+        assert prepared.QJ == (Q[0], Q[1], 1)
+        assert prepared.ec is ec
+        # GLV endomorphism: two tables
+        assert len(prepared.tables) == 2
+        assert len(prepared.tables[0][0]) == 2 ** (prepared.w - 2)
+    assert PreparedPubKey(prepared).Q == Q
+    assert "PreparedPubKey((0x" in repr(prepared)
+    assert len(PreparedPubKey(Q, w=4).tables[0][0]) == 4
+    assert prepared.tables_for(ec) is prepared.tables
+
+    ec2 = CURVES["secp256r1"]
+    with pytest.raises(ValueError, match="curve mismatch"):
+        prepared.tables_for(ec2)
+    with pytest.raises(ValueError, match="curve mismatch"):
+        PreparedPubKey(prepared, ec2)
+    with pytest.raises(ValueError, match="curve mismatch"):
+        dsa.assert_as_valid("msg", prepared, dsa.sign("msg", 1, ec=ec2), ec2)
+    with pytest.raises(ValueError):
+        PreparedPubKey((1, 1))
+
+
+def test_verify() -> None:
+    msg = "Satoshi Nakamoto"
+    for ec in (secp256k1, CURVES["secp256r1"], CURVES["bpp256r1"]):
+        for q in (1, 2, ec.n - 1):
+            prepared = PreparedPubKey(q, ec)
+            sig = dsa.sign(msg, q, ec=ec)
+            assert dsa.verify(msg, prepared, sig, ec)
+            dsa.assert_as_valid(msg, prepared, sig, ec)
+            assert not dsa.verify("Craig Wright", prepared, sig, ec)
+            wrong = PreparedPubKey(q % (ec.n - 1) + 1, ec)
+            if wrong.Q != prepared.Q:
+                assert not dsa.verify(msg, wrong, sig, ec)
+
+    ec = secp256k1
+    for q in range(1, 10):
+        # both square and non-square y-coordinate public keys
+        prepared = PreparedPubKey(q, ec)
+        sig = ssa.sign(msg, q, None, ec)
+        assert ssa.verify(msg, prepared, sig, ec)
+        ssa.assert_as_valid(msg, prepared, sig, ec)
+        assert not ssa.verify("Craig Wright", prepared, sig, ec)
+        wrong = PreparedPubKey(q + 1, ec)
+        assert not ssa.verify(msg, wrong, sig, ec)
+
+
+def test_registry() -> None:
+    ec = secp256k1
+    registry = KeyRegistry(max_keys=2, threshold=3)
+    Q1, Q2, Q3 = mult(1), mult(2), mult(3)
+
+    assert registry.lookup(Q1) is None
+    assert registry.lookup(Q1) is None
+    prepared = registry.lookup(Q1)
+    assert isinstance(prepared, PreparedPubKey)
+    assert prepared.Q == Q1
+    assert registry.lookup(Q1) is prepared
+    assert (Q1, ec) in registry
+    assert len(registry) == 1
+    assert registry.hits == 1
+    assert registry.misses == 3
+
+    for _ in range(3):
+        registry.lookup(Q2)
+    assert len(registry) == 2
+    # Q3 becomes hot: Q2 is the least frequently used key
+    for _ in range(3):
+        registry.lookup(Q3)
+    assert len(registry) == 2
+    assert (Q1, ec) in registry
+    assert (Q2, ec) not in registry
+    assert (Q3, ec) in registry
+
+    # pinned keys are never dropped
+    pinned = registry.pin(2)
+    assert pinned.Q == Q2
+    assert registry.pin(pinned) is pinned
+    registry.configure(max_keys=0)
+    assert len(registry) == 1
+    assert registry.lookup(Q2) is pinned
+    assert registry.lookup(Q1) is None
+    registry.unpin(pinned)
+    assert len(registry) == 0
+    registry.configure(max_keys=1)
+    registry.pin(Q2)
+    registry.unpin(2)
+    assert len(registry) == 1
+
+    # use counts are kept for a bounded number of keys
+    registry.configure(max_keys=1, threshold=2)
+    for q in range(4, 40):
+        assert registry.lookup(mult(q)) is None
+    assert len(registry._counts) <= 16
+    # a key not hot enough is forgotten
+    assert registry.lookup(mult(4)) is None
+
+    registry.clear()
+    assert len(registry) == 0
+    assert registry.hits == registry.misses == 0
+
+    with pytest.raises(ValueError, match="negative max_keys: "):
+        registry.configure(max_keys=-1)
+    with pytest.raises(ValueError, match="threshold must be positive: "):
+        KeyRegistry(threshold=0)
+
+
+def test_automatic_registry() -> None:
+    msg = "Satoshi Nakamoto"
+    q = 0x18E14A7B6A307F426A94F8114701E7C8E774E7F9A47E2C2035DB29A206321725
+    Q = mult(q)
+    dsa_sig = dsa.sign(msg, q)
+    ssa_sig = ssa.sign(msg, q)
+    x_Q, y_Q = ssa.point_from_bip340pubkey(Q)
+    assert not REGISTRY.enabled
+    try:
+        REGISTRY.clear()
+        # disabled by default: no lookup at all
+        for _ in range(REGISTRY.threshold + 1):
+            assert dsa.verify(msg, Q, dsa_sig)
+            assert ssa.verify(msg, Q, ssa_sig)
+        assert len(REGISTRY) == 0
+        assert REGISTRY.hits == REGISTRY.misses == 0
+
+        REGISTRY.configure(enabled=True)
+        for _ in range(REGISTRY.threshold + 1):
+            assert dsa.verify(msg, Q, dsa_sig)
+            assert ssa.verify(msg, Q, ssa_sig)
+        assert (Q, secp256k1) in REGISTRY
+        assert ((x_Q, y_Q), secp256k1) in REGISTRY
+        assert REGISTRY.hits > 0
+    finally:
+        REGISTRY.configure(enabled=False)
+        REGISTRY.clear()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.sigcache` module."
+
+from hashlib import sha1
+
+import pytest
+
+from btclib import bms, dsa, ssa
+from btclib.curve import CURVES, mult, secp256k1
+from btclib.prepared import PreparedPubKey
+from btclib.sigcache import SIGCACHE, SigCache
+
+
+def test_sigcache() -> None:
+    ec = secp256k1
+    cache = SigCache(max_entries=2)
+    assert not cache.enabled
+
+    e1 = cache.entry("ecdsa", ec, b"m", b"pubkey", b"sig")
+    assert e1 == cache.entry("ecdsa", ec, b"m", b"pubkey", b"sig")
+    # different salt
+    assert e1 != SigCache().entry("ecdsa", ec, b"m", b"pubkey", b"sig")
+    e2 = cache.entry("bip340", ec, b"m", b"pubkey", b"sig")
+    e3 = cache.entry("ecdsa", CURVES["secp256r1"], b"m", b"pubkey", b"sig")
+    # unambiguous concatenation
+    e4 = cache.entry("ecdsa", ec, b"mp", b"ubkey", b"sig")
+    assert len({e1, e2, e3, e4}) == 4
+
+    assert e1 not in cache
+    cache.add(e1)
+    cache.add(e2)
+    assert e1 in cache
+    assert len(cache) == 2
+    # e2 is the least recently used entry
+    cache.add(e3)
+    assert len(cache) == 2
+    assert e2 not in cache
+    assert e1 in cache
+    assert e3 in cache
+    assert cache.hits == 3
+    assert cache.misses == 2
+
+    cache.configure(max_entries=1)
+    assert len(cache) == 1
+    assert e3 in cache
+    cache.configure(max_entries=0)
+    cache.add(e1)
+    assert len(cache) == 0
+
+    cache.clear()
+    assert cache.hits == cache.misses == 0
+    with pytest.raises(ValueError, match="negative max_entries: "):
+        cache.configure(max_entries=-1)
+
+
+def test_verify() -> None:
+    msg = "Satoshi Nakamoto"
+    q = 0x18E14A7B6A307F426A94F8114701E7C8E774E7F9A47E2C2035DB29A206321725
+    Q = mult(q)
+    dsa_sig = dsa.sign(msg, q)
+    ssa_sig = ssa.sign(msg, q)
+    addr = bms.p2pkh(q)
+    bms_sig = bms.sign(msg, q)
+    try:
+        SIGCACHE.clear()
+        SIGCACHE.configure(enabled=True)
+
+        assert dsa.verify(msg, Q, dsa_sig)
+        assert ssa.verify(msg, Q, ssa_sig)
+        assert bms.verify(msg, addr, bms_sig)
+        assert len(SIGCACHE) == 3
+        assert SIGCACHE.hits == 0
+        assert dsa.verify(msg, Q, dsa_sig)
+        assert dsa.verify(msg, PreparedPubKey(Q), dsa.serialize(*dsa_sig))
+        assert ssa.verify(msg, Q[0], ssa_sig)
+        assert ssa.verify(msg, PreparedPubKey(Q), ssa.serialize(*ssa_sig))
+        assert bms.verify(msg, addr, bms.encode(*bms_sig))
+        assert len(SIGCACHE) == 3
+        assert SIGCACHE.hits == 5
+
+        # invalid signatures are not cached
+        assert not dsa.verify("Craig Wright", Q, dsa_sig)
+        assert not ssa.verify("Craig Wright", Q, ssa_sig)
+        assert not bms.verify("Craig Wright", addr, bms_sig)
+        assert not dsa.verify("Craig Wright", Q, dsa_sig)
+        assert not dsa.verify(msg, Q, (1, 1))
+        assert not dsa.verify(msg, Q, "invalid")
+        assert len(SIGCACHE) == 3
+
+        # the hash function is part of the entry
+        assert dsa.verify(msg, Q, dsa.sign(msg, q, hf=sha1), hf=sha1)
+        assert len(SIGCACHE) == 4
+
+        # not consulted when disabled
+        SIGCACHE.configure(enabled=False)
+        hits, misses = SIGCACHE.hits, SIGCACHE.misses
+        assert dsa.verify(msg, Q, dsa_sig)
+        assert not dsa.verify("Craig Wright", Q, dsa_sig)
+        assert (SIGCACHE.hits, SIGCACHE.misses) == (hits, misses)
+    finally:
+        SIGCACHE.configure(enabled=False)
+        SIGCACHE.clear()
@@ -19,7 +19,7 @@ from typing import List
 import pytest
 
 from btclib import ssa
-from btclib.alias import INF, Point
+from btclib.alias import INF, Point, SSASig
 from btclib.bip32 import BIP32KeyData
 from btclib.curve import CURVES, double_mult, mult
 from btclib.curvegroup import _mult
@@ -319,6 +319,65 @@ def test_batch_validation() -> None:
         ssa._batch_verify(ms, Qs, sigs, CURVES["secp224k1"], hf)
 
 
+def test_batch_invalid_indexes() -> None:
+
+    ec = CURVES["secp256k1"]
+
+    ms, Qs, sigs = [], [], []
+    for i in range(20):
+        ms.append(hf(f"message {i}".encode()).digest())
+        q = 1 + secrets.randbelow(ec.n - 1)
+        Qs.append(mult(q, ec.G, ec)[0])
+        sigs.append(ssa._sign(ms[-1], q, None, ec, hf))
+
+    # deterministic weights, from the hash of all the inputs
+    weights = ssa._batch_weights(ms, Qs, sigs, ec, hf)
+    assert weights == ssa._batch_weights(ms, Qs, sigs, ec, hf)
+    assert weights[0] == 1
+    assert all(0 < a < ec.n for a in weights)
+    assert weights != ssa._batch_weights(ms[::-1], Qs[::-1], sigs[::-1], ec, hf)
+    for deterministic in (True, False):
+        assert ssa.batch_verify(ms, Qs, sigs, ec, hf, deterministic)
+        assert ssa.invalid_indexes(ms, Qs, sigs, ec, hf, deterministic) == []
+
+    invalid_sigs: List[SSASig] = list(sigs)
+    invalid_sigs[0] = sigs[1]
+    invalid_sigs[13] = (sigs[13][0], sigs[13][1] % (ec.n - 1) + 1)
+    invalid_sigs[14] = (sigs[14][0], sigs[14][1] % (ec.n - 1) + 1)
+    invalid_sigs[19] = b"\x00" * 64
+    exp = [0, 13, 14, 19]
+    for deterministic in (True, False):
+        assert not ssa.batch_verify(ms, Qs, invalid_sigs, ec, hf, deterministic)
+        invalid = ssa.invalid_indexes(ms, Qs, invalid_sigs, ec, hf, deterministic)
+        assert invalid == exp
+    # bisection down to single signatures
+    min_batch_size = ssa._MIN_BATCH_SIZE
+    try:
+        ssa._MIN_BATCH_SIZE = 2
+        for deterministic in (True, False):
+            invalid_args = (ms, Qs, invalid_sigs, ec, hf, deterministic)
+            assert ssa.invalid_indexes(*invalid_args) == exp
+            valid_args = (ms, Qs, sigs, ec, hf, deterministic)
+            assert ssa.invalid_indexes(*valid_args) == []
+    finally:
+        ssa._MIN_BATCH_SIZE = min_batch_size
+    assert ssa.invalid_indexes([], [], [], ec, hf) == []
+    assert ssa.invalid_indexes(ms[:1], Qs[:1], invalid_sigs[:1], ec, hf) == [0]
+    err_msg = "mismatch between number of pubkeys "
+    with pytest.raises(ValueError, match=err_msg):
+        ssa.invalid_indexes(ms[:-1], Qs, sigs, ec, hf)
+
+    # streaming input, consumed in chunks
+    items = zip(ms * 3, Qs * 3, invalid_sigs * 3)
+    stream = ssa.stream_invalid_indexes(items, ec, hf, chunk_size=7)
+    assert list(stream) == [i + j * 20 for j in range(3) for i in exp]
+    assert list(ssa.stream_invalid_indexes(iter([]), ec, hf)) == []
+    valid = ((m, Q, sig) for _ in range(3) for m, Q, sig in zip(ms, Qs, sigs))
+    assert list(ssa.stream_invalid_indexes(valid, ec, hf, True, 16)) == []
+    with pytest.raises(ValueError, match="chunk_size must be positive: "):
+        list(ssa.stream_invalid_indexes(items, ec, hf, chunk_size=0))
+
+
 def test_musig() -> None:
     """testing 3-of-3 MuSig.
 
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2017-2020 The btclib developers
+#
+# This file is part of btclib. It is subject to the license terms in the
+# LICENSE file found in the top-level directory of this distribution.
+#
+# No part of btclib including this file, may be copied, modified, propagated,
+# or distributed except according to the terms contained in the LICENSE file.
+
+"Tests for `btclib.tablecache` module."
+
+import hashlib
+import os
+import secrets
+from pathlib import Path
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from btclib.alias import INFJ
+from btclib.curve import CURVES, secp256k1
+from btclib.curvegroup import _mult, _mult_fixed_base, multiples_fixwind
+from btclib.pedersen import second_generator
+from btclib.tablecache import (
+    _HEADER_SIZE,
+    MappedTable,
+    cache_dir,
+    fixwind_table,
+    table_filename,
+)
+from btclib.tests.test_curve import low_card_curves
+
+
+def test_cache_dir(monkeypatch: MonkeyPatch) -> None:
+
+    monkeypatch.setenv("BTCLIB_CACHE_DIR", "/some/dir")
+    assert cache_dir() == "/some/dir"
+
+    monkeypatch.setenv("BTCLIB_CACHE_DIR", "")
+    assert cache_dir() is None
+
+    monkeypatch.delenv("BTCLIB_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", "/xdg")
+    assert cache_dir() == os.path.join("/xdg", "btclib")
+
+    monkeypatch.delenv("XDG_CACHE_HOME")
+    exp = os.path.join(os.path.expanduser("~"), ".cache", "btclib")
+    assert cache_dir() == exp
+
+
+def test_fixwind_table(tmp_path: Path) -> None:
+
+    directory = str(tmp_path)
+    for ec in (secp256k1, CURVES["secp160r1"], low_card_curves["ec13_11"]):
+        for w in (1, 4):
+            Q = second_generator(ec)
+            filename = table_filename(Q, ec, w, directory)
+            assert not os.path.exists(filename)
+            T = fixwind_table(Q, ec, w, directory)
+            assert isinstance(T, MappedTable)
+            assert os.path.exists(filename)
+
+            T2 = fixwind_table(Q, ec, w, directory)
+            assert isinstance(T2, MappedTable)
+
+            exp = multiples_fixwind((Q[0], Q[1], 1), ec, w)
+            assert len(T) == len(T2) == len(exp)
+            for row, row2, exp_row in zip(T, T2, exp):
+                assert len(row) == len(row2) == len(exp_row) == 2 ** w
+                for P, P2, exp_P in zip(row, row2, exp_row):
+                    assert P == P2
+                    assert P[2] in (0, 1)
+                    assert ec._jac_equality(P, exp_P)
+            assert T[0][0] == INFJ
+
+    ec = secp256k1
+    T = fixwind_table(ec.G, ec, 5, directory)
+    for _ in range(10):
+        m = secrets.randbelow(ec.n)
+        assert ec._jac_equality(_mult_fixed_base(m, T, ec, 5), _mult(m, ec.GJ, ec))
+
+    row = T[1]
+    assert row[-1] == row[31]
+    assert row[1:3] == [row[1], row[2]]
+    with pytest.raises(IndexError, match="table index out of range: "):
+        row[32]  # pylint: disable=pointless-statement
+
+    with pytest.raises(ValueError, match="non positive w: "):
+        fixwind_table(ec.G, ec, 0, directory)
+
+
+def test_fixwind_table_regeneration(tmp_path: Path) -> None:
+
+    directory = str(tmp_path)
+    ec = secp256k1
+    Q = second_generator(ec)
+    w = 4
+    exp = multiples_fixwind((Q[0], Q[1], 1), ec, w)
+
+    def check() -> None:
+        T = fixwind_table(Q, ec, w, directory)
+        assert isinstance(T, MappedTable)
+        for row, exp_row in zip(T, exp):
+            for P, exp_P in zip(row, exp_row):
+                assert ec._jac_equality(P, exp_P)
+
+    filename = table_filename(Q, ec, w, directory)
+    check()
+    with open(filename, "rb") as f_in:
+        data = f_in.read()
+
+    corruptions = [
+        b"",  # empty file
+        data[:10],  # truncated header
+        data[:-1],  # truncated payload
+        b"x" + data[1:],  # invalid magic
+        data[:8] + bytes(32) + data[40:],  # invalid key
+        data[:40] + b"\x05" + data[41:],  # invalid window
+        data[:41] + b"\x00\x21" + data[43:],  # invalid field size
+        data[:-1] + bytes([data[-1] ^ 1]),  # invalid checksum
+    ]
+
+    # planted files, with a valid checksum
+    def planted(payload: bytes) -> bytes:
+        header = data[: _HEADER_SIZE - 32] + hashlib.sha256(payload).digest()
+        return header + payload
+
+    payload = data[_HEADER_SIZE:]
+    size = 2 * ec.psize
+    G = ec.G[0].to_bytes(ec.psize, "big") + ec.G[1].to_bytes(ec.psize, "big")
+    corruptions.append(planted(G + payload[size:]))  # row 0 entry 1 is not Q
+    corruptions.append(planted(payload[:size] + G + payload[2 * size :]))  # not 2Q
+    # only the first two entries are valid
+    not_on_curve = (1).to_bytes(ec.psize, "big") * 2
+    n_points = len(payload) // size
+    corruptions.append(planted(payload[: 2 * size] + not_on_curve * (n_points - 2)))
+    # a single on curve but wrong multiple
+    i = secrets.randbelow(n_points - 2) + 2
+    x_P = payload[i * size : i * size + ec.psize]
+    y_P = int.from_bytes(payload[i * size + ec.psize : (i + 1) * size], "big")
+    minus_P = x_P + (ec.p - y_P).to_bytes(ec.psize, "big")
+    corruptions.append(
+        planted(payload[: i * size] + minus_P + payload[(i + 1) * size :])
+    )
+    # swapped rows: every row is internally consistent
+    row_size = (2 ** w - 1) * size
+    rows = [payload[j : j + row_size] for j in range(0, len(payload), row_size)]
+    rows[1], rows[2] = rows[2], rows[1]
+    corruptions.append(planted(b"".join(rows)))
+
+    for corrupted in corruptions:
+        os.chmod(filename, 0o644)
+        with open(filename, "wb") as f_out:
+            f_out.write(corrupted)
+        check()
+        with open(filename, "rb") as f_in:
+            assert f_in.read() == data
+
+
+def test_fixwind_table_in_memory(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+
+    ec = secp256k1
+    Q = second_generator(ec)
+    exp = multiples_fixwind((Q[0], Q[1], 1), ec, 4)
+
+    # persistent cache disabled
+    monkeypatch.setenv("BTCLIB_CACHE_DIR", "")
+    assert fixwind_table(Q, ec, 4) == exp
+
+    # not writable cache directory
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_bytes(b"")
+    assert fixwind_table(Q, ec, 4, str(not_a_dir)) == exp